@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+
+# read once at import (main thread); os.umask() is process-global
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write(path, data, fsync=True):
+    """
+    Write `data` (bytes) to `path` without ever leaving a truncated file:
+    write a temp file next to it, fsync, then os.replace() over the target.
+    Permissions of an existing file are kept.
+    """
+    d = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=d)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        try:
+            shutil.copymode(path, tmp)
+        except OSError:
+            os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        # make the rename itself durable
+        try:
+            dfd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dfd)
+        except OSError:
+            pass
+        finally:
+            os.close(dfd)
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import uuid
+import queue
+import hashlib
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from atomic_io import atomic_write
+from perf_trace import tracer
+from config import DATA_DIR, get_setting
+
+SWAP_DIR = os.path.join(DATA_DIR, "swap")
+SWAP_VERSION = 1
+
+
+def swap_key(path):
+    """Swap files are named by a hash of the absolute path, so equal basenames never collide."""
+    return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+
+
+class _SwapWriter(QThread):
+    """Serialises and writes (or removes) swap files off the GUI thread."""
+
+    failed = pyqtSignal(str, str)  # swap path, error
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, path, payload = job
+            try:
+                if kind == "write":
+                    with tracer.span("autosave", "io"):
+                        # the text is joined here, off the GUI thread
+                        payload = dict(payload, text=payload["text"].text())
+                        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+                        atomic_write(path, data)
+                elif os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                self.failed.emit(path, str(e))
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+
+class AutosaveManager(QObject):
+    """
+    Periodically snapshots dirty buffers into swap files. Only documents
+    whose edit revision moved since the last snapshot are written; swaps
+    of buffers that became clean or were closed are removed.
+    """
+
+    def __init__(self, editor_area, parent=None, interval_ms=None, swap_dir=SWAP_DIR):
+        super().__init__(parent)
+        self.editor_area = editor_area
+        self.swap_dir = swap_dir
+        os.makedirs(self.swap_dir, exist_ok=True)
+        self._snap_rev = {}   # swap file path -> edit revision written
+        self._writer = _SwapWriter(self)
+        self._writer.failed.connect(lambda p, e: print(f"⚠️  Autosave failed for '{p}': {e}"))
+        self._writer.start()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms or get_setting("autosave_interval_ms", 30000))
+        self.timer.timeout.connect(self.autosave_all)
+        self.timer.start()
+
+    # ── swap naming ──────────────────────────────────────────────────────
+    def swap_path_for(self, ed):
+        path = getattr(ed, "file_path", None)
+        if path:
+            key = swap_key(path)
+        else:
+            # untitled buffers get a stable random id for their lifetime
+            if not getattr(ed, "swap_id", None):
+                ed.swap_id = uuid.uuid4().hex
+            key = "untitled-" + ed.swap_id
+        return os.path.join(self.swap_dir, key + ".swp")
+
+    # ── snapshotting ─────────────────────────────────────────────────────
+    def autosave_all(self):
+        live = set()
+        for ed in self.editor_area.text_editors():
+            swap = self.swap_path_for(ed)
+            if swap in live:
+                continue  # split clone of a buffer we already handled
+            doc = ed.document()
+            if not doc.isModified():
+                continue
+            live.add(swap)
+            rev = ed.edit_revision
+            if self._snap_rev.get(swap) == rev:
+                continue
+            self._snap_rev[swap] = rev
+            self._writer.jobs.put(("write", swap, {
+                "version": SWAP_VERSION,
+                "path": os.path.abspath(ed.file_path) if getattr(ed, "file_path", None) else None,
+                "swap_id": getattr(ed, "swap_id", None),
+                "saved_at": time.time(),
+                "text": ed.snapshot(),
+            }))
+        # clean or closed buffers don't need their swap any more
+        for swap in list(self._snap_rev):
+            if swap not in live:
+                del self._snap_rev[swap]
+                self._writer.jobs.put(("remove", swap, None))
+
+    def discard(self, ed):
+        """Drop the swap of `ed` right away (e.g. after a successful save)."""
+        swap = self.swap_path_for(ed)
+        self._snap_rev.pop(swap, None)
+        self._writer.jobs.put(("remove", swap, None))
+
+    def shutdown(self):
+        """Take a final snapshot and wait for pending writes."""
+        self.timer.stop()
+        self.autosave_all()
+        self._writer.stop()
+
+    # ── recovery ─────────────────────────────────────────────────────────
+    def pending_recoveries(self):
+        """Swap payloads left behind by a previous session, oldest first."""
+        found = []
+        for fn in os.listdir(self.swap_dir):
+            if not fn.endswith(".swp"):
+                continue
+            full = os.path.join(self.swap_dir, fn)
+            try:
+                with open(full, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if payload.get("version") != SWAP_VERSION:
+                continue
+            payload["swap_file"] = full
+            found.append(payload)
+        return sorted(found, key=lambda p: p.get("saved_at", 0))
+
+    def forget(self, payload):
+        self._writer.jobs.put(("remove", payload["swap_file"], None))
@@ -0,0 +1,364 @@
+"""
+Headless benchmarks for the editor's hot paths, run on the offscreen Qt
+platform against generated projects (see synthetic.py).
+
+    python benchmarks/run_benchmarks.py                    # all, full size
+    python benchmarks/run_benchmarks.py --quick -o base.json
+    python benchmarks/run_benchmarks.py --only highlight,search
+    python benchmarks/run_benchmarks.py --compare base.json new.json
+
+Each benchmark reports min/median/p95 latency in ms and a throughput.
+--compare flags every benchmark whose median got slower than the
+threshold (default 10%) and exits with status 1 if any did.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# keep config, swap files and session state out of the real home
+_HOME = tempfile.mkdtemp(prefix="nexus-bench-home-")
+os.environ["HOME"] = _HOME
+os.environ["XDG_CONFIG_HOME"] = os.path.join(_HOME, ".config")
+
+import synthetic  # noqa: E402
+
+BENCHMARKS = {}   # name -> (function, unit)
+
+
+def bench(name, unit):
+    def register(fn):
+        BENCHMARKS[name] = (fn, unit)
+        return fn
+    return register
+
+
+class Context:
+    def __init__(self, workdir, quick, repeat):
+        self.workdir = workdir
+        self.quick = quick
+        self.repeat = repeat
+
+    def size(self, full, quick):
+        return quick if self.quick else full
+
+    def path(self, *parts):
+        return os.path.join(self.workdir, *parts)
+
+
+def measure(fn, repeat, warmup=1):
+    """Call fn() `warmup` + `repeat` times; seconds for the timed calls."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def spin(app, until, timeout=30.0):
+    """Process events until until() is true."""
+    end = time.perf_counter() + timeout
+    while not until():
+        if time.perf_counter() > end:
+            raise TimeoutError("benchmark timed out waiting for the event loop")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+# ────── benchmarks ───────────────────────────────────────────────────────────
+# each returns (latencies in seconds, units of work per timed call)
+
+@bench("highlight.python", "lines/s")
+def b_highlight(ctx, main):
+    from PyQt6.QtGui import QTextDocument
+    n = ctx.size(20000, 3000)
+    doc = QTextDocument()
+    doc.setPlainText(synthetic.python_source(n, seed=1))
+    hl = main.CustomHighlighter(doc, main.SYNTAX_RULES["python"])
+    return measure(hl.rehighlight, ctx.repeat), n
+
+
+@bench("highlight.long_lines", "MB/s")
+def b_highlight_long(ctx, main):
+    from PyQt6.QtGui import QTextDocument
+    text = synthetic.long_lines(ctx.size(200, 40), 20000, seed=2)
+    doc = QTextDocument()
+    doc.setPlainText(text)
+    hl = main.CustomHighlighter(doc, main.SYNTAX_RULES["python"])
+    return measure(hl.rehighlight, ctx.repeat), len(text) / 1e6
+
+
+@bench("editor.keystroke", "keys/s")
+def b_keystroke(ctx, main):
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtTest import QTest
+    ed = main.CodeEditor()
+    ed.highlighter = main.CustomHighlighter(ed.document(), main.SYNTAX_RULES["python"])
+    ed.resize(1000, 800)
+    ed.show()
+    ed.setPlainText(synthetic.python_source(ctx.size(20000, 3000), seed=3))
+    tc = ed.textCursor()
+    tc.setPosition(ed.document().findBlockByNumber(ed.blockCount() // 2).position())
+    ed.setTextCursor(tc)
+    keys = iter("x(y)[z]" * 10000)
+    app = QApplication.instance()
+
+    def one_key():
+        QTest.keyClick(ed, next(keys))
+        app.processEvents()   # include the repaint
+    times = measure(one_key, ctx.repeat * 10)
+    QTest.keyClick(ed, Qt.Key.Key_Z, Qt.KeyboardModifier.ControlModifier)
+    ed.close()
+    return times, 1
+
+
+@bench("search.project", "files/s")
+def b_search_project(ctx, main):
+    root = ctx.path("project")
+    files = synthetic.make_project(root, files=ctx.size(2000, 300), seed=4)
+    opts = {"regex": False, "case": True, "whole": False, "include": [], "exclude": []}
+
+    def run():
+        w = main.SearchWorker(root, synthetic.NEEDLE, opts, files)
+        w.run()  # synchronously; we only want the scanning cost
+    return measure(run, ctx.repeat), len(files)
+
+
+@bench("search.huge_file.regex", "MB/s")
+def b_search_huge(ctx, main):
+    path = synthetic.write(ctx.path("huge", "big.py"),
+                           synthetic.python_source(ctx.size(400000, 60000), seed=5, needle_every=997))
+    opts = {"regex": True, "case": False, "whole": True, "include": [], "exclude": []}
+
+    def run():
+        main.SearchWorker(os.path.dirname(path), r"needle_\w+", opts, [path]).run()
+    return measure(run, ctx.repeat), os.path.getsize(path) / 1e6
+
+
+@bench("quick_open.filter", "keys/s")
+def b_quick_open(ctx, main):
+    rng = random.Random(6)
+    n = ctx.size(100000, 20000)
+    dlg = main.QuickOpenDialog(lambda p: None)
+    dlg.files = [os.path.join(*(synthetic._ident(rng) for _ in range(rng.randint(1, 6)))) + f"_{i}.py"
+                 for i in range(n)]
+    queries = ["c", "co", "con", "conf", "confi", "config", "config/", "config/s", "zzz"]
+    it = iter(queries * (ctx.repeat + 2))
+    return measure(lambda: dlg.on_filter(next(it)), ctx.repeat * 4), 1
+
+
+@bench("brackets.match", "calls/s")
+def b_brackets(ctx, main):
+    ed = main.CodeEditor()
+    ed.setPlainText(synthetic.python_source(ctx.size(50000, 5000), seed=7))
+    text = ed.toPlainText()
+    rng = random.Random(7)
+    spots = [i for i in (rng.randrange(len(text)) for _ in range(20000)) if text[i] in "([{"][:500]
+    it = iter(spots * 50)
+
+    def one():
+        tc = ed.textCursor()
+        tc.setPosition(next(it))
+        ed.setTextCursor(tc)   # cursorPositionChanged runs match_brackets
+    return measure(one, ctx.repeat * 20), 1
+
+
+@bench("tabs.open", "ms")
+def b_tab_open(ctx, main):
+    path = synthetic.write(ctx.path("open", "module.py"),
+                           synthetic.python_source(ctx.size(10000, 2000), seed=8))
+    area = main.EditorArea()
+
+    def open_close():
+        area.new_tab(path)
+        area.tabs.widget(0).deleteLater()
+        area.tabs.removeTab(0)
+    return measure(open_close, ctx.repeat), 1
+
+
+@bench("tabs.open_huge", "MB/s")
+def b_tab_open_huge(ctx, main):
+    path = synthetic.write(ctx.path("open", "huge.txt"),
+                           synthetic.python_source(ctx.size(300000, 40000), seed=9))
+    area = main.EditorArea()
+
+    def open_close():
+        area.new_tab(path)
+        area.tabs.widget(0).deleteLater()
+        area.tabs.removeTab(0)
+    return measure(open_close, max(3, ctx.repeat // 2)), os.path.getsize(path) / 1e6
+
+
+@bench("tabs.restore", "tabs/s")
+def b_tab_restore(ctx, main):
+    root = ctx.path("restore")
+    files = synthetic.make_project(root, files=ctx.size(300, 60), seed=10)
+    states = [{"path": p, "cursor": 0, "anchor": 0, "scroll": 0} for p in files]
+    area = main.EditorArea()
+
+    def restore():
+        area.restore_tabs(states, active=len(states) // 2)
+        area.tabs.clear()
+    return measure(restore, ctx.repeat), len(states)
+
+
+@bench("save.large", "MB/s")
+def b_save(ctx, main):
+    from PyQt6.QtWidgets import QApplication
+    from save_pipeline import SavePipeline
+    app = QApplication.instance()
+    ed = main.CodeEditor()
+    ed.setPlainText(synthetic.python_source(ctx.size(200000, 30000), seed=11))
+    path = ctx.path("save", "out.py")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pipeline = SavePipeline()
+    done = []
+    pipeline.saved.connect(done.append)
+    flip = [0]
+
+    def save():
+        # change one character so every save really writes
+        tc = ed.textCursor()
+        tc.setPosition(0)
+        tc.setPosition(1, tc.MoveMode.KeepAnchor)
+        tc.insertText("ab"[flip[0] % 2])
+        flip[0] += 1
+        n = len(done)
+        pipeline.save(path, ed.snapshot(), "utf-8")
+        spin(app, lambda: len(done) > n)
+    times = measure(save, ctx.repeat)
+    pipeline.shutdown()
+    return times, os.path.getsize(path) / 1e6
+
+
+# ────── running & comparing ──────────────────────────────────────────────────
+def summarize(times, work, unit):
+    ms = sorted(t * 1000 for t in times)
+    median = statistics.median(ms)
+    out = {
+        "unit": unit,
+        "samples": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(median, 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+    }
+    if unit != "ms":
+        out["throughput"] = round(work / (median / 1000), 2) if median else None
+    return out
+
+
+def machine_info():
+    from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    try:
+        commit = subprocess.check_output(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(names, quick, repeat):
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import main
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="nexus-bench-") as workdir:
+        ctx = Context(workdir, quick, repeat)
+        for name in names:
+            fn, unit = BENCHMARKS[name]
+            print(f"  {name:<26}", end="", flush=True)
+            times, work = fn(ctx, main)
+            app.processEvents()
+            results[name] = r = summarize(times, work, unit)
+            tput = f"  {r['throughput']:>12,.1f} {unit}" if "throughput" in r else ""
+            print(f"median {r['median_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms{tput}")
+    return {"meta": dict(machine_info(), quick=quick, repeat=repeat), "results": results}
+
+
+def compare(old, new, threshold):
+    """Print a comparison table; returns the names that regressed."""
+    regressed = []
+    print(f"{'benchmark':<26} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        a, b = old["results"].get(name), new["results"].get(name)
+        if a is None or b is None:
+            print(f"{name:<26} {'—' if a is None else format(a['median_ms'], '.2f'):>10} "
+                  f"{'—' if b is None else format(b['median_ms'], '.2f'):>10}")
+            continue
+        change = (b["median_ms"] - a["median_ms"]) / a["median_ms"] if a["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<26} {a['median_ms']:>10.2f} {b['median_ms']:>10.2f} {change:>+7.1%}{flag}")
+    if old.get("meta", {}).get("quick") != new.get("meta", {}).get("quick"):
+        print("⚠️  comparing a --quick run with a full run; sizes differ")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Nexus Editor hot-path benchmarks")
+    ap.add_argument("--only", help="comma-separated benchmark names or prefixes")
+    ap.add_argument("--quick", action="store_true", help="smaller inputs, for a fast check")
+    ap.add_argument("--repeat", type=int, default=7, help="timed runs per benchmark")
+    ap.add_argument("-o", "--output", default="benchmark_results.json")
+    ap.add_argument("--compare", nargs="+", metavar="JSON",
+                    help="OLD [NEW]: compare two result files (or OLD against a fresh run)")
+    ap.add_argument("--threshold", type=float, default=0.10,
+                    help="relative slowdown of the median that counts as a regression")
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args()
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    names = list(BENCHMARKS)
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",") if w.strip()]
+        names = [n for n in names if any(n.startswith(w) for w in wanted)]
+
+    if args.compare and len(args.compare) >= 2:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        return 1 if compare(old, new, args.threshold) else 0
+
+    print(f"Running {len(names)} benchmarks ({'quick' if args.quick else 'full'}, {args.repeat} runs each)")
+    data = run(names, args.quick, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        return 1 if compare(old, data, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Deterministic synthetic inputs for the benchmarks: Python-looking source,
+huge files, very long lines and deep project trees. The same seed always
+produces the same bytes, so runs on different machines are comparable.
+"""
+import os
+import random
+
+NEEDLE = "needle_token"
+
+_WORDS = ("value", "result", "index", "buffer", "widget", "cursor", "path", "item",
+          "config", "count", "node", "layout", "handler", "editor", "state", "offset")
+
+
+def _ident(rng):
+    return "_".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+
+
+def python_lines(n, seed=0, needle_every=0):
+    """`n` lines of plausible Python: defs, calls, strings, comments, brackets."""
+    rng = random.Random(seed)
+    out = []
+    depth = 0
+    while len(out) < n:
+        kind = rng.random()
+        pad = "    " * depth
+        if kind < 0.08:
+            out.append(f"{pad}def {_ident(rng)}(self, {_ident(rng)}, {_ident(rng)}=None):")
+            out.append(f'{pad}    """{_ident(rng).replace("_", " ")} docstring."""')
+            depth = min(depth + 1, 3)
+        elif kind < 0.12:
+            out.append(f"class {_ident(rng).title().replace('_', '')}(QObject):")
+            depth = 1
+        elif kind < 0.22:
+            out.append(f"{pad}# {' '.join(rng.choice(_WORDS) for _ in range(8))}")
+        elif kind < 0.32:
+            out.append(f"{pad}if {_ident(rng)} and ({_ident(rng)} > {rng.randint(0, 99)}):")
+            out.append(f"{pad}    return [{_ident(rng)}[i] for i in range({rng.randint(1, 9)})]")
+        elif kind < 0.40 and depth > 0:
+            depth -= 1
+            out.append("")
+        else:
+            out.append(f"{pad}{_ident(rng)} = self.{_ident(rng)}({_ident(rng)}, "
+                       f"'{_ident(rng)}', {{'k': {rng.randint(0, 999)}}})")
+        if needle_every and len(out) % needle_every == 0:
+            out.append(f"{pad}{NEEDLE} = {len(out)}")
+    return out[:n]
+
+
+def python_source(n, seed=0, needle_every=0):
+    return "\n".join(python_lines(n, seed, needle_every)) + "\n"
+
+
+def long_lines(n, width, seed=0):
+    """`n` lines of about `width` characters each (minified-bundle style)."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        parts = []
+        size = 0
+        while size < width:
+            p = f"{_ident(rng)}({rng.randint(0, 9999)},'{_ident(rng)}');"
+            parts.append(p)
+            size += len(p)
+        lines.append("".join(parts))
+    return "\n".join(lines) + "\n"
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def make_project(root, files=500, depth=6, lines=120, seed=0):
+    """
+    A tree of `files` small source files spread over directories up to
+    `depth` levels deep, every tenth one containing NEEDLE. Returns the
+    file paths.
+    """
+    rng = random.Random(seed)
+    dirs = [root]
+    for _ in range(max(1, files // 8)):
+        parent = rng.choice(dirs)
+        if parent.count(os.sep) - root.count(os.sep) < depth:
+            dirs.append(os.path.join(parent, _ident(rng)))
+    paths = []
+    exts = (".py", ".py", ".py", ".js", ".css", ".html", ".md", ".txt")
+    for i in range(files):
+        d = rng.choice(dirs)
+        ext = rng.choice(exts)
+        text = python_source(lines, seed + i, needle_every=lines // 2 if i % 10 == 0 else 0)
+        paths.append(write(os.path.join(d, f"{_ident(rng)}_{i}{ext}"), text))
+    return paths
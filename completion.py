@@ -0,0 +1,318 @@
+import re
+import math
+import time
+import heapq
+import bisect
+from collections import Counter
+from itertools import chain
+from PyQt6.QtCore import Qt, QObject, QTimer, QStringListModel
+from PyQt6.QtWidgets import QApplication, QCompleter
+from perf_trace import tracer
+
+TOKEN = re.compile(r"(?:[^\W\d]|\$)[\w$]{2,}")     # identifiers/words of 3+ characters
+WORD_BEFORE = re.compile(r"[\w$]+$")
+MIN_PREFIX = 2          # characters typed before the popup opens by itself
+MAX_SCAN = 4000         # a prefix with more matches scores only the most frequent (plus recent/local)
+MAX_ITEMS = 12
+BULK = 64               # more new keys than this: re-sort instead of insort
+TYPED_CHARS = 200       # edits up to this size count as typing for recency
+BULK_BLOCKS = 2000      # bigger changes (file loads, pastes) are tokenized when idle
+
+
+class TokenIndex(QObject):
+    """
+    Occurrence counts of every token in the open documents plus the
+    project's symbol names, with a sorted (lowercase, token) list for
+    prefix lookups. Sources push deltas (apply) rather than having the
+    index re-scan anything; tokens whose count drops to 0 stay in the
+    sorted list until enough of them pile up to be worth a compaction.
+    Prefixes with more than MAX_SCAN matches keep their most frequent
+    tokens in `_top`, topped up by apply() as counts rise.
+    """
+
+    _instance = None
+
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            cls._instance = cls(QApplication.instance())
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.counts = {}        # token -> occurrences (0: dead, still in _keys)
+        self.recent = {}        # token -> monotonic time last typed or accepted
+        self._keys = []         # sorted (token.lower(), token)
+        self._dead = 0
+        self._top = {}          # lowercase prefix -> [count floor, set of its most frequent tokens]
+
+    def __len__(self):
+        return len(self.counts) - self._dead
+
+    def apply(self, added=None, removed=None):
+        """Add/subtract token Counters."""
+        counts = self.counts
+        for tok, n in (removed or {}).items():
+            c = counts.get(tok, 0) - n
+            if c <= 0:
+                if counts.get(tok):
+                    self._dead += 1
+                c = 0
+            counts[tok] = c
+        new = []
+        for tok, n in (added or {}).items():
+            c = counts.get(tok)
+            if c is None:
+                new.append((tok.lower(), tok))
+            elif c == 0:
+                self._dead -= 1
+            counts[tok] = (c or 0) + n
+        if len(new) > BULK:
+            self._keys.extend(new)
+            self._keys.sort()
+        else:
+            for key in new:
+                bisect.insort(self._keys, key)
+        if self._top and added:
+            if len(added) > BULK:
+                self._top = {}
+            else:
+                # a token whose count passes a prefix's floor joins its top set
+                for tok in added:
+                    low = tok.lower()
+                    for prefix, top in self._top.items():
+                        if counts[tok] > top[0] and low.startswith(prefix):
+                            top[1].add(tok)
+        if self._dead > 10000 and self._dead * 2 > len(self._keys):
+            self._compact()
+
+    def _compact(self):
+        self.counts = {t: c for t, c in self.counts.items() if c}
+        self._keys = [k for k in self._keys if k[1] in self.counts]
+        self.recent = {t: r for t, r in self.recent.items() if t in self.counts}
+        self._dead = 0
+        self._top = {}
+
+    def apply_project(self, added, removed):
+        """Apply a change in the project-wide names (symbol index), given as Counters."""
+        self.apply(Counter({n: c for n, c in added.items() if TOKEN.fullmatch(n)}),
+                   Counter({n: c for n, c in removed.items() if TOKEN.fullmatch(n)}))
+
+    def touch(self, tokens):
+        now = time.monotonic()
+        for tok in tokens:
+            self.recent[tok] = now
+
+    def query(self, prefix, local=None, limit=MAX_ITEMS):
+        """
+        Tokens starting with `prefix` (case-insensitively), best first:
+        exact-case prefix, frequency (log-scaled), how recently they were
+        typed, and whether `local` (the current document's Counter) has them.
+        """
+        if not prefix:
+            return []
+        low = prefix.lower()
+        now = time.monotonic()
+        counts, recent = self.counts, self.recent
+        lo = bisect.bisect_left(self._keys, (low,))
+        hi = bisect.bisect_left(self._keys, (low + "\U0010ffff",), lo)
+        if hi - lo <= MAX_SCAN:
+            tokens = [tok for _, tok in self._keys[lo:hi]]
+        else:
+            # a short prefix: only the most frequent matches, plus those that
+            # recency or the current document could still lift above them
+            top = self._top.get(low)
+            if top is None:
+                best = heapq.nlargest(MAX_SCAN, (tok for _, tok in self._keys[lo:hi]),
+                                      key=counts.__getitem__)
+                top = self._top[low] = [counts[best[-1]], set(best)]
+            cands = set(top[1])
+            cands.update(t for t in recent if t.lower().startswith(low))
+            if local is not None:
+                cands.update(t for t in local if t.lower().startswith(low))
+            tokens = cands
+        scored = []
+        for tok in tokens:
+            n = counts.get(tok)
+            if not n or tok == prefix:
+                continue
+            score = math.log1p(n)
+            if tok.startswith(prefix):
+                score += 0.5
+            t = recent.get(tok)
+            if t is not None:
+                score += 3.0 / (1.0 + (now - t) / 60.0)
+            if local is not None and local.get(tok):
+                score += 1.0
+            scored.append((score, tok))
+        return [tok for _, tok in heapq.nlargest(limit, scored)]
+
+
+class DocumentTokens:
+    """
+    One document's share of the TokenIndex: a tuple of tokens per block,
+    kept in a list indexed by block number. Each contentsChange re-tokenizes
+    only the blocks the change now covers (the same range the highlighter
+    re-runs) and splices them over the blocks they replace, so blocks that
+    were deleted are subtracted exactly. Big changes store None (not
+    counted yet) and are filled in BULK_BLOCKS at a time from a timer.
+    The owner calls detach() before the document goes away.
+    """
+
+    def __init__(self, document, index=None):
+        self.doc = document
+        self.index = index or TokenIndex.shared()
+        self.lines = [()] * document.blockCount()
+        self.total = Counter()
+        self._fill_from = 0
+        self._timer = QTimer(document)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fill)
+        document.contentsChange.connect(self._on_change)
+
+    def _count(self, gained, lost, typed=False):
+        gained, lost = gained - lost, lost - gained
+        self.total.update(gained)
+        self.total.subtract(lost)
+        self.index.apply(gained, lost)
+        if typed:
+            self.index.touch(gained)
+
+    def _on_change(self, pos, removed, added):
+        doc = self.doc
+        delta = doc.blockCount() - len(self.lines)
+        first = doc.findBlock(pos)
+        last = doc.findBlock(pos + added)
+        if not last.isValid():
+            last = doc.lastBlock()
+        a, b = first.blockNumber(), last.blockNumber()
+        # uncounted blocks after `a` may have shifted
+        self._fill_from = min(self._fill_from, a)
+        if b - a >= BULK_BLOCKS:
+            new = [None] * (b - a + 1)
+            self._timer.start()
+        else:
+            new = []
+            block = first
+            while True:
+                new.append(tuple(TOKEN.findall(block.text())))
+                if block == last:
+                    break
+                block = block.next()
+        old = self.lines[a:b - delta + 1]
+        if old == new:
+            return
+        self.lines[a:b - delta + 1] = new
+        self._count(Counter(chain.from_iterable(n for n in new if n)),
+                    Counter(chain.from_iterable(o for o in old if o)), added <= TYPED_CHARS)
+
+    def _fill(self):
+        lines = self.lines
+        try:
+            i = lines.index(None, self._fill_from)
+        except ValueError:
+            self._fill_from = len(lines)
+            return
+        with tracer.span("completion tokens", "editor"):
+            block = self.doc.findBlockByNumber(i)
+            gained = Counter()
+            end = min(len(lines), i + BULK_BLOCKS)
+            while i < end and block.isValid():
+                if lines[i] is None:
+                    lines[i] = toks = tuple(TOKEN.findall(block.text()))
+                    gained.update(toks)
+                block = block.next()
+                i += 1
+            self._fill_from = i
+            self._count(gained, Counter())
+        self._timer.start()
+
+    def pending(self):
+        return None in self.lines
+
+    def detach(self):
+        """Take this document's tokens out of the index (its tab is closing)."""
+        if self.doc is None:
+            return
+        self._timer.stop()
+        self.doc.contentsChange.disconnect(self._on_change)
+        self.index.apply(removed=self.total)
+        self.total = Counter()
+        self.lines = []
+        self.doc = None
+
+
+class EditorCompletion:
+    """
+    The completion popup of one CodeEditor (a QCompleter in unfiltered
+    mode; the ranking is ours). It opens after MIN_PREFIX word characters
+    or on Ctrl+Space, and is refilled on every keystroke.
+    """
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.tokens = DocumentTokens(editor.document())
+        self.model = QStringListModel()
+        self.completer = QCompleter(self.model, editor)
+        self.completer.setWidget(editor)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.activated.connect(self.insert)
+
+    def visible(self):
+        return self.completer.popup().isVisible()
+
+    def hide(self):
+        self.completer.popup().hide()
+
+    def handle_key(self, ev):
+        """True if `ev` belongs to the open popup (the completer acts on it)."""
+        if self.visible() and ev.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter, Qt.Key.Key_Tab,
+                                           Qt.Key.Key_Backtab, Qt.Key.Key_Escape):
+            ev.ignore()
+            return True
+        return False
+
+    def is_trigger(self, ev):
+        return (ev.key() == Qt.Key.Key_Space
+                and ev.modifiers() & Qt.KeyboardModifier.ControlModifier)
+
+    def _prefix(self):
+        tc = self.editor.textCursor()
+        m = WORD_BEFORE.search(tc.block().text()[:tc.positionInBlock()])
+        return m.group(0) if m else ""
+
+    def after_key(self, ev):
+        """Open, refill or close the popup after the editor handled `ev`."""
+        manual = self.is_trigger(ev)
+        typed = ev.text()
+        if not manual and not (self.visible() and ev.key() == Qt.Key.Key_Backspace) and \
+                not (typed and (typed[-1].isalnum() or typed[-1] in "_$")):
+            self.hide()
+            return
+        self.update(manual)
+
+    def update(self, manual=False):
+        prefix = self._prefix()
+        if not prefix or (len(prefix) < MIN_PREFIX and not manual) or self.editor.multi.active():
+            self.hide()
+            return
+        with tracer.span("completion", "editor"):
+            items = self.tokens.index.query(prefix, self.tokens.total)
+        if not items:
+            self.hide()
+            return
+        self.model.setStringList(items)
+        popup = self.completer.popup()
+        popup.setCurrentIndex(self.model.index(0, 0))
+        rect = self.editor.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width() + 8)
+        self.completer.complete(rect)
+
+    def insert(self, token):
+        tc = self.editor.textCursor()
+        n = len(self._prefix())
+        tc.movePosition(tc.MoveOperation.Left, tc.MoveMode.KeepAnchor, n)
+        tc.insertText(token)
+        self.editor.setTextCursor(tc)
+        self.tokens.index.touch((token,))
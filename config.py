@@ -1,7 +1,23 @@
 import os
 import json
 
-CONFIG_PATH = os.path.expanduser("~/.nexus_editor/config.json")
+DATA_DIR = os.path.expanduser("~/.nexus_editor")
+CONFIG_PATH = os.path.join(DATA_DIR, "config.json")
+
+
+def load_config():
+    """Return the parsed config file, or an empty dict if it is missing/broken."""
+    try:
+        with open(CONFIG_PATH, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def get_setting(key, default=None):
+    """Look up a single user setting, falling back to `default`."""
+    return load_config().get(key, default)
 
 
 def is_first_launch():
@@ -17,5 +33,7 @@ def is_first_launch():
 
 def mark_launched():
     os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
+    data = load_config()
+    data["launched_before"] = True
     with open(CONFIG_PATH, "w") as f:
-        json.dump({"launched_before": True}, f)
+        json.dump(data, f)
@@ -0,0 +1,494 @@
+import io
+import os
+import re
+import csv
+import mmap
+import queue
+import bisect
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, islice
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QApplication, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QPlainTextEdit, QStackedLayout,
+    QTableView, QToolButton, QVBoxLayout, QWidget,
+)
+from perf_trace import tracer
+
+CHUNK = 16 << 20            # bytes indexed between progress reports
+CACHE_ROWS = 4096           # parsed rows kept per model
+MAX_CELL = 1000             # characters shown per cell
+CHECK_EVERY = 1 << 16       # rows between cancellation checks in sort/filter
+RAW_MAX = 8 << 20           # bytes loaded into the raw text view
+FILTER_MS = 250
+SNIFF_BYTES = 64 << 10
+NUMBER = re.compile(rb"\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\s*")
+
+
+def sniff_dialect(path):
+    """(delimiter, header fields) from the start of `path`."""
+    try:
+        with open(path, "rb") as f:
+            sample = f.read(SNIFF_BYTES).decode("utf-8-sig", errors="replace")
+    except OSError:
+        return ",", []
+    # only whole lines; the sample may end mid-row
+    sample = sample[:sample.rfind("\n") + 1] or sample
+    if path.lower().endswith((".tsv", ".tab")):
+        delimiter = "\t"
+    else:
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ","
+    header = next(csv.reader(io.StringIO(sample), delimiter=delimiter), [])
+    return delimiter, header
+
+
+def parse_row(raw, delimiter):
+    """Fields of one row's bytes (quotes, embedded delimiters and newlines handled)."""
+    text = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+    if '"' not in text:
+        return text.split(delimiter)
+    return next(csv.reader(text.splitlines(True) or [""], delimiter=delimiter), [])
+
+
+def column_value(raw, delimiter, column):
+    """Field `column` of one row as bytes; unquoted rows are split only up to that field."""
+    if b'"' in raw:
+        fields = parse_row(raw, delimiter)
+        return fields[column].encode("utf-8") if column < len(fields) else b""
+    parts = raw.rstrip(b"\r\n").split(delimiter.encode("utf-8"), column + 1)
+    return parts[column] if column < len(parts) else b""
+
+
+def sort_rows(rows, values, descending=False):
+    """
+    `rows` ordered by their `values` (bytes): numbers before text, numbers
+    numerically, text case-insensitively. The two groups are sorted apart
+    so every comparison is between plain floats or strs.
+    """
+    num_rows, num_keys, text_rows, text_keys = [], [], [], []
+    is_number = NUMBER.fullmatch
+    for row, value in zip(rows, values):
+        if is_number(value):
+            num_rows.append(row)
+            num_keys.append(float(value))
+        else:
+            text_rows.append(row)
+            text_keys.append(value.decode("utf-8", errors="replace").lower())
+    groups = []
+    for group, keys in ((num_rows, num_keys), (text_rows, text_keys)):
+        order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+        groups.append([group[i] for i in order])
+    return groups[1] + groups[0] if descending else groups[0] + groups[1]
+
+
+class CsvWorker(QThread):
+    """
+    Shared worker for every CSV tab: builds row indexes and computes
+    sorted/filtered row orders. Jobs carry the viewer's id and a generation
+    per job kind, like ImageDecoder's; a job whose viewer has moved on
+    (newer filter, new sort, tab closed) stops at its next check.
+    """
+
+    # viewer id, generation, rows indexed so far, finished
+    indexed = pyqtSignal(object, int, int, bool)
+    # viewer id, generation, array of data row numbers (None: natural order)
+    view_ready = pyqtSignal(object, int, object)
+    failed = pyqtSignal(object, str)
+
+    _instance = None
+
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            app = QApplication.instance()
+            cls._instance = cls(app)
+            app.aboutToQuit.connect(cls._instance.stop)
+            cls._instance.start()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self.live = {}       # (viewer id, kind) -> current generation
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def _current(self, vid, kind, gen):
+        return self.live.get((vid, kind)) == gen
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, vid, gen, path, arg = job
+            if not self._current(vid, kind, gen):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    if not os.fstat(f.fileno()).st_size:
+                        mm = b""
+                    else:
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    if kind == "index":
+                        self._index(vid, gen, mm, arg)
+                    else:
+                        self._view(vid, gen, mm, *arg)
+                finally:
+                    if isinstance(mm, mmap.mmap):
+                        mm.close()
+            except (OSError, ValueError) as e:
+                self.failed.emit(vid, str(e))
+
+    def _index(self, vid, gen, mm, offsets):
+        """
+        Append the start offset of every row to `offsets` (the model reads
+        the same array; it only looks at entries we have reported). A
+        newline inside a quoted field doesn't end a row; whole chunks
+        without quotes skip the per-line parity check.
+        """
+        size = len(mm)
+        in_quote = False
+        pos = 0
+        with tracer.span("csv index", "io"):
+            while pos < size:
+                if not self._current(vid, "index", gen):
+                    return
+                chunk = mm[pos:pos + CHUNK]
+                pieces = chunk.split(b"\n")
+                last = pieces.pop()
+                if not in_quote and b'"' not in chunk:
+                    offsets.extend(islice(accumulate((len(p) + 1 for p in pieces), initial=pos), 1, None))
+                else:
+                    at = pos
+                    for p in pieces:
+                        at += len(p) + 1
+                        if p.count(b'"') & 1:
+                            in_quote = not in_quote
+                        if not in_quote:
+                            offsets.append(at)
+                    if last.count(b'"') & 1:
+                        in_quote = not in_quote
+                pos += len(chunk)
+                self.indexed.emit(vid, gen, len(offsets) - 1, False)
+            if offsets[-1] != size:
+                offsets.append(size)     # last row has no trailing newline
+        self.indexed.emit(vid, gen, len(offsets) - 1, True)
+
+    def _view(self, vid, gen, mm, offsets, count, delimiter, column, descending, needle):
+        """Data row numbers matching `needle`, sorted by `column` (None: unsorted)."""
+        with tracer.span("csv sort/filter", "io"):
+            if needle:
+                rows = []
+                rx = re.compile(re.escape(needle.encode("utf-8")), re.IGNORECASE)
+                end = offsets[count]
+                m = rx.search(mm, offsets[1] if count > 1 else end, end)
+                while m:
+                    row = bisect.bisect_right(offsets, m.start(), 0, count + 1) - 1
+                    rows.append(row - 1)
+                    if len(rows) % CHECK_EVERY == 0 and not self._current(vid, "view", gen):
+                        return
+                    m = rx.search(mm, offsets[row + 1], end)
+            else:
+                rows = range(count - 1)
+            if column is not None:
+                values = []
+                for i, row in enumerate(rows):
+                    if i % CHECK_EVERY == 0 and not self._current(vid, "view", gen):
+                        return
+                    values.append(column_value(mm[offsets[row + 1]:offsets[row + 2]], delimiter, column))
+                rows = sort_rows(rows, values, descending)
+            result = array("q", rows) if (needle or column is not None) else None
+        if self._current(vid, "view", gen):
+            self.view_ready.emit(vid, gen, result)
+
+
+class CsvModel(QAbstractTableModel):
+    """
+    Rows of a CSV file, parsed only when a view asks for them. The file is
+    mmap'd; `offsets` holds the start of each row (filled by the worker)
+    and `order`, when sorting or filtering is active, the data row numbers
+    in display order. Row 0 of the file is the header.
+    """
+
+    def __init__(self, path, delimiter, header, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.delimiter = delimiter
+        self.header = header
+        self.offsets = array("q", [0])
+        self.count = 0              # complete rows indexed (header included)
+        self.order = None
+        self._rows = OrderedDict()  # data row -> fields (LRU)
+        self._mm = None
+        self._open()
+
+    def _open(self):
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._mm = None
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def reset(self, delimiter, header):
+        """Start over on the file as it is now on disk."""
+        self.beginResetModel()
+        self.close()
+        self.delimiter, self.header = delimiter, header
+        self.offsets = array("q", [0])
+        self.count = 0
+        self.order = None
+        self._rows.clear()
+        self._open()
+        self.endResetModel()
+
+    def data_rows(self):
+        return max(0, self.count - 1)
+
+    def grow(self, count):
+        """The worker has indexed `count` rows; show the new ones."""
+        old = self.rowCount()
+        self.count = count
+        if self.order is None and self.rowCount() > old:
+            self.beginInsertRows(QModelIndex(), old, self.rowCount() - 1)
+            self.endInsertRows()
+
+    def set_order(self, order):
+        self.beginResetModel()
+        self.order = order
+        self.endResetModel()
+
+    def source_row(self, row):
+        return self.order[row] if self.order is not None else row
+
+    def fields(self, row):
+        fields = self._rows.get(row)
+        if fields is None:
+            if self._mm is None:
+                return []
+            fields = parse_row(self._mm[self.offsets[row + 1]:self.offsets[row + 2]], self.delimiter)
+            self._rows[row] = fields
+            if len(self._rows) > CACHE_ROWS:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(row)
+        return fields
+
+    def memory_bytes(self):
+        total = self.offsets.buffer_info()[1] * self.offsets.itemsize
+        if self.order is not None:
+            total += len(self.order) * self.order.itemsize
+        # parsed rows: a rough per-field cost
+        return total + sum(len(f) for f in self._rows.values()) * 64
+
+    # ── QAbstractTableModel ───────────────────────────────────────────────
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.order) if self.order is not None else self.data_rows()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        fields = self.fields(self.source_row(index.row()))
+        col = index.column()
+        value = fields[col] if col < len(fields) else ""
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return value if len(value) > 40 else None
+        return value if len(value) <= MAX_CELL else value[:MAX_CELL] + "…"
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.header[section] if section < len(self.header) else str(section + 1)
+        # data row numbers as in the file, also when sorted or filtered
+        return str(self.source_row(section) + 1)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        # QTableView calls this on header clicks; the work happens in the viewer's worker job
+        self.parent().request_view(column if column >= 0 else None, order == Qt.SortOrder.DescendingOrder)
+
+
+class CsvViewer(QWidget):
+    """
+    CSV/TSV tab: a table over a row index that is built in the background,
+    so rows appear while a large file is still being indexed. Header
+    clicks sort and the filter box narrows rows, both in the worker. The
+    raw text view is optional and loads at most RAW_MAX bytes.
+    """
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.file_path = path
+        self._gens = {"index": 0, "view": 0}
+        self._sort = (None, False)
+        self._indexing = True
+        self.worker = CsvWorker.shared()
+        self.worker.indexed.connect(self._on_indexed)
+        self.worker.view_ready.connect(self._on_view)
+        self.worker.failed.connect(self._on_failed)
+
+        self.model = CsvModel(path, *sniff_dialect(path), parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # file order until the first header click (enabling sorting sorts by the indicator)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table.horizontalHeader().setDefaultSectionSize(140)
+        # fixed row heights: nothing is measured for rows that aren't shown
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self.table.setWordWrap(False)
+
+        self.raw = None
+        self.filter = QLineEdit()
+        self.filter.setPlaceholderText("Filter rows…")
+        self.filter.setClearButtonEnabled(True)
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_MS)
+        self._filter_timer.timeout.connect(lambda: self.request_view(*self._sort))
+        self.filter.textChanged.connect(self._filter_timer.start)
+        self.status = QLabel()
+        self.raw_button = QToolButton()
+        self.raw_button.setText("Raw Text")
+        self.raw_button.setCheckable(True)
+        self.raw_button.toggled.connect(self.show_raw)
+
+        bar = QHBoxLayout()
+        bar.setContentsMargins(4, 2, 4, 2)
+        bar.addWidget(self.filter, 1)
+        bar.addWidget(self.status)
+        bar.addWidget(self.raw_button)
+        self._stack = QStackedLayout()
+        self._stack.addWidget(self.table)
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(0, 0, 0, 0)
+        lay.setSpacing(0)
+        lay.addLayout(bar)
+        lay.addLayout(self._stack)
+        self._start_index()
+
+    # ── worker jobs ───────────────────────────────────────────────────────
+    def _bump(self, kind):
+        self._gens[kind] += 1
+        self.worker.live[(id(self), kind)] = self._gens[kind]
+        return self._gens[kind]
+
+    def _start_index(self):
+        self._indexing = True
+        self._bump("view")      # orders from the old index are meaningless
+        gen = self._bump("index")
+        self.worker.jobs.put(("index", id(self), gen, self.file_path, self.model.offsets))
+        self._update_status()
+
+    def request_view(self, column, descending):
+        """Sort by `column` (None: file order) and apply the filter text, in the worker."""
+        self._sort = (column, descending)
+        if self._indexing:
+            return      # asked again once the index is complete
+        needle = self.filter.text()
+        gen = self._bump("view")
+        if column is None and not needle:
+            self.model.set_order(None)
+            self._update_status()
+            return
+        self.worker.jobs.put(("view", id(self), gen, self.file_path,
+                              (self.model.offsets, self.model.count, self.model.delimiter,
+                               column, descending, needle)))
+        self._update_status("Sorting…" if column is not None else "Filtering…")
+
+    def _on_indexed(self, vid, gen, count, done):
+        if vid != id(self) or gen != self._gens["index"]:
+            return
+        self.model.grow(count)
+        if done:
+            self._indexing = False
+            if self._sort[0] is not None or self.filter.text():
+                self.request_view(*self._sort)
+                return
+        self._update_status()
+
+    def _on_view(self, vid, gen, order):
+        if vid != id(self) or gen != self._gens["view"]:
+            return
+        self.model.set_order(order)
+        self._update_status()
+
+    def _on_failed(self, vid, error):
+        if vid == id(self):
+            self._indexing = False
+            self._update_status(f"Could not read file: {error}")
+
+    def _update_status(self, busy=None):
+        total = self.model.data_rows()
+        if busy:
+            text = busy
+        elif self._indexing:
+            text = f"Indexing… {total:,} rows"
+        elif self.model.order is not None and self.filter.text():
+            text = f"{len(self.model.order):,} of {total:,} rows"
+        else:
+            text = f"{total:,} rows"
+        self.status.setText(text)
+
+    # ── file and view ─────────────────────────────────────────────────────
+    def reload(self):
+        """Re-read the file after it changed on disk."""
+        self.model.reset(*sniff_dialect(self.file_path))
+        self._start_index()
+        if self.raw is not None:
+            self._load_raw()
+
+    def show_raw(self, on):
+        if on and self.raw is None:
+            self.raw = QPlainTextEdit()
+            self.raw.setReadOnly(True)
+            self.raw.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+            self.raw.setFont(QFont("Fira Code", 12))
+            self._stack.addWidget(self.raw)
+            self._load_raw()
+        self._stack.setCurrentWidget(self.raw if on else self.table)
+        self.filter.setEnabled(not on)
+
+    def _load_raw(self):
+        try:
+            with open(self.file_path, "rb") as f:
+                data = f.read(RAW_MAX + 1)
+        except OSError as e:
+            self.raw.setPlainText(f"Could not read file: {e}")
+            return
+        text = data[:RAW_MAX].decode("utf-8", errors="replace")
+        if len(data) > RAW_MAX:
+            text = text[:text.rfind("\n") + 1] + f"… (only the first {RAW_MAX >> 20} MB are shown)\n"
+        self.raw.setPlainText(text)
+
+    def detach(self):
+        """Stop this tab's queued and running worker jobs; called before the tab is deleted."""
+        self.worker.live.pop((id(self), "index"), None)
+        self.worker.live.pop((id(self), "view"), None)
+        self.model.close()
+
+    def memory_bytes(self):
+        total = self.model.memory_bytes()
+        if self.raw is not None:
+            total += self.raw.document().characterCount() * 4
+        return total
@@ -0,0 +1,254 @@
+import os
+import time
+import shutil
+import uuid
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+# staging dirs for deletes; ProjectRules hides them from the tree
+TRASH_PREFIX = ".nexus-trash-"
+PROGRESS_MS = 50        # at most one progress signal per this interval (plus the last step)
+
+
+class FileOpCancelled(Exception):
+    pass
+
+
+class FileOp:
+    """One queued filesystem operation: move, copy, delete, mkdir or touch."""
+
+    def __init__(self, kind, src=None, dst=None):
+        self.kind = kind
+        self.src = os.path.abspath(src) if src else None
+        self.dst = os.path.abspath(dst) if dst else None
+
+    def __repr__(self):
+        return f"FileOp({self.kind!r}, {self.src!r}, {self.dst!r})"
+
+
+class FileOpResult:
+    """What a batch did, for the tree model and open editors."""
+
+    def __init__(self, label):
+        self.label = label
+        self.moved = {}       # old path -> new path
+        self.created = []
+        self.deleted = []
+        self.errors = []      # (path, message)
+        self.cancelled = False
+
+    @property
+    def ok(self):
+        return not self.errors and not self.cancelled
+
+
+def same_device(src, dst_dir):
+    try:
+        return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+    except OSError:
+        return False
+
+
+def count_files(path):
+    if not os.path.isdir(path) or os.path.islink(path):
+        return 1
+    return sum(len(files) for _, _, files in os.walk(path)) or 1
+
+
+class FileOpWorker(QThread):
+    """
+    Runs a batch of FileOps as one transaction. Every step records how to
+    undo itself; on failure or cancellation the journal is rolled back so
+    the tree is left as it was. Deletes are staged by renaming into a
+    hidden trash dir on the same device and only purged on commit.
+    """
+
+    progress = pyqtSignal(int, int, str)   # done, total, current path
+    batch_done = pyqtSignal(object)        # FileOpResult
+
+    def __init__(self, ops, label="", parent=None):
+        super().__init__(parent)
+        self.ops = ops
+        self.result = FileOpResult(label)
+        self._done = 0
+        self._total = 0
+        self._reported = 0.0    # monotonic time of the last progress signal
+        self._undo = []     # callables, newest last
+        self._commit = []   # callables run once everything succeeded
+
+    def run(self):
+        self._total = sum(self._weight(op) for op in self.ops)
+        try:
+            for op in self.ops:
+                self._check_cancel()
+                getattr(self, "_do_" + op.kind)(op)
+        except FileOpCancelled:
+            self.result.cancelled = True
+            self._rollback()
+        except OSError as e:
+            self.result.errors.append((e.filename or "", e.strerror or str(e)))
+            self._rollback()
+        else:
+            for step in self._commit:
+                try:
+                    step()
+                except OSError as e:
+                    # the batch already happened; report leftovers only
+                    self.result.errors.append((e.filename or "", e.strerror or str(e)))
+        self.batch_done.emit(self.result)
+
+    # ── helpers ───────────────────────────────────────────────────────────
+    def _weight(self, op):
+        if op.kind == "copy" or (op.kind == "move" and not same_device(op.src, os.path.dirname(op.dst))):
+            return count_files(op.src)
+        return 1
+
+    def _check_cancel(self):
+        if self.isInterruptionRequested():
+            raise FileOpCancelled()
+
+    def _step(self, path, n=1):
+        self._done += n
+        # a tree of 100k files would otherwise queue 100k cross-thread signals
+        now = time.monotonic()
+        if now - self._reported >= PROGRESS_MS / 1000 or self._done >= self._total:
+            self._reported = now
+            self.progress.emit(self._done, self._total, path)
+
+    def _rollback(self):
+        for undo in reversed(self._undo):
+            try:
+                undo()
+            except OSError:
+                pass
+        self.result.moved.clear()
+        self.result.created.clear()
+        self.result.deleted.clear()
+
+    def _ensure_free(self, dst):
+        if os.path.lexists(dst):
+            raise FileExistsError(17, "Destination already exists", dst)
+
+    def _copy_tree(self, src, dst):
+        """Copy file or tree, file by file, so progress and cancel work."""
+        if not os.path.isdir(src) or os.path.islink(src):
+            shutil.copy2(src, dst, follow_symlinks=False)
+            self._step(src)
+            return
+        os.makedirs(dst)
+        for dirpath, dirnames, filenames in os.walk(src):
+            target = os.path.join(dst, os.path.relpath(dirpath, src))
+            for d in dirnames:
+                os.makedirs(os.path.join(target, d), exist_ok=True)
+            for fn in filenames:
+                self._check_cancel()
+                shutil.copy2(os.path.join(dirpath, fn), os.path.join(target, fn), follow_symlinks=False)
+                self._step(os.path.join(dirpath, fn))
+
+    @staticmethod
+    def _remove(path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+    # ── operations ───────────────────────────────────────────────────────
+    def _do_move(self, op):
+        self._ensure_free(op.dst)
+        if same_device(op.src, os.path.dirname(op.dst)):
+            os.rename(op.src, op.dst)
+            self._undo.append(lambda: os.rename(op.dst, op.src))
+            self._step(op.src)
+        else:
+            # cross-device: copy now, remove the source only on commit
+            self._undo.append(lambda: self._remove(op.dst))
+            self._copy_tree(op.src, op.dst)
+            self._commit.append(lambda: self._remove(op.src))
+        self.result.moved[op.src] = op.dst
+
+    def _do_copy(self, op):
+        self._ensure_free(op.dst)
+        self._undo.append(lambda: self._remove(op.dst))
+        self._copy_tree(op.src, op.dst)
+        self.result.created.append(op.dst)
+
+    def _do_delete(self, op):
+        trash = os.path.join(os.path.dirname(op.src), f"{TRASH_PREFIX}{uuid.uuid4().hex[:8]}")
+        os.mkdir(trash)
+        staged = os.path.join(trash, os.path.basename(op.src))
+        try:
+            os.rename(op.src, staged)
+        except OSError:
+            os.rmdir(trash)
+            raise
+
+        def undo():
+            os.rename(staged, op.src)
+            os.rmdir(trash)
+        self._undo.append(undo)
+        self._commit.append(lambda: shutil.rmtree(trash))
+        self.result.deleted.append(op.src)
+        self._step(op.src)
+
+    def _do_mkdir(self, op):
+        self._ensure_free(op.dst)
+        os.makedirs(op.dst)
+        self._undo.append(lambda: os.rmdir(op.dst))
+        self.result.created.append(op.dst)
+        self._step(op.dst)
+
+    def _do_touch(self, op):
+        with open(op.dst, "x", encoding="utf-8"):
+            pass
+        self._undo.append(lambda: os.remove(op.dst))
+        self.result.created.append(op.dst)
+        self._step(op.dst)
+
+
+class FileOpQueue(QObject):
+    """Runs queued batches one at a time in a FileOpWorker."""
+
+    progress = pyqtSignal(int, int, str)   # done, total, label
+    busy_changed = pyqtSignal(bool)
+    batch_done = pyqtSignal(object)        # FileOpResult
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = []   # (ops, label, callback)
+        self._worker = None
+        self._callback = None
+
+    def enqueue(self, ops, label="", callback=None):
+        if not ops:
+            return
+        self._pending.append((ops, label, callback))
+        if self._worker is None:
+            self._next()
+
+    def cancel(self):
+        """Cancel the running batch and drop everything still queued."""
+        self._pending = []
+        if self._worker is not None:
+            self._worker.requestInterruption()
+
+    def is_busy(self):
+        return self._worker is not None
+
+    def _next(self):
+        if not self._pending:
+            self.busy_changed.emit(False)
+            return
+        ops, label, self._callback = self._pending.pop(0)
+        self._worker = FileOpWorker(ops, label, self)
+        self._worker.progress.connect(lambda d, t, _p, label=label: self.progress.emit(d, t, label))
+        self._worker.batch_done.connect(self._on_done)
+        self._worker.finished.connect(self._worker.deleteLater)
+        self.busy_changed.emit(True)
+        self._worker.start()
+
+    def _on_done(self, result):
+        self._worker = None
+        callback, self._callback = self._callback, None
+        self.batch_done.emit(result)
+        if callback is not None:
+            callback(result)
+        self._next()
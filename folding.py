@@ -0,0 +1,317 @@
+import os
+import re
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QKeySequence, QShortcut
+from perf_trace import tracer
+
+INDENT_LANGUAGES = {".py", ".pyw", ".yaml", ".yml"}
+TAG_LANGUAGES = {".html", ".htm", ".php", ".xml", ".vue"}
+FOLD_WIDTH = 12         # gutter column for fold markers
+TAB_WIDTH = 4
+
+# literals and comments whose brackets don't count
+_NOISE = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|`[^`]*`|//.*|/\*.*?\*/|<!--.*?-->')
+_BRACKETS = re.compile(r"[{}\[\]()]")
+_BRACKETS_TAGS = re.compile(r"[{}\[\]()]|<(/?)([A-Za-z!][\w:-]*)[^<>]*?(/?)>")
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr", "!doctype"}
+
+
+def indent_info(text):
+    """Indent width of a line, or -1 if it is blank."""
+    stripped = text.lstrip()
+    if not stripped:
+        return -1
+    return len(text[:len(text) - len(stripped)].expandtabs(TAB_WIDTH))
+
+
+def bracket_info(text, tags=False):
+    """
+    (closers, ends) of a line, counting opening brackets/tags as +1 and
+    closing ones as -1: `closers` is how far the running total dips below
+    0 (it closes earlier lines' regions), `ends` is the final total.
+    """
+    depth = low = 0
+    for m in (_BRACKETS_TAGS if tags else _BRACKETS).finditer(_NOISE.sub("", text)):
+        tok = m.group(0)
+        if tok in "{[(":
+            depth += 1
+        elif tok in "}])":
+            depth -= 1
+            low = min(low, depth)
+        elif m.group(3) or m.group(2).lower() in VOID_TAGS:
+            continue
+        elif m.group(1):
+            depth -= 1
+            low = min(low, depth)
+        else:
+            depth += 1
+    return -low, depth
+
+
+class FoldModel:
+    """
+    Fold regions of one CodeEditor and which of them are folded.
+
+    Regions come from indentation (Python, YAML) or bracket and tag nesting
+    (everything else). Each block's summary is cached in a list indexed by
+    block number; contentsChange resets only the entries of the blocks an
+    edit covers, and they are recomputed when a gutter marker or a fold
+    needs them. Folding hides blocks with QTextBlock.setVisible(False), so
+    the layout, the scroll range and painting all skip them.
+    """
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.doc = editor.document()
+        self.lines = [None] * self.doc.blockCount()
+        self.folded = {}        # first block number -> last hidden block number
+        self._path = None
+        self.mode = "brackets"
+        self.doc.contentsChange.connect(self._on_change)
+        editor.cursorPositionChanged.connect(self._reveal_cursor)
+        for keys, slot in (("Ctrl+Shift+[", self.fold_at_cursor), ("Ctrl+Shift+]", self.unfold_at_cursor)):
+            sc = QShortcut(QKeySequence(keys), editor)
+            sc.setContext(Qt.ShortcutContext.WidgetShortcut)
+            sc.activated.connect(slot)
+
+    def _sync_mode(self):
+        # tabs set file_path directly (open, save as, rename), so follow it here
+        path = getattr(self.editor, "file_path", None)
+        if path == self._path:
+            return
+        self._path = path
+        ext = os.path.splitext(path or "")[1].lower()
+        mode = "indent" if ext in INDENT_LANGUAGES else ("tags" if ext in TAG_LANGUAGES else "brackets")
+        if mode != self.mode:
+            self.unfold_all()
+            self.mode = mode
+            self.lines = [None] * self.doc.blockCount()
+
+    # ── per-block summaries ──────────────────────────────────────────────
+    def _on_change(self, pos, removed, added):
+        doc = self.doc
+        delta = doc.blockCount() - len(self.lines)
+        first = doc.findBlock(pos)
+        last = doc.findBlock(pos + added)
+        if not last.isValid():
+            last = doc.lastBlock()
+        a, b = first.blockNumber(), last.blockNumber()
+        old_b = b - delta
+        self.lines[a:old_b + 1] = [None] * (b - a + 1)
+        if not self.folded:
+            return
+        # folds after the edit move with it; ones the edit reaches are opened
+        kept, opened = {}, []
+        for start, end in self.folded.items():
+            if start > old_b:
+                kept[start + delta] = end + delta
+            elif end < a:
+                kept[start] = end
+            else:
+                opened.append((start, end))
+        self.folded = kept
+        if opened:
+            lo = min(min(s for s, _ in opened) + 1, a)
+            hi = max(max(e for _, e in opened) + delta, b)
+            self._show(lo, min(hi, doc.blockCount() - 1))
+
+    def _summary(self, block):
+        i = block.blockNumber()
+        info = self.lines[i]
+        if info is None:
+            text = block.text()
+            self.lines[i] = info = indent_info(text) if self.mode == "indent" else \
+                bracket_info(text, self.mode == "tags")
+        return info
+
+    # ── regions ──────────────────────────────────────────────────────────
+    def foldable(self, block):
+        """True if a region starts at `block` (called for every painted line)."""
+        self._sync_mode()
+        if self.mode == "indent":
+            indent = self._summary(block)
+            if indent < 0:
+                return False
+            nxt = block.next()
+            while nxt.isValid():
+                n = self._summary(nxt)
+                if n >= 0:
+                    return n > indent
+                nxt = nxt.next()
+            return False
+        closers, ends = self._summary(block)
+        return ends + closers > 0
+
+    def region_end(self, block):
+        """Number of the last block hidden when `block`'s region is folded, or None."""
+        if not self.foldable(block):
+            return None
+        start = last = i = block.blockNumber()
+        lines, summary = self.lines, self._summary
+        nxt = block.next()
+        if self.mode == "indent":
+            indent = summary(block)
+            while nxt.isValid():
+                i += 1
+                n = lines[i]
+                if n is None:
+                    n = summary(nxt)
+                if n >= 0:
+                    if n <= indent:
+                        break
+                    last = i
+                nxt = nxt.next()
+        else:
+            closers, ends = summary(block)
+            depth = ends + closers
+            while nxt.isValid():
+                i += 1
+                c, e = lines[i] or summary(nxt)
+                if depth - c <= 0:
+                    break       # the line that closes the region stays visible
+                depth += e
+                last = i
+                nxt = nxt.next()
+        return last if last > start else None
+
+    def is_folded(self, number):
+        return number in self.folded
+
+    def next_visible(self, block):
+        """The block painted after `block`, jumping over a folded region in one step."""
+        end = self.folded.get(block.blockNumber())
+        if end is None:
+            return block.next()
+        return self.doc.findBlockByNumber(end + 1)
+
+    # ── folding ──────────────────────────────────────────────────────────
+    def fold(self, number):
+        block = self.doc.findBlockByNumber(number)
+        if not block.isValid() or number in self.folded:
+            return False
+        end = self.region_end(block)
+        if end is None:
+            return False
+        with tracer.span("fold", "editor"):
+            self.folded[number] = end
+            self._set_visible([(number + 1, end)], False)
+        self._cursor_out()
+        return True
+
+    def unfold(self, number):
+        end = self.folded.pop(number, None)
+        if end is None:
+            return False
+        with tracer.span("unfold", "editor"):
+            self._show(number + 1, end)
+        return True
+
+    def toggle(self, number):
+        return self.unfold(number) or self.fold(number)
+
+    def _show(self, first, last):
+        """Make blocks first..last visible, keeping folds still closed inside hidden."""
+        self._set_visible([(first, last)], True)
+        inner, hidden_to = [], -1
+        for start, end in sorted((s, e) for s, e in self.folded.items() if first <= s <= last):
+            if start > hidden_to:
+                inner.append((start + 1, end))
+                hidden_to = end
+        self._set_visible(inner, False)
+
+    def _set_visible(self, ranges, visible):
+        """Show or hide the blocks of each (first, last) range, then relayout them once."""
+        start = end = None
+        for first, last in ranges:
+            block = self.doc.findBlockByNumber(first)
+            if last < first or not block.isValid():
+                continue
+            start = block.position() if start is None else min(start, block.position())
+            for _ in range(last - first + 1):
+                if not block.isValid():
+                    break
+                block.setVisible(visible)
+                block = block.next()
+            stop = block.position() if block.isValid() else self.doc.characterCount()
+            end = stop if end is None else max(end, stop)
+        if start is None:
+            return
+        # markContentsDirty emits no contentsChange and adds no undo step
+        self.doc.markContentsDirty(start, end - start)
+        self.editor.viewport().update()
+        self.editor.lineNumberArea.update()
+
+    def _hiding(self, n):
+        """Start of the outermost fold that hides block `n`, or None."""
+        # the nearest fold above `n` whose first line is itself visible
+        starts = [s for s, e in self.folded.items() if s < n <= e
+                  and self.doc.findBlockByNumber(s).isVisible()]
+        return max(starts) if starts else None
+
+    def _cursor_out(self):
+        # a cursor left on a hidden line goes to the end of the fold's first line
+        block = self.editor.textCursor().block()
+        start = None if block.isVisible() else self._hiding(block.blockNumber())
+        if start is not None:
+            line = self.doc.findBlockByNumber(start)
+            tc = self.editor.textCursor()
+            tc.setPosition(line.position() + line.length() - 1)
+            self.editor.setTextCursor(tc)
+
+    def fold_all(self):
+        ranges = []
+        block = self.doc.firstBlock()
+        while block.isValid():
+            n = block.blockNumber()
+            end = self.folded.get(n)
+            if end is None and block.isVisible():
+                end = self.region_end(block)
+                if end is not None:
+                    self.folded[n] = end
+                    ranges.append((n + 1, end))
+            if end is not None:
+                block = self.doc.findBlockByNumber(end)
+            block = block.next()
+        with tracer.span("fold all", "editor"):
+            self._set_visible(ranges, False)
+        self._cursor_out()
+
+    def unfold_all(self):
+        if self.folded:
+            self.folded = {}
+            self._set_visible([(0, self.doc.blockCount() - 1)], True)
+
+    def fold_at_cursor(self):
+        """Fold the innermost open region containing the cursor line."""
+        n = self.editor.textCursor().blockNumber()
+        block = self.editor.textCursor().block()
+        while block.isValid():
+            end = None if block.blockNumber() in self.folded else self.region_end(block)
+            if end is not None and end >= n:
+                self.fold(block.blockNumber())
+                return
+            block = block.previous()
+
+    def unfold_at_cursor(self):
+        self.unfold(self.editor.textCursor().blockNumber())
+
+    def _reveal_cursor(self):
+        # search results, go-to-line, LSP jumps… may land inside a fold
+        block = self.editor.textCursor().block()
+        n = block.blockNumber()
+        while not block.isVisible():
+            start = self._hiding(n)
+            if start is None:
+                self._set_visible([(n, n)], True)
+                break
+            self.unfold(start)
+
+    # ── session ──────────────────────────────────────────────────────────
+    def state(self):
+        return sorted(self.folded)
+
+    def restore(self, starts):
+        for n in sorted(starts):
+            if 0 <= n < self.doc.blockCount() and self.doc.findBlockByNumber(n).isVisible():
+                self.fold(n)
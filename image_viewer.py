@@ -0,0 +1,381 @@
+import io
+import os
+import math
+import queue
+import hashlib
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QThread, QTimer, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QMovie, QPainter
+from PyQt6.QtWidgets import QAbstractScrollArea, QApplication, QLabel, QStackedLayout, QWidget
+from atomic_io import atomic_write
+from config import DATA_DIR
+
+THUMB_DIR = os.path.join(DATA_DIR, "thumbs")
+THUMB_MAX = 1024                    # longest side of cached thumbnails
+TILE = 512                          # tile edge, in pixels of the decoded level
+MAX_TILES = 96                      # tiles kept per viewer
+LEVEL_BUDGET = 64 * 1024 * 1024     # pixels the decoder may hold for tiling
+
+
+def thumb_path(path):
+    """Cache file for `path` as it is now (keyed by path, mtime and size), or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(path)}\0{st.st_mtime_ns}\0{st.st_size}"
+    return os.path.join(THUMB_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+
+def to_qimage(img):
+    """PIL image -> QImage that owns its pixels (safe to hand across threads)."""
+    img = img.convert("RGBA")
+    w, h = img.size
+    return QImage(img.tobytes("raw", "RGBA"), w, h, 4 * w, QImage.Format.Format_RGBA8888).copy()
+
+
+def open_reduced(path, factor):
+    """
+    Open `path` decoded at roughly 1/`factor` of its size. JPEGs are scaled
+    during decoding (draft); other formats are reduced right after loading.
+    Returns (image, full size).
+    """
+    from PIL import Image
+    img = Image.open(path)
+    full = img.size
+    if factor > 1:
+        img.draft("RGB", (math.ceil(full[0] / factor), math.ceil(full[1] / factor)))
+        left = int(img.size[0] / (full[0] / factor))
+        if left > 1:
+            img = img.reduce(left)
+    img.load()
+    return img, full
+
+
+class ImageDecoder(QThread):
+    """
+    Shared worker that decodes images for every viewer. Jobs carry the
+    viewer's id and a generation per job kind; jobs whose viewer has moved
+    on (newer fit request, scrolled or zoomed away) are skipped.
+    """
+
+    # viewer id, path, full (w, h), QImage fitted to the requested size
+    fit_ready = pyqtSignal(object, str, object, object)
+    # viewer id, path, (level, tx, ty), QImage
+    tile_ready = pyqtSignal(object, str, object, object)
+    failed = pyqtSignal(object, str, str)
+
+    _instance = None
+
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            app = QApplication.instance()
+            cls._instance = cls(app)
+            app.aboutToQuit.connect(cls._instance.stop)
+            cls._instance.start()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self.live = {}       # (viewer id, kind) -> current generation
+        self._level = None   # (path, factor, PIL image) kept for tiling
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            kind, vid, gen, path, arg = job
+            if self.live.get((vid, kind)) != gen:
+                continue
+            try:
+                if kind == "fit":
+                    self._fit(vid, path, *arg)
+                else:
+                    self._tile(vid, path, *arg)
+            except Exception as e:  # PIL raises a variety of errors on bad files
+                self.failed.emit(vid, path, str(e))
+
+    def _fit(self, vid, path, max_w, max_h):
+        from PIL import Image
+        head = Image.open(path)
+        full = head.size
+        factor = max(1, min(full[0] // max(max_w, 1), full[1] // max(max_h, 1)))
+        img, full = open_reduced(path, factor)
+        if img.width > max_w or img.height > max_h:
+            img.thumbnail((max_w, max_h))
+        self.fit_ready.emit(vid, path, full, to_qimage(img))
+
+        thumb = thumb_path(path)
+        if thumb and not os.path.exists(thumb):
+            small = img.copy()
+            small.thumbnail((THUMB_MAX, THUMB_MAX))
+            buf = io.BytesIO()
+            small.convert("RGBA").save(buf, "PNG")
+            try:
+                os.makedirs(THUMB_DIR, exist_ok=True)
+                atomic_write(thumb, buf.getvalue(), fsync=False)
+            except OSError:
+                pass  # the cache is only an optimisation
+
+    def _tile(self, vid, path, level, tx, ty):
+        if self._level is None or self._level[:2] != (path, level):
+            self._level = None  # free the previous level before decoding the next
+            img, _ = open_reduced(path, level)
+            self._level = (path, level, img)
+        img = self._level[2]
+        box = (tx * TILE, ty * TILE, min((tx + 1) * TILE, img.width), min((ty + 1) * TILE, img.height))
+        if box[0] < box[2] and box[1] < box[3]:
+            self.tile_ready.emit(vid, path, (level, tx, ty), to_qimage(img.crop(box)))
+
+
+class ImageCanvas(QAbstractScrollArea):
+    """
+    Paints one image. Fitted to the viewport it uses a single decode sized
+    for the viewport; zoomed in past that resolution it paints tiles
+    decoded at the matching power-of-two level, over a scaled backdrop.
+    """
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.src = QImageReader(path).size()        # may be invalid until decoded
+        self.base = None                            # QImage, fitted decode / thumbnail
+        self.zoom = None                            # None = fit to viewport
+        self.tiles = OrderedDict()                  # (level, tx, ty) -> QImage (LRU)
+        self._pending = set()
+        self._gens = {"fit": 0, "tile": 0}
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.viewport().setBackgroundRole(self.backgroundRole())
+
+        self.decoder = ImageDecoder.shared()
+        self.decoder.fit_ready.connect(self._on_fit)
+        self.decoder.tile_ready.connect(self._on_tile)
+        self._bump("tile")
+
+        self._refit = QTimer(self)
+        self._refit.setSingleShot(True)
+        self._refit.setInterval(150)
+        self._refit.timeout.connect(self._request_fit)
+
+        thumb = thumb_path(path)
+        if thumb and os.path.exists(thumb):
+            cached = QImage(thumb)
+            if not cached.isNull():
+                self.base = cached
+        self._refit.start()
+
+    # ── geometry ─────────────────────────────────────────────────────────
+    def _scale(self):
+        """Display pixels per source pixel."""
+        if self.zoom is not None:
+            return self.zoom
+        if not self.src.isValid():
+            return 1.0
+        vw, vh = self.viewport().width(), self.viewport().height()
+        return min(vw / self.src.width(), vh / self.src.height(), 1.0)
+
+    def _content_rect(self):
+        z = self._scale()
+        cw, ch = self.src.width() * z, self.src.height() * z
+        vw, vh = self.viewport().width(), self.viewport().height()
+        x = (vw - cw) / 2 if cw < vw else -self.horizontalScrollBar().value()
+        y = (vh - ch) / 2 if ch < vh else -self.verticalScrollBar().value()
+        return QRectF(x, y, cw, ch)
+
+    def _update_scrollbars(self):
+        r = self._content_rect()
+        vw, vh = self.viewport().width(), self.viewport().height()
+        for bar, content, page in ((self.horizontalScrollBar(), r.width(), vw),
+                                   (self.verticalScrollBar(), r.height(), vh)):
+            bar.setRange(0, max(0, int(content - page)))
+            bar.setPageStep(page)
+            bar.setSingleStep(32)
+
+    def _level_for(self, z):
+        level = 1
+        while level * 2 <= 1 / z:
+            level *= 2
+        w, h = self.src.width(), self.src.height()
+        while (w / level) * (h / level) > LEVEL_BUDGET:
+            level *= 2
+        return level
+
+    # ── decoding ─────────────────────────────────────────────────────────
+    def _bump(self, kind="tile"):
+        """Start a new generation of `kind` jobs; queued older ones are skipped."""
+        self._gens[kind] += 1
+        if kind == "tile":
+            self._pending.clear()
+        self.decoder.live[(id(self), kind)] = self._gens[kind]
+
+    def _request_fit(self):
+        ratio = self.devicePixelRatioF()
+        vw = int(self.viewport().width() * ratio)
+        vh = int(self.viewport().height() * ratio)
+        if self.base is not None and self.src.isValid():
+            # the cached decode is already sharp enough for this viewport
+            need = min(vw / self.src.width(), vh / self.src.height(), 1.0)
+            if self.base.width() >= self.src.width() * need - 1:
+                return
+        self._bump("fit")
+        self.decoder.jobs.put(("fit", id(self), self._gens["fit"], self.path, (max(vw, 1), max(vh, 1))))
+
+    def _on_fit(self, vid, path, full, img):
+        if vid != id(self) or path != self.path:
+            return
+        self.src = QSize(*full)
+        self.base = img
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def _on_tile(self, vid, path, key, img):
+        if vid != id(self) or path != self.path:
+            return
+        self._pending.discard(key)
+        self.tiles[key] = img
+        while len(self.tiles) > MAX_TILES:
+            self.tiles.popitem(last=False)
+        self.viewport().update()
+
+    # ── painting ─────────────────────────────────────────────────────────
+    def paintEvent(self, ev):
+        if self.base is None or not self.src.isValid():
+            return
+        p = QPainter(self.viewport())
+        p.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        r = self._content_rect()
+        p.drawImage(r, self.base)
+
+        z = self._scale() * self.devicePixelRatioF()
+        if self.base.width() >= self.src.width() * z * 0.999:
+            return  # the base decode already has all the detail the screen can show
+        level = self._level_for(z)
+        step = TILE * level * self._scale()          # tile size on screen
+        vis = QRectF(self.viewport().rect()).intersected(r)
+        tx0, tx1 = int((vis.left() - r.left()) // step), int((vis.right() - r.left()) // step)
+        ty0, ty1 = int((vis.top() - r.top()) // step), int((vis.bottom() - r.top()) // step)
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                key = (level, tx, ty)
+                tile = self.tiles.get(key)
+                if tile is None:
+                    if key not in self._pending:
+                        self._pending.add(key)
+                        self.decoder.jobs.put(("tile", id(self), self._gens["tile"], self.path, key))
+                    continue
+                self.tiles.move_to_end(key)
+                p.drawImage(QRectF(r.left() + tx * step, r.top() + ty * step,
+                                   tile.width() * level * self._scale(),
+                                   tile.height() * level * self._scale()), tile)
+        p.end()
+
+    # ── interaction ──────────────────────────────────────────────────────
+    def set_zoom(self, zoom, anchor=None):
+        """Set display pixels per source pixel (None fits the viewport)."""
+        if not self.src.isValid():
+            return
+        old = self._content_rect()
+        anchor = anchor or self.viewport().rect().center()
+        fx = (anchor.x() - old.left()) / max(old.width(), 1)
+        fy = (anchor.y() - old.top()) / max(old.height(), 1)
+        self.zoom = None if zoom is None else max(0.01, min(zoom, 32.0))
+        self._bump()   # drop queued tiles of the old view
+        self._update_scrollbars()
+        z = self._scale()
+        self.horizontalScrollBar().setValue(int(fx * self.src.width() * z - anchor.x()))
+        self.verticalScrollBar().setValue(int(fy * self.src.height() * z - anchor.y()))
+        self.viewport().update()
+
+    def wheelEvent(self, ev):
+        if ev.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            factor = 1.25 if ev.angleDelta().y() > 0 else 0.8
+            self.set_zoom(self._scale() * factor, ev.position().toPoint())
+        else:
+            super().wheelEvent(ev)
+
+    def keyPressEvent(self, ev):
+        key = ev.key()
+        if key in (Qt.Key.Key_Plus, Qt.Key.Key_Equal):
+            self.set_zoom(self._scale() * 1.25)
+        elif key == Qt.Key.Key_Minus:
+            self.set_zoom(self._scale() * 0.8)
+        elif key == Qt.Key.Key_0:
+            self.set_zoom(None)
+        elif key == Qt.Key.Key_1:
+            self.set_zoom(1.0)
+        else:
+            super().keyPressEvent(ev)
+
+    def scrollContentsBy(self, dx, dy):
+        self._bump()
+        self.viewport().update()
+
+    def resizeEvent(self, ev):
+        super().resizeEvent(ev)
+        self._update_scrollbars()
+        if self.zoom is None:
+            self._refit.start()
+
+    def hideEvent(self, ev):
+        # tiles are cheap to decode again; don't hold them for hidden tabs
+        self.tiles.clear()
+        self._bump()
+        super().hideEvent(ev)
+
+
+class ImageViewer(QWidget):
+    """Image tab: tiled canvas for still images, QMovie for GIFs."""
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.file_path = path
+        self._stack = QStackedLayout(self)
+        self.message = QLabel()
+        self.message.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.movie = None
+        self._frame = QImageReader(path).size()
+        if path.lower().endswith(".gif"):
+            # frames are decoded as they are shown, never all up front
+            self.movie = QMovie(path)
+            self.movie.setCacheMode(QMovie.CacheMode.CacheNone)
+            self.canvas = QLabel()
+            self.canvas.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.canvas.setMovie(self.movie)
+            self.movie.start()
+        else:
+            self.canvas = ImageCanvas(path)
+            ImageDecoder.shared().failed.connect(self._on_failed)
+        self._stack.addWidget(self.canvas)
+        self._stack.addWidget(self.message)
+
+    def _on_failed(self, vid, path, error):
+        if vid == id(self.canvas):
+            self.message.setText(f"Could not open image:\n{error}")
+            self._stack.setCurrentWidget(self.message)
+
+    def resizeEvent(self, ev):
+        super().resizeEvent(ev)
+        frame = self._frame
+        if self.movie is not None and frame.isValid():
+            # shrink oversized animations to the tab; never enlarge them
+            if frame.width() > self.width() or frame.height() > self.height():
+                self.movie.setScaledSize(frame.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio))
+            else:
+                self.movie.setScaledSize(frame)
+
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        if self.movie is not None:
+            self.movie.setPaused(False)
+
+    def hideEvent(self, ev):
+        if self.movie is not None:
+            self.movie.setPaused(True)
+        super().hideEvent(ev)
@@ -0,0 +1,583 @@
+import os
+import sys
+import json
+import time
+import shutil
+import functools
+from collections import deque
+from urllib.parse import unquote, urlparse
+from urllib.request import pathname2url
+from PyQt6.QtCore import QObject, QProcess, QTimer, QEvent, pyqtSignal
+from PyQt6.QtWidgets import QToolTip
+from config import get_setting
+from perf_trace import tracer
+from plugin_bus import language_for
+
+CHANGE_MS = 150         # didChange batching
+HOVER_MS = 400          # mouse rests this long before a hover request
+RESTARTS = 3            # crashes per RESTART_WINDOW before a server is given up on
+RESTART_WINDOW = 60.0
+SHUTDOWN_MS = 1000
+
+# first one found on PATH wins; the `lsp_servers` setting ({language: argv}) overrides
+DEFAULT_SERVERS = {
+    "python": (["pylsp"], ["pyright-langserver", "--stdio"]),
+    "js": (["typescript-language-server", "--stdio"],),
+    "php": (["intelephense", "--stdio"],),
+    "css": (["vscode-css-language-server", "--stdio"],),
+    "html": (["vscode-html-language-server", "--stdio"],),
+}
+LANGUAGE_IDS = {"js": "javascript"}     # where LSP's languageId differs from ours
+
+# textDocumentSync kinds
+SYNC_NONE, SYNC_FULL, SYNC_INCREMENTAL = 0, 1, 2
+
+SEVERITY_ERROR, SEVERITY_WARNING, SEVERITY_INFO, SEVERITY_HINT = 1, 2, 3, 4
+
+
+def path_to_uri(path):
+    return "file:" + pathname2url(os.path.abspath(path))
+
+
+def uri_to_path(uri):
+    parsed = urlparse(uri)
+    path = unquote(parsed.path)
+    if os.name == "nt" and path.startswith("/"):
+        path = path[1:]
+    return os.path.normpath(path)
+
+
+def server_command(language):
+    """argv of the server for `language`, or None."""
+    configured = get_setting("lsp_servers", {}).get(language)
+    if configured:
+        return list(configured)
+    for argv in DEFAULT_SERVERS.get(language, ()):
+        if shutil.which(argv[0]):
+            return list(argv)
+    return None
+
+
+class LspServer(QObject):
+    """
+    One language server process, spoken to in JSON-RPC over stdio with
+    LSP's Content-Length framing. Everything is driven by QProcess signals,
+    so the GUI thread never blocks on the server. Messages sent before the
+    initialize handshake completes are queued and flushed after it.
+    """
+
+    notification = pyqtSignal(str, object)      # method, params
+    ready = pyqtSignal()
+    stopped = pyqtSignal(int)                   # exit code
+
+    def __init__(self, language, argv, root, parent=None):
+        super().__init__(parent)
+        self.language = language
+        self.argv = argv
+        self.root = root
+        self.capabilities = {}
+        self.is_ready = False
+        self._proc = None
+        self._inbuf = b""
+        self._queue = []
+        self._pending = {}      # id -> (method, callback, perf_counter at send)
+        self._next_id = 1
+        self._stopping = False
+
+    def start(self):
+        proc = QProcess(self)
+        proc.setWorkingDirectory(self.root)
+        proc.readyReadStandardOutput.connect(self._read)
+        # servers log to stderr freely; keep only the tail for error reports
+        self._stderr = deque(maxlen=20)
+        proc.readyReadStandardError.connect(
+            lambda: self._stderr.extend(bytes(proc.readAllStandardError()).decode("utf-8", "replace").splitlines()))
+        proc.finished.connect(self._finished)
+        proc.errorOccurred.connect(self._error)
+        self._proc = proc
+        proc.start(self.argv[0], self.argv[1:])
+        self.request("initialize", {
+            "processId": os.getpid(),
+            "clientInfo": {"name": "Nexus Editor"},
+            "rootUri": path_to_uri(self.root),
+            "workspaceFolders": [{"uri": path_to_uri(self.root), "name": os.path.basename(self.root)}],
+            "capabilities": {
+                "general": {"positionEncodings": ["utf-16"]},
+                "textDocument": {
+                    "synchronization": {"didSave": True, "dynamicRegistration": False},
+                    "publishDiagnostics": {"relatedInformation": False},
+                    "hover": {"contentFormat": ["plaintext", "markdown"]},
+                    "definition": {"linkSupport": True},
+                },
+                "workspace": {"workspaceFolders": True, "configuration": True},
+            },
+        }, self._initialized, direct=True)
+
+    def _initialized(self, result, error):
+        if error is not None:
+            print(f"⚠️  {self.argv[0]}: initialize failed: {error.get('message')}", file=sys.stderr)
+            self.shutdown()
+            return
+        self.capabilities = (result or {}).get("capabilities", {})
+        self.is_ready = True
+        self._write({"jsonrpc": "2.0", "method": "initialized", "params": {}})
+        queued, self._queue = self._queue, []
+        for msg in queued:
+            self._write(msg)
+        self.ready.emit()
+
+    def sync_kind(self):
+        sync = self.capabilities.get("textDocumentSync", SYNC_NONE)
+        return sync.get("change", SYNC_NONE) if isinstance(sync, dict) else sync
+
+    def wants_save(self):
+        sync = self.capabilities.get("textDocumentSync")
+        return isinstance(sync, dict) and bool(sync.get("save"))
+
+    # ── sending ──────────────────────────────────────────────────────────
+    def _write(self, msg):
+        proc = self._proc
+        if proc is None:
+            return
+        body = json.dumps(msg, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        proc.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+    def _send(self, msg):
+        if self.is_ready:
+            self._write(msg)
+        else:
+            self._queue.append(msg)
+
+    def notify(self, method, params):
+        self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def request(self, method, params, callback, direct=False):
+        """
+        Send a request; `callback(result, error)` runs on the GUI thread.
+        Returns its id. `direct` skips the pre-initialize queue.
+        """
+        rid = self._next_id
+        self._next_id += 1
+        self._pending[rid] = (method, callback, time.perf_counter())
+        msg = {"jsonrpc": "2.0", "id": rid, "method": method, "params": params}
+        if direct:
+            self._write(msg)
+        else:
+            self._send(msg)
+        return rid
+
+    def cancel(self, rid):
+        """Drop the callback for `rid` and tell the server it may stop working on it."""
+        if self._pending.pop(rid, None) is not None:
+            self.notify("$/cancelRequest", {"id": rid})
+
+    # ── receiving ────────────────────────────────────────────────────────
+    def _read(self):
+        self._inbuf += bytes(self._proc.readAllStandardOutput())
+        while True:
+            head_end = self._inbuf.find(b"\r\n\r\n")
+            if head_end < 0:
+                return
+            length = None
+            for line in self._inbuf[:head_end].split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value.strip())
+            if length is None:
+                self._inbuf = self._inbuf[head_end + 4:]     # malformed header; skip it
+                continue
+            end = head_end + 4 + length
+            if len(self._inbuf) < end:
+                return
+            body, self._inbuf = self._inbuf[head_end + 4:end], self._inbuf[end:]
+            try:
+                msg = json.loads(body)
+            except ValueError:
+                continue
+            self._dispatch(msg)
+
+    def _dispatch(self, msg):
+        if "method" not in msg:
+            entry = self._pending.pop(msg.get("id"), None)
+            if entry is None:
+                return  # cancelled, or not ours
+            method, callback, t0 = entry
+            tracer.add(f"lsp {method}", "lsp", t0, time.perf_counter())
+            callback(msg.get("result"), msg.get("error"))
+        elif "id" in msg:
+            self._answer(msg)
+        else:
+            self.notification.emit(msg["method"], msg.get("params"))
+
+    def _answer(self, msg):
+        # requests from the server; we only need to not leave them hanging
+        method, params = msg["method"], msg.get("params") or {}
+        result = None
+        if method == "workspace/configuration":
+            result = [None] * len(params.get("items", ()))
+        elif method == "workspace/workspaceFolders":
+            result = [{"uri": path_to_uri(self.root), "name": os.path.basename(self.root)}]
+        self._write({"jsonrpc": "2.0", "id": msg["id"], "result": result})
+
+    # ── lifetime ─────────────────────────────────────────────────────────
+    def _error(self, err):
+        if err == QProcess.ProcessError.FailedToStart:
+            print(f"⚠️  Could not start language server {self.argv[0]!r}", file=sys.stderr)
+            self._proc = None
+            self.stopped.emit(-1)
+
+    def _finished(self, code, status):
+        self._proc = None
+        self.is_ready = False
+        self._pending.clear()
+        if not self._stopping:
+            tail = "\n".join(self._stderr)
+            print(f"⚠️  Language server {self.argv[0]!r} exited ({code})" + (f":\n{tail}" if tail else ""),
+                  file=sys.stderr)
+        self.stopped.emit(code)
+
+    def running(self):
+        return self._proc is not None
+
+    def shutdown(self, wait=False):
+        """
+        shutdown/exit handshake: `exit` goes out once `shutdown` is answered,
+        and the process is killed if it is still there SHUTDOWN_MS later.
+        Driven by signals, except with `wait` (app quit, when the event loop
+        won't run again), which blocks until the server is gone.
+        """
+        self._stopping = True
+        proc = self._proc
+        if proc is None:
+            return
+        rid = None
+        if self.is_ready:
+            rid = self.request("shutdown", None, self._exit, direct=True)
+        else:
+            self._exit()
+        if not wait:
+            QTimer.singleShot(SHUTDOWN_MS, self._kill)
+            return
+        deadline = time.monotonic() + SHUTDOWN_MS / 1000
+        while rid in self._pending and self._proc is proc:
+            # readyRead is emitted from inside the wait, so the reply is dispatched
+            left = int((deadline - time.monotonic()) * 1000)
+            if left <= 0 or not proc.waitForReadyRead(left):
+                break
+        if self._pending.pop(rid, None) is not None:
+            self._exit()    # no answer in time
+        if self._proc is proc and not proc.waitForFinished(SHUTDOWN_MS):
+            proc.kill()
+            proc.waitForFinished(SHUTDOWN_MS)
+
+    def _exit(self, *_):
+        if self._proc is not None:
+            self._write({"jsonrpc": "2.0", "method": "exit"})
+            self._proc.closeWriteChannel()
+
+    def _kill(self):
+        if self._proc is not None:
+            self._proc.kill()
+
+
+class LspDocument:
+    """The server's view of one open file: version, the last text it was sent, queued edits."""
+
+    def __init__(self, path, editor, server):
+        self.path = path
+        self.uri = path_to_uri(path)
+        self.editor = editor
+        self.server = server
+        self.version = 1
+        self.snap = editor.snapshot()
+        self.changes = []
+        self.full = False
+        self.conn = None        # its contentsChange connection
+
+
+class LspManager(QObject):
+    """
+    Starts one server per language on demand (`lsp_servers` setting or a
+    known server on PATH) and keeps every open text editor in sync with
+    it: didOpen/didClose, didSave, and didChange built from contentsChange
+    as ranged edits, batched for CHANGE_MS. Diagnostics land in the
+    editor's gutter. Requests are debounced per kind and a newer one
+    cancels the one in flight ($/cancelRequest).
+    """
+
+    message = pyqtSignal(str)
+    location = pyqtSignal(str, int, int)    # go-to-definition target: path, line, column
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = os.path.abspath(root)
+        self.servers = {}       # language -> LspServer
+        self.docs = {}          # path -> LspDocument
+        self.enabled = get_setting("lsp_enabled", True)
+        self._crashes = {}
+        self._inflight = {}     # request kind -> (server, id)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(CHANGE_MS)
+        self._timer.timeout.connect(self.flush)
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(HOVER_MS)
+        self._hover_timer.timeout.connect(self._hover)
+        self._hover_at = None
+
+    # ── servers ──────────────────────────────────────────────────────────
+    def server_for(self, language):
+        if language in self.servers or not self.enabled:
+            return self.servers.get(language)     # None: known to be unavailable
+        argv = server_command(language)
+        if argv is None:
+            self.servers[language] = None
+            return None
+        server = LspServer(language, argv, self.root, self)
+        server.notification.connect(self._on_notification)
+        server.stopped.connect(functools.partial(self._on_stopped, server))
+        self.servers[language] = server
+        server.start()
+        return server
+
+    def _on_stopped(self, server, code):
+        if self.servers.get(server.language) is not server or server._stopping:
+            return
+        del self.servers[server.language]
+        for doc in [d for d in self.docs.values() if d.server is server]:
+            del self.docs[doc.path]
+            self._drop(doc)
+            self._set_diagnostics(doc, [])
+        now = time.monotonic()
+        crashes = self._crashes.setdefault(server.language, deque())
+        crashes.append(now)
+        while crashes and now - crashes[0] > RESTART_WINDOW:
+            crashes.popleft()
+        if len(crashes) > RESTARTS or code == -1:
+            self.message.emit(f"Language server for {server.language} stopped; not restarting it")
+            self.servers[server.language] = None    # remembered as unavailable
+            return
+        self.message.emit(f"Language server for {server.language} exited ({code}); restarting")
+        QTimer.singleShot(250 * 2 ** (len(crashes) - 1), self._reopen)
+
+    def _reopen(self):
+        for ed in list(self._editors()):
+            self.open(ed)
+
+    def _editors(self):
+        parent = self.parent()
+        area = getattr(parent, "editor_area", None)
+        return area.text_editors() if area is not None else ()
+
+    def set_root(self, root):
+        root = os.path.abspath(root)
+        if root == self.root:
+            return
+        self.shutdown()
+        self.root = root
+        self.servers, self.docs, self._crashes = {}, {}, {}
+        self._reopen()
+
+    def shutdown(self, wait=False):
+        """Stop every server; `wait` (app quit) blocks until they have exited."""
+        self._timer.stop()
+        self.flush()
+        for server in self.servers.values():
+            if server is not None:
+                server.shutdown(wait)
+        for doc in self.docs.values():
+            self._drop(doc)
+        self.docs = {}
+
+    # ── documents ────────────────────────────────────────────────────────
+    def open(self, editor):
+        path = getattr(editor, "file_path", None)
+        if not path or not hasattr(editor, "snapshot"):
+            return
+        path = os.path.abspath(path)
+        doc = self.docs.get(path)
+        if doc is not None:
+            try:
+                doc.editor.document()
+                return  # another view of the same file is already the source
+            except RuntimeError:
+                # its editor was hibernated or closed; this one takes over
+                doc.editor, doc.snap, doc.full = editor, editor.snapshot(), True
+                self._follow(doc)
+                self._watch_hover(editor)
+                self._timer.start()
+                return
+        language = language_for(path)
+        server = self.server_for(language) if language else None
+        if server is None:
+            return
+        doc = LspDocument(path, editor, server)
+        self.docs[path] = doc
+        server.notify("textDocument/didOpen", {"textDocument": {
+            "uri": doc.uri, "languageId": LANGUAGE_IDS.get(language, language),
+            "version": doc.version, "text": doc.snap.text()}})
+        self._follow(doc)
+        self._watch_hover(editor)
+
+    def _follow(self, doc):
+        doc.conn = doc.editor.document().contentsChange.connect(functools.partial(self._on_change, doc))
+
+    def _drop(self, doc):
+        """Stop following a document that is no longer synced."""
+        try:
+            doc.editor.document().contentsChange.disconnect(doc.conn)
+        except (RuntimeError, TypeError):
+            pass    # its editor is gone, and the connection with it
+        doc.conn = None
+
+    def retain(self, paths):
+        """didClose for documents whose last editor is gone."""
+        keep = {os.path.abspath(p) for p in paths if p}
+        for path in [p for p in self.docs if p not in keep]:
+            doc = self.docs.pop(path)
+            self._drop(doc)
+            doc.server.notify("textDocument/didClose", {"textDocument": {"uri": doc.uri}})
+
+    def saved(self, path):
+        doc = self.docs.get(os.path.abspath(path))
+        if doc is not None and doc.server.wants_save():
+            self.flush()
+            doc.server.notify("textDocument/didSave", {"textDocument": {"uri": doc.uri}})
+
+    def _on_change(self, doc, pos, removed, added):
+        if not (removed or added) or self.docs.get(doc.path) is not doc:
+            return
+        old, new = doc.snap, doc.editor.snapshot()
+        doc.snap = new
+        if doc.full or not (old.exact and new.exact) or len(old) - removed + added != len(new):
+            doc.full = True     # positions we can't trust: send the whole text
+        else:
+            # positions before `pos` are the same in the old and new text
+            block = doc.editor.document().findBlock(pos)
+            line, col = block.blockNumber(), pos - block.position()
+            gone = old.slice(pos, pos + removed)
+            nl = gone.count("\n")
+            end = (line + nl, col + len(gone) if not nl else len(gone) - gone.rfind("\n") - 1)
+            doc.changes.append({
+                "range": {"start": {"line": line, "character": col},
+                          "end": {"line": end[0], "character": end[1]}},
+                "text": new.slice(pos, pos + added),
+            })
+        self._timer.start()
+
+    def flush(self):
+        """Send the queued edits of every document as one didChange each."""
+        for doc in self.docs.values():
+            if not (doc.changes or doc.full):
+                continue
+            kind = doc.server.sync_kind()
+            if kind == SYNC_NONE:
+                doc.changes, doc.full = [], False
+                continue
+            doc.version += 1
+            if doc.full or kind == SYNC_FULL:
+                changes = [{"text": doc.snap.text()}]
+            else:
+                changes = doc.changes
+            doc.server.notify("textDocument/didChange", {
+                "textDocument": {"uri": doc.uri, "version": doc.version}, "contentChanges": changes})
+            doc.changes, doc.full = [], False
+
+    # ── diagnostics ──────────────────────────────────────────────────────
+    def _on_notification(self, method, params):
+        if method == "textDocument/publishDiagnostics":
+            doc = self.docs.get(uri_to_path(params.get("uri", "")))
+            if doc is not None:
+                self._set_diagnostics(doc, params.get("diagnostics", []))
+        elif method == "window/showMessage":
+            self.message.emit(params.get("message", ""))
+
+    def _set_diagnostics(self, doc, items):
+        try:
+            doc.editor.set_diagnostics([
+                (d["range"]["start"]["line"], d.get("severity", SEVERITY_ERROR), d.get("message", ""))
+                for d in items])
+        except RuntimeError:
+            pass    # editor closed meanwhile
+
+    # ── requests ─────────────────────────────────────────────────────────
+    def _position(self, editor, pos):
+        block = editor.document().findBlock(pos)
+        return {"line": block.blockNumber(), "character": pos - block.position()}
+
+    def request(self, kind, editor, method, params, callback):
+        """Send `method` for `editor`'s document, cancelling the previous `kind` request still out."""
+        doc = self.docs.get(os.path.abspath(getattr(editor, "file_path", "") or ""))
+        if doc is None or not doc.server.running():
+            return None
+        prev = self._inflight.pop(kind, None)
+        if prev is not None:
+            prev[0].cancel(prev[1])
+        self.flush()    # the server must see what the user sees
+
+        def done(result, error, kind=kind):
+            self._inflight.pop(kind, None)
+            if error is None:
+                callback(result)
+        params = dict(params, textDocument={"uri": doc.uri})
+        rid = doc.server.request(method, params, done)
+        self._inflight[kind] = (doc.server, rid)
+        return rid
+
+    def _watch_hover(self, editor):
+        editor.viewport().setMouseTracking(True)
+        editor.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj, ev):
+        t = ev.type()
+        if t == QEvent.Type.MouseMove:
+            editor = obj.parent()
+            self._hover_at = (editor, ev.position().toPoint(), ev.globalPosition().toPoint())
+            self._hover_timer.start()
+        elif t in (QEvent.Type.Leave, QEvent.Type.KeyPress, QEvent.Type.MouseButtonPress):
+            self._hover_at = None
+            self._hover_timer.stop()
+            prev = self._inflight.pop("hover", None)
+            if prev is not None:
+                prev[0].cancel(prev[1])
+        return False
+
+    def _hover(self):
+        if self._hover_at is None:
+            return
+        editor, point, global_pos = self._hover_at
+        pos = editor.cursorForPosition(point).position()
+
+        def show(result):
+            if not result or self._hover_at is None or self._hover_at[0] is not editor:
+                return
+            text = _hover_text(result.get("contents"))
+            if text:
+                QToolTip.showText(global_pos, text[:2000], editor)
+        self.request("hover", editor, "textDocument/hover", {"position": self._position(editor, pos)}, show)
+
+    def goto_definition(self, editor):
+        """Ask for the definition of what is under the caret; `location` fires with the answer."""
+        def done(result):
+            if isinstance(result, list):
+                result = result[0] if result else None
+            if not result:
+                self.message.emit("No definition found")
+                return
+            uri = result.get("targetUri") or result.get("uri")
+            rng = result.get("targetSelectionRange") or result.get("range")
+            start = rng["start"]
+            self.location.emit(uri_to_path(uri), start["line"] + 1, start["character"])
+        return self.request("definition", editor, "textDocument/definition",
+                            {"position": self._position(editor, editor.textCursor().position())}, done)
+
+
+def _hover_text(contents):
+    if isinstance(contents, str):
+        return contents.strip()
+    if isinstance(contents, dict):
+        return str(contents.get("value", "")).strip()
+    if isinstance(contents, list):
+        return "\n\n".join(filter(None, (_hover_text(c) for c in contents)))
+    return ""
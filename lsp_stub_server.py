@@ -0,0 +1,219 @@
+"""
+A tiny language server for exercising the LSP client without installing
+a real one. Point a language at it in config.json:
+
+    "lsp_servers": {"python": ["python", "/path/to/lsp_stub_server.py"]}
+
+It speaks JSON-RPC over stdio with Content-Length framing, applies
+incremental didChange edits (UTF-16 positions), and reports:
+  - diagnostics: FIXME lines as errors, TODO lines as warnings, lines
+    over 120 characters as information;
+  - hover: the word under the position;
+  - definition: the first `def`/`class`/`function` of that word;
+  - stub/text: its copy of a document, so tests can check the sync.
+`--delay MS` makes hover and definition slow, and a $/cancelRequest that
+has arrived by then is answered with RequestCancelled (POSIX only: it
+polls stdin with select()).
+"""
+import os
+import re
+import sys
+import json
+import time
+import select
+
+REQUEST_CANCELLED = -32800
+METHOD_NOT_FOUND = -32601
+WORD = re.compile(r"[\w$]+")
+
+
+class Reader:
+    """Framed messages from stdin, with our own buffer so select() tells the truth."""
+
+    def __init__(self, fd=0):
+        self.fd = fd
+        self.buf = b""
+
+    def _fill(self):
+        chunk = os.read(self.fd, 65536)
+        self.buf += chunk
+        return bool(chunk)
+
+    def available(self):
+        return bool(self.buf) or bool(select.select([self.fd], [], [], 0)[0])
+
+    def read(self):
+        while b"\r\n\r\n" not in self.buf:
+            if not self._fill():
+                return None
+        head, _, rest = self.buf.partition(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        while len(rest) < length:
+            if not self._fill():
+                return None
+            rest = self.buf.partition(b"\r\n\r\n")[2]
+        self.buf = rest[length:]
+        return json.loads(rest[:length])
+
+
+def write_message(msg):
+    body = json.dumps(msg).encode("utf-8")
+    sys.stdout.buffer.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    sys.stdout.buffer.flush()
+
+
+def utf16_to_index(line, character):
+    """Python index in `line` of a UTF-16 code unit offset."""
+    units = 0
+    for i, c in enumerate(line):
+        if units >= character:
+            return i
+        units += 2 if ord(c) > 0xFFFF else 1
+    return len(line)
+
+
+def offset(text, position):
+    lines = text.split("\n")
+    line = min(position["line"], len(lines) - 1)
+    start = sum(len(l) + 1 for l in lines[:line])
+    return start + utf16_to_index(lines[line], position["character"])
+
+
+class StubServer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.docs = {}          # uri -> text
+        self.cancelled = set()
+        self.backlog = []
+        self.shutting_down = False
+        self.reader = Reader()
+
+    def diagnostics(self, uri):
+        out = []
+        for n, line in enumerate(self.docs.get(uri, "").split("\n")):
+            for word, severity in (("FIXME", 1), ("TODO", 2)):
+                col = line.find(word)
+                if col >= 0:
+                    out.append({"range": {"start": {"line": n, "character": col},
+                                          "end": {"line": n, "character": col + len(word)}},
+                                "severity": severity, "source": "stub", "message": f"{word} left in code"})
+            if len(line) > 120:
+                out.append({"range": {"start": {"line": n, "character": 120},
+                                      "end": {"line": n, "character": len(line)}},
+                            "severity": 3, "source": "stub", "message": "line longer than 120 characters"})
+        write_message({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics",
+                       "params": {"uri": uri, "diagnostics": out}})
+
+    def word_at(self, params):
+        text = self.docs.get(params["textDocument"]["uri"], "")
+        pos = offset(text, params["position"])
+        for m in WORD.finditer(text):
+            if m.start() <= pos <= m.end():
+                return m.group(0)
+        return None
+
+    def slow(self):
+        # wait, then look at what arrived meanwhile (cancellations, mostly)
+        if not self.delay:
+            return
+        time.sleep(self.delay)
+        while self.reader.available():
+            msg = self.reader.read()
+            if msg is None:
+                break
+            if msg.get("method") == "$/cancelRequest":
+                self.cancelled.add(msg["params"]["id"])
+            else:
+                self.backlog.append(msg)
+
+    def handle(self, msg):
+        method, params, rid = msg.get("method"), msg.get("params") or {}, msg.get("id")
+        if method == "initialize":
+            return {"capabilities": {
+                "positionEncoding": "utf-16",
+                "textDocumentSync": {"openClose": True, "change": 2, "save": True},
+                "hoverProvider": True, "definitionProvider": True,
+            }, "serverInfo": {"name": "lsp-stub"}}
+        if method == "textDocument/didOpen":
+            doc = params["textDocument"]
+            self.docs[doc["uri"]] = doc["text"]
+            self.diagnostics(doc["uri"])
+        elif method == "textDocument/didChange":
+            uri = params["textDocument"]["uri"]
+            text = self.docs.get(uri, "")
+            for change in params["contentChanges"]:
+                if "range" in change:
+                    a = offset(text, change["range"]["start"])
+                    b = offset(text, change["range"]["end"])
+                    text = text[:a] + change["text"] + text[b:]
+                else:
+                    text = change["text"]
+            self.docs[uri] = text
+            self.diagnostics(uri)
+        elif method == "textDocument/didClose":
+            self.docs.pop(params["textDocument"]["uri"], None)
+        elif method == "$/cancelRequest":
+            self.cancelled.add(params["id"])
+        elif method == "textDocument/hover":
+            self.slow()
+            word = self.word_at(params)
+            return {"contents": {"kind": "plaintext", "value": f"stub: {word}"}} if word else None
+        elif method == "textDocument/definition":
+            self.slow()
+            word = self.word_at(params)
+            uri = params["textDocument"]["uri"]
+            if word:
+                rx = re.compile(r"\b(?:def|class|function)\s+(" + re.escape(word) + r")\b")
+                for n, line in enumerate(self.docs.get(uri, "").split("\n")):
+                    m = rx.search(line)
+                    if m:
+                        return {"uri": uri, "range": {"start": {"line": n, "character": m.start(1)},
+                                                      "end": {"line": n, "character": m.end(1)}}}
+            return None
+        elif method == "stub/text":
+            return self.docs.get(params["uri"])
+        elif method == "shutdown":
+            self.shutting_down = True
+        elif method == "exit":
+            sys.exit(0 if self.shutting_down else 1)
+        elif rid is not None:
+            raise LookupError(method)
+        return None
+
+    def serve(self):
+        while True:
+            msg = self.backlog.pop(0) if self.backlog else self.reader.read()
+            if msg is None:
+                return
+            rid = msg.get("id")
+            if "method" not in msg:
+                continue    # a response to something we never ask
+            try:
+                result = self.handle(msg)
+            except LookupError:
+                write_message({"jsonrpc": "2.0", "id": rid,
+                               "error": {"code": METHOD_NOT_FOUND, "message": f"unknown method {msg['method']}"}})
+                continue
+            if rid is None:
+                continue
+            if rid in self.cancelled:
+                self.cancelled.discard(rid)
+                write_message({"jsonrpc": "2.0", "id": rid,
+                               "error": {"code": REQUEST_CANCELLED, "message": "cancelled"}})
+            else:
+                write_message({"jsonrpc": "2.0", "id": rid, "result": result})
+
+
+def main(argv):
+    delay = 0.0
+    if "--delay" in argv:
+        delay = float(argv[argv.index("--delay") + 1]) / 1000
+    StubServer(delay).serve()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,20 +1,42 @@
 # main.py
-import sys, os, json, subprocess, re, traceback, shutil
-import markdown
-from PIL import Image
-from PIL.ImageQt import ImageQt
-from PyQt6.QtGui import QColor, QFont, QPalette, QTextCharFormat, QTextCursor, QSyntaxHighlighter, QFileSystemModel, QAction, QIcon, QPainter, QPixmap, QShortcut, QKeySequence
+from startup_profile import profile as startup_profile
+import sys, os, json, subprocess, re
+# markdown, PIL and QtWebEngine are imported on first use (see _open_*_tab);
+# the WebEngine import alone costs more than the rest of startup
+from PyQt6.QtGui import QColor, QFont, QPalette, QTextCharFormat, QTextCursor, QSyntaxHighlighter, QAction, QIcon, QPainter, QShortcut, QKeySequence, QPolygon
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QSplitter, QTabWidget, QPlainTextEdit,
+    QApplication, QToolTip, QMainWindow, QWidget, QSplitter, QTabWidget, QPlainTextEdit,
     QTreeView, QDockWidget, QLineEdit, QPushButton, QListWidget,
     QTextEdit, QLabel, QVBoxLayout, QHBoxLayout, QMessageBox,
     QFileDialog, QInputDialog, QMenu, QAbstractItemView, QStackedWidget,
-    QCheckBox, QListWidgetItem, QHeaderView, QDialog
+    QCheckBox, QListWidgetItem, QHeaderView, QDialog, QProgressBar
 )
-from PyQt6.QtCore import Qt, QTimer, QPoint, QSize, QRect, QThread, pyqtSignal, QStandardPaths, QUrl
-from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtCore import Qt, QTimer, QPoint, QSize, QRect, QThread, pyqtSignal, QStandardPaths, QUrl, QCoreApplication, QEvent
 from your_splash_module import NexusSplash
-from config import is_first_launch, mark_launched
+from config import is_first_launch, mark_launched, get_setting
+from scrollback import ScrollbackView
+from project_watcher import ProjectWatcher
+from project_tree import ProjectTreeModel
+from file_ops import FileOp, FileOpQueue
+from autosave import AutosaveManager
+from save_pipeline import SavePipeline
+from preview_host import WebPreviewPool
+from markdown_sync import ScrollSync, render_markdown
+from text_buffer import DocumentBuffer
+from multi_cursor import MultiCursor
+from perf_trace import tracer, StallWatchdog, PerfDock
+from tab_memory import TabHibernator, TabMemoryDock
+from symbol_index import SymbolIndex, GoToSymbolDialog
+from completion import EditorCompletion, TokenIndex
+from lsp_client import LspManager
+from folding import FoldModel, FOLD_WIDTH
+# PluginInterface is re-exported here for plugins written against main.py
+from plugin_bus import (
+    EventBus, PluginManager, PluginHost, PluginInterface,
+    FileOpened, FileSaved, TextChanged, SearchFinished, language_for,
+)
+import session
+startup_profile.mark("imports")
 
 # ────── Utility: Theme Manager ────────────────────────────────────────────────
 def load_theme(path):
@@ -320,18 +342,36 @@ class QuickOpenDialog(QDialog):
         self.files = []
 
     def refresh_file_list(self):
-        """Read current project_dir from parent and re-walk the tree."""
+        """Read current project_dir from parent and rebuild the file list."""
         parent = self.parent()
         if not parent or not hasattr(parent, "project_dir"):
             return
+        if parent.project_dir == self.root and self.files:
+            return  # kept current by on_fs_changes
 
         self.root = parent.project_dir
         self.files = []
+        watcher = getattr(parent, "watcher", None)
+        if watcher is not None and watcher.is_ready() and watcher.root == os.path.abspath(self.root):
+            # the watcher already holds a snapshot of the tree
+            self.files = [os.path.relpath(p, self.root) for p in watcher.files()]
+            return
         for dirpath, _, filenames in os.walk(self.root):
             for fname in filenames:
                 rel = os.path.relpath(os.path.join(dirpath, fname), self.root)
                 self.files.append(rel)
 
+    def on_fs_changes(self, changes):
+        """Apply a watcher ChangeSet to the cached file list."""
+        if not self.root or not self.files:
+            return
+        if changes.deleted:
+            gone = {os.path.relpath(p, self.root) for p in changes.deleted}
+            self.files = [f for f in self.files if f not in gone]
+        for p in changes.created:
+            if os.path.isfile(p):
+                self.files.append(os.path.relpath(p, self.root))
+
     def showEvent(self, ev):
         """Before showing, update file list and reposition & resize."""
         parent = self.parent()
@@ -385,88 +425,97 @@ class QuickOpenDialog(QDialog):
         else:
             super().keyPressEvent(ev)
 
+def utf16_len(text):
+    """Length of `text` in QTextDocument positions (UTF-16 code units)."""
+    return len(text) + sum(1 for c in text if ord(c) > 0xFFFF)
+
+
+def compile_search(pattern, opts):
+    """Regex for a search `pattern` under the dock's regex/case/whole options."""
+    flags = 0 if opts['case'] else re.IGNORECASE
+    if not opts['regex']:
+        pattern = re.escape(pattern)
+    if opts['whole']:
+        pattern = r'\b' + pattern + r'\b'
+    return re.compile(pattern, flags)
+
+
 class SearchWorker(QThread):
-    # file path, line number, line text
-    result_found = pyqtSignal(str, int, str)
+    # file path, line number, line text, [(column, length)] of every match
+    result_found = pyqtSignal(str, int, str, list)
     search_done  = pyqtSignal()
 
-    def __init__(self, root, pattern, opts, parent=None):
+    def __init__(self, root, pattern, opts, files=None, overlays=None, parent=None):
         super().__init__(parent)
         self.root, self.pattern, self.opts = root, pattern, opts
+        # optional pre-built file list (from ProjectWatcher) to avoid os.walk
+        self.files = files
+        # abs path -> TextSnapshot of open buffers; searched instead of the disk
+        self.overlays = overlays or {}
 
+    @tracer.traced("search", "search")
     def run(self):
-        # build regex
-        pat = self.pattern
-        flags = 0 if self.opts['case'] else re.IGNORECASE
-        if not self.opts['regex']:
-            pat = re.escape(pat)
-        if self.opts['whole']:
-            pat = r'\b' + pat + r'\b'
-        regex = re.compile(pat, flags)
+        regex = compile_search(self.pattern, self.opts)
+
+        # open buffers first: already in memory, and what the user sees
+        for full, snap in self.overlays.items():
+            if self._wanted(os.path.basename(full)):
+                self._scan(full, snap.text().split("\n"), regex)
+        if self.opts.get('open_only'):
+            self.search_done.emit()
+            return
 
+        for dirpath, fn in self._candidates():
+            if not self._wanted(fn):
+                continue
+            full = os.path.join(dirpath, fn)
+            if os.path.abspath(full) in self.overlays:
+                continue
+            try:
+                with open(full, 'r', encoding='utf-8') as f:
+                    self._scan(full, f, regex)
+            except Exception:
+                continue
+        self.search_done.emit()
+
+    def _scan(self, full, lines, regex):
+        for i, line in enumerate(lines, start=1):
+            spans = [(m.start(), m.end() - m.start()) for m in regex.finditer(line)]
+            if spans:
+                self.result_found.emit(full, i, line.rstrip(), spans)
+
+    def _wanted(self, fn):
+        ext = os.path.splitext(fn)[1]
         include = self.opts['include']
         exclude = self.opts['exclude']
-
+        # Check include patterns
+        if include:
+            matched = False
+            for pat in include:
+                if pat.startswith('.') and ext == pat:
+                    matched = True
+                    break
+                if not pat.startswith('.') and fn == pat:
+                    matched = True
+                    break
+            if not matched:
+                return False
+        # Check exclude patterns
+        for pat in exclude:
+            if pat.startswith('.') and ext == pat:
+                return False
+            if not pat.startswith('.') and fn == pat:
+                return False
+        return True
+
+    def _candidates(self):
+        if self.files is not None:
+            for full in self.files:
+                yield os.path.split(full)
+            return
         for dirpath, _, files in os.walk(self.root):
             for fn in files:
-                ext = os.path.splitext(fn)[1]
-                # Check include patterns
-                if include:
-                    matched = False
-                    for pat in include:
-                        if pat.startswith('.') and ext == pat:
-                            matched = True
-                            break
-                        if not pat.startswith('.') and fn == pat:
-                            matched = True
-                            break
-                    if not matched:
-                        continue
-                # Check exclude patterns
-                skip = False
-                for pat in exclude:
-                    if pat.startswith('.') and ext == pat:
-                        skip = True
-                        break
-                    if not pat.startswith('.') and fn == pat:
-                        skip = True
-                        break
-                if skip:
-                    continue
-
-                full = os.path.join(dirpath, fn)
-                try:
-                    with open(full, 'r', encoding='utf-8') as f:
-                        for i, line in enumerate(f, start=1):
-                            if regex.search(line):
-                                self.result_found.emit(full, i, line.rstrip())
-                except Exception:
-                    continue
-        self.search_done.emit()
-
-# ────── Plugin API Stub ─────────────────────────────────────────────────────
-class PluginInterface:
-    def __init__(self, main_win): self.main = main_win
-    def activate(self): pass
-    def deactivate(self): pass
-
-def load_plugins(main_win):
-    plugins = []
-    plug_dir = os.path.join(os.path.dirname(__file__), "plugins")
-    if not os.path.isdir(plug_dir): return plugins
-    sys.path.insert(0, plug_dir)
-    for fn in os.listdir(plug_dir):
-        if fn.endswith(".py"):
-            name = fn[:-3]
-            try:
-                mod = __import__(name)
-                if hasattr(mod, "Plugin"):
-                    p = mod.Plugin(main_win)
-                    p.activate()
-                    plugins.append(p)
-            except Exception:
-                traceback.print_exc()
-    return plugins
+                yield dirpath, fn
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -479,6 +528,24 @@ class LineNumberArea(QWidget):
     def paintEvent(self, event):
         self.code_editor.lineNumberAreaPaintEvent(event)
 
+    def event(self, ev):
+        if ev.type() == QEvent.Type.ToolTip:
+            text = self.code_editor.diagnostics_at(ev.pos().y())
+            if text:
+                QToolTip.showText(ev.globalPos(), text, self)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().event(ev)
+
+    def mousePressEvent(self, ev):
+        # the fold column is the rightmost FOLD_WIDTH pixels
+        if ev.button() == Qt.MouseButton.LeftButton and ev.position().x() >= self.width() - FOLD_WIDTH - 2:
+            block = self.code_editor.cursorForPosition(QPoint(0, int(ev.position().y()))).block()
+            if self.code_editor.folds.toggle(block.blockNumber()):
+                return
+        super().mousePressEvent(ev)
+
 class SyntaxRule:
     def __init__(self, pattern, color, font_weight=None, italic=False, 
                  multiline_start=None, multiline_end=None, case_sensitive=True):
@@ -503,6 +570,7 @@ class CustomHighlighter(QSyntaxHighlighter):
         # Track multi-line states for each block separately by rule index
         self.current_multiline_state = {}
 
+    @tracer.traced("highlightBlock", "highlight")
     def highlightBlock(self, text):
         block_num = self.currentBlock().blockNumber()
         if self.mode_switcher:
@@ -674,6 +742,10 @@ SYNTAX_RULES['php-embedded']['js'] = SYNTAX_RULES['js']
 
 
 # ────── Code Editor with line numbers, bracket match & minimap stub ─────────
+MARK_WIDTH = 8      # gutter column for diagnostic marks
+SEVERITY_COLORS = {1: "#bf616a", 2: "#ebcb8b", 3: "#81a1c1", 4: "#4c566a"}
+
+
 class CodeEditor(QPlainTextEdit):
     def __init__(self):
         super().__init__()
@@ -686,19 +758,111 @@ class CodeEditor(QPlainTextEdit):
 
         self.setFont(QFont("Fira Code", 12))
         self.cursorPositionChanged.connect(self.match_brackets)
+        # bumped on real text edits only; highlighter passes also bump
+        # QTextDocument.revision(), which would make clean saves look stale
+        self.edit_revision = 0
+        self.document().contentsChange.connect(self._count_edit)
+        # piece-table mirror of the document; snapshots are cheap and immutable
+        self.buffer = DocumentBuffer(self.document())
+        # extra carets / column selections (Alt+click, Ctrl+D, Alt+Shift+drag)
+        self.multi = MultiCursor(self)
+        # word/identifier completion from the token index (Ctrl+Space)
+        self.completion = EditorCompletion(self)
+        self._bracket_selections = []
+        # language server diagnostics: line -> [(severity, message)]
+        self.diagnostics = {}
+        # foldable regions; folded blocks are hidden from layout and painting
+        self.folds = FoldModel(self)
         # Simplified minimap placeholder: will just draw a grey bar
         self.minimap = QWidget(self)
         self.minimap.setFixedWidth(80)
         self.minimap.setStyleSheet("background-color: rgba(200,200,200,0.1);")
         self.update_viewport_margins()
 
+    def detach(self):
+        """Drop what this editor contributes to shared indexes; called before it is deleted."""
+        self.completion.tokens.detach()
+
+    def _count_edit(self, pos, removed, added):
+        if removed or added:
+            self.edit_revision += 1
+
+    def update_extra_selections(self):
+        self.setExtraSelections(self.multi.selections() + self._bracket_selections)
+
+    def keyPressEvent(self, ev):
+        if self.completion.handle_key(ev):
+            return
+        if self.multi.handle_key(ev):
+            self.completion.hide()
+            return
+        if not self.completion.is_trigger(ev):
+            super().keyPressEvent(ev)
+        self.completion.after_key(ev)
+
+    def mousePressEvent(self, ev):
+        mods = ev.modifiers()
+        if ev.button() == Qt.MouseButton.LeftButton and mods & Qt.KeyboardModifier.AltModifier:
+            if mods & Qt.KeyboardModifier.ShiftModifier:
+                self.multi.begin_column(ev.position().toPoint())
+            else:
+                self.multi.add(self.cursorForPosition(ev.position().toPoint()))
+            return
+        self.multi.clear()
+        super().mousePressEvent(ev)
+
+    def mouseMoveEvent(self, ev):
+        if self.multi.in_column_drag():
+            self.multi.update_column(ev.position().toPoint())
+            return
+        super().mouseMoveEvent(ev)
+
+    def mouseReleaseEvent(self, ev):
+        if self.multi.in_column_drag():
+            self.multi.end_column()
+            return
+        super().mouseReleaseEvent(ev)
+
+    def paintEvent(self, ev):
+        super().paintEvent(ev)
+        if self.multi.active():
+            painter = QPainter(self.viewport())
+            self.multi.paint_carets(painter)
+            painter.end()
+
+    def setPlainText(self, text):
+        self.multi.clear()
+        super().setPlainText(text)
+        # seed the mirror with the string we already hold instead of copying back
+        self.buffer.reset(text)
+
+    def snapshot(self):
+        """Immutable TextSnapshot of the current text (no copy of the document)."""
+        return self.buffer.snapshot()
+
     def lineNumberAreaWidth(self):
         # enough space for the number of digits in the block count
         digits = len(str(max(1, self.blockCount())))
         # padding: 3px + digit_width*d + extra
-        space = self.fontMetrics().horizontalAdvance("9") * digits + 12
+        space = self.fontMetrics().horizontalAdvance("9") * digits + 12 + MARK_WIDTH + FOLD_WIDTH
         return space
 
+    def set_diagnostics(self, items):
+        """Replace the gutter marks with `items`: (0-based line, severity, message)."""
+        diags = {}
+        for line, severity, message in items:
+            diags.setdefault(line, []).append((severity, message))
+        for marks in diags.values():
+            marks.sort()
+        self.diagnostics = diags
+        self.lineNumberArea.update()
+
+    def diagnostics_at(self, y):
+        """Messages for the gutter row at `y`, for the tooltip."""
+        block = self.cursorForPosition(QPoint(0, y)).block()
+        marks = self.diagnostics.get(block.blockNumber())
+        return "\n".join(message for _, message in marks) if marks else ""
+
     def updateLineNumberAreaWidth(self, _):
         self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
 
@@ -725,47 +889,73 @@ class CodeEditor(QPlainTextEdit):
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
         bottom = top + int(self.blockBoundingRect(block).height())
 
+        folds = self.folds
+        fold_x = self.lineNumberArea.width() - FOLD_WIDTH
         while block.isValid() and top <= event.rect().bottom():
             if block.isVisible() and bottom >= event.rect().top():
+                if folds.is_folded(block_number) or folds.foldable(block):
+                    self._paint_fold_marker(painter, fold_x, top, folds.is_folded(block_number))
+                marks = self.diagnostics.get(block_number)
+                if marks:
+                    # most severe first; a dot in the leftmost column
+                    painter.setPen(Qt.PenStyle.NoPen)
+                    painter.setBrush(QColor(SEVERITY_COLORS.get(marks[0][0], SEVERITY_COLORS[1])))
+                    d = min(MARK_WIDTH - 2, self.fontMetrics().height() - 4)
+                    painter.drawEllipse(2, top + (self.fontMetrics().height() - d) // 2, d, d)
                 number = str(block_number + 1)
                 painter.setPen(QColor("#4c566a"))
-                x = self.lineNumberArea.width() - self.fontMetrics().horizontalAdvance(number) - 6
+                x = fold_x - self.fontMetrics().horizontalAdvance(number) - 6
                 painter.drawText(x, top, self.fontMetrics().horizontalAdvance(number), self.fontMetrics().height(),
                                  Qt.AlignmentFlag.AlignRight, number)
-            block = block.next()
+            # hidden blocks have no height; skip a folded region in one step
+            block = folds.next_visible(block)
             top = bottom
             bottom = top + int(self.blockBoundingRect(block).height())
-            block_number += 1
+            block_number = block.blockNumber()
         painter.end()
 
+    def _paint_fold_marker(self, painter, x, top, folded):
+        h = self.fontMetrics().height()
+        s = min(FOLD_WIDTH - 4, h - 6) // 2 * 2
+        cx, cy = x + FOLD_WIDTH // 2, top + h // 2
+        if folded:
+            # ▸ pointing at the hidden lines
+            points = [QPoint(cx - s // 2, cy - s // 2), QPoint(cx + s // 2, cy), QPoint(cx - s // 2, cy + s // 2)]
+        else:
+            points = [QPoint(cx - s // 2, cy - s // 4), QPoint(cx + s // 2, cy - s // 4), QPoint(cx, cy + s // 4)]
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#88c0d0" if folded else "#4c566a"))
+        painter.drawPolygon(QPolygon(points))
+
     def update_viewport_margins(self):
         left = self.lineNumberAreaWidth()
         right = 80  # your minimap
         self.setViewportMargins(left, 0, right, 0)
 
+    @tracer.traced("match_brackets", "editor")
     def match_brackets(self):
         tc = self.textCursor()
         pos = tc.position()
-        text = self.toPlainText()
+        text = self.buffer.chars()  # snapshot; nothing is copied per cursor move
         pairs = {'(':')','[':']','{':'}'}
         # find on left
-        left = text[pos-1] if pos-1 < len(text) and pos>0 else ''
-        right = text[pos] if pos < len(text) else ''
+        left = text.char_at(pos-1) if pos>0 else ''
+        right = text.char_at(pos)
         match_pos = None
-        if left in pairs:
+        if left and left in pairs:
             # naive forward scan
             stack=1
-            for i in range(pos, len(text)):
-                if text[i]==left: stack+=1
-                if text[i]==pairs[left]:
+            for i, ch in text.iter_forward(pos):
+                if ch==left: stack+=1
+                if ch==pairs[left]:
                     stack-=1
                     if stack==0: match_pos=i; break
-        elif right in pairs.values():
+        elif right and right in pairs.values():
             inv = {v:k for k,v in pairs.items()}
             stack=1
-            for i in range(pos-2, -1, -1):
-                if text[i]==right: stack+=1
-                if text[i]==inv[right]:
+            for i, ch in text.iter_backward(pos-2):
+                if ch==right: stack+=1
+                if ch==inv[right]:
                     stack-=1
                     if stack==0: match_pos=i; break
         # highlight both
@@ -780,57 +970,121 @@ class CodeEditor(QPlainTextEdit):
                 tc2.movePosition(QTextCursor.MoveOperation.NextCharacter, QTextCursor.MoveMode.KeepAnchor)
                 sel.cursor=tc2; sel.format=fmt
                 extra.append(sel)
-        self.setExtraSelections(extra)
+        self._bracket_selections = extra
+        self.update_extra_selections()
 
 # ────── Editor Area with Tabs & Splits ────────────────────────────────────────
+def file_stat(path):
+    """(mtime_ns, size) of `path`, or None."""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class TabPlaceholder(QWidget):
+    """Stand-in for a restored or hibernated tab: holds only its path until shown."""
+
+    def __init__(self, path, state=None, hibernated=False):
+        super().__init__()
+        self.file_path = path
+        # saved per-tab session state (cursor, scroll, encoding, mtime…)
+        self.state = state or {"path": path}
+        self.hibernated = hibernated
+
+
 class EditorArea(QWidget):
+    # emitted whenever the set of open files changes
+    files_changed = pyqtSignal()
+    # (real widget, placeholder it replaced) once a restored tab is built
+    tab_hydrated = pyqtSignal(object, object)
+    # (path, error) when a restored tab's file can no longer be read
+    open_failed = pyqtSignal(str, str)
+    # a tab was built and added for a file (or an untitled buffer)
+    file_opened = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.tabs = QTabWidget()
         self.tabs.setTabsClosable(True)
         self.tabs.tabCloseRequested.connect(self.close_primary_tab)
+        self.tabs.currentChanged.connect(self._on_current_changed)
 
         # secondary tabs for the split pane (created on first split)
         self.secondary_tabs = None
+        self._preview_pool = None
         
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
         self.splitter.addWidget(self.tabs)
         lay = QVBoxLayout(self)
         lay.addWidget(self.splitter)
 
+    @property
+    def preview_pool(self):
+        # created on the first HTML tab so WebEngine stays unloaded until then
+        if self._preview_pool is None:
+            self._preview_pool = WebPreviewPool(parent=self)
+        return self._preview_pool
+
     def new_tab(self, path=None):
+        widget = self._build_tab(path)
+        self._add_tab(widget, os.path.basename(path) if path else "Untitled")
+        if isinstance(widget, QPlainTextEdit):
+            widget.document().setModified(False)
+        self.file_opened.emit(widget)
+        return widget
+
+    @tracer.traced("open tab", "io")
+    def _build_tab(self, path, encoding=None):
+        """Create the widget for `path` without adding it to a tab bar."""
+        widget = None
         if path:
             ext = os.path.splitext(path)[1].lower()
             
             # Handle images
             if ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico']:
-                return self._open_image_tab(path)
+                widget = self._open_image_tab(path)
                 
             # Handle HTML
             elif ext in ['.html', '.htm']:
-                return self._open_html_tab(path)
+                widget = self._open_html_tab(path)
                 
             # Handle Markdown
             elif ext == '.md':
-                return self._open_markdown_tab(path)
+                widget = self._open_markdown_tab(path)
+
+            # CSV/TSV: virtualized table (raw text is a toggle inside the tab)
+            elif ext in ['.csv', '.tsv']:
+                widget = self._open_csv_tab(path)
         
         # Default to text editor
-        return self._open_text_tab(path)
+        if widget is None:
+            widget = self._open_text_tab(path, encoding)
+        return widget
 
-    def _open_text_tab(self, path):
+    def _open_text_tab(self, path, encoding=None):
         ed = CodeEditor()
         ed.file_path = path
         ed.document().modificationChanged.connect(
             lambda modified, ed=ed: self._mark_unsaved(ed, modified)
         )
 
+        ed.encoding = encoding or 'utf-8'
         if path:
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except UnicodeDecodeError:
-                with open(path, 'r', encoding='latin-1', errors='replace') as f:
+            if encoding:
+                # known from the session and the file is unchanged: no probing
+                with open(path, 'r', encoding=encoding, errors='replace') as f:
                     content = f.read()
+            else:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                except UnicodeDecodeError:
+                    with open(path, 'r', encoding='latin-1', errors='replace') as f:
+                        content = f.read()
+                    ed.encoding = 'latin-1'
+            ed.disk_stat = file_stat(path)
             ed.setPlainText(content)
 
             ext = os.path.splitext(path)[1].lower()
@@ -848,36 +1102,19 @@ class EditorArea(QWidget):
             if rules:
                 ed.highlighter = CustomHighlighter(ed.document(), rules)
 
-        idx = self.tabs.addTab(ed, os.path.basename(path) if path else "Untitled")
-        self.tabs.setCurrentIndex(idx)
         ed.document().setModified(False)
         return ed
 
 
     def _open_image_tab(self, path):
-        try:
-            # Load image using PIL to handle all formats including .ico
-            img = Image.open(path)
-            qimg = ImageQt(img).copy()
-            pixmap = QPixmap.fromImage(qimg)
-            
-            # Create display widget
-            container = QWidget()
-            layout = QVBoxLayout(container)
-            label = QLabel()
-            label.setPixmap(pixmap)
-            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(label)
-
-            container.file_path = path
-            
-            # Add to tab
-            idx = self.tabs.addTab(container, os.path.basename(path))
-            self.tabs.setCurrentIndex(idx)
-            return container
-        except Exception as e:
-            QMessageBox.warning(self, "Image Error", f"Could not open image: {e}")
-            return self._open_text_tab(path)
+        # decoded in a worker at viewport size; see image_viewer.py
+        from image_viewer import ImageViewer
+        return ImageViewer(path)
+
+    def _open_csv_tab(self, path):
+        # rows are indexed and parsed lazily; see csv_viewer.py
+        from csv_viewer import CsvViewer
+        return CsvViewer(path)
 
     def _open_html_tab(self, path):
         # Create splitter
@@ -886,33 +1123,31 @@ class EditorArea(QWidget):
         # Left: Code editor
         editor = CodeEditor()
         editor.file_path = path
+        editor.encoding = 'utf-8'
+        editor.disk_stat = file_stat(path)
         with open(path, 'r', encoding='utf-8', errors='replace') as f:
             content = f.read()
         editor.setPlainText(content)
         editor.document().setModified(False)
 
-        # Right: Web view preview
-        webview = QWebEngineView()
-        # load with correct base URL so <img src="..."> works
-        base = QUrl.fromLocalFile(path)
-        webview.setHtml(content, base)
-
-        # Connect editor to update preview live
-        editor.textChanged.connect(
-            lambda: webview.setHtml(editor.toPlainText(), base)
+        # Right: preview slot; a pooled web view is attached while it's shown.
+        # Base URL is the file itself so <img src="..."> works
+        preview = self.preview_pool.create_slot(
+            lambda: editor.snapshot().text(), QUrl.fromLocalFile(path)
         )
 
+        # Connect editor to update preview live (debounced inside the slot)
+        editor.textChanged.connect(preview.schedule_update)
+
         splitter.addWidget(editor)
-        splitter.addWidget(webview)
+        splitter.addWidget(preview)
         splitter.setSizes([300, 300])
 
         # attach attributes for state + reload-on-save
         splitter.file_path = path
         splitter.editor   = editor
-        splitter.webview  = webview
+        splitter.preview_slot = preview
 
-        idx = self.tabs.addTab(splitter, os.path.basename(path))
-        self.tabs.setCurrentIndex(idx)
         return splitter
 
 
@@ -921,6 +1156,8 @@ class EditorArea(QWidget):
 
         editor = CodeEditor()
         editor.file_path = path
+        editor.encoding = 'utf-8'
+        editor.disk_stat = file_stat(path)
         with open(path, 'r', encoding='utf-8', errors='replace') as f:
             md = f.read()
         editor.setPlainText(md)
@@ -928,18 +1165,15 @@ class EditorArea(QWidget):
 
         preview = QTextEdit()
         preview.setReadOnly(True)
-        preview.setHtml(markdown.markdown(md))
+
+        # sync scrolling through source-line anchors, one update per frame
+        preview.sync = ScrollSync(editor, preview)
+        preview.sync.set_html(render_markdown(md))
 
         editor.textChanged.connect(
             lambda: self.update_markdown_preview(editor, preview)
         )
 
-        # sync scrolling
-        sb_ed = editor.verticalScrollBar()
-        sb_md = preview.verticalScrollBar()
-        sb_ed.valueChanged.connect(sb_md.setValue)
-        sb_md.valueChanged.connect(sb_ed.setValue)
-
         splitter.addWidget(editor)
         splitter.addWidget(preview)
         splitter.setSizes([300, 300])
@@ -948,15 +1182,187 @@ class EditorArea(QWidget):
         splitter.editor   = editor
         splitter.preview  = preview
 
-        idx = self.tabs.addTab(splitter, os.path.basename(path))
-        self.tabs.setCurrentIndex(idx)
         return splitter
 
 
+    # ── lazy session restore ─────────────────────────────────────────────
+    def add_placeholder(self, path, tabs=None, state=None):
+        """Add a tab that only knows its path; it is built on first activation."""
+        tw = self.tabs if tabs is None else tabs
+        ph = TabPlaceholder(path, state)
+        tw.addTab(ph, os.path.basename(path))
+        return ph
+
+    def restore_tabs(self, tab_states, active=0, tabs=None):
+        """Add placeholders for `tab_states`, then build only the active one."""
+        tw = self.tabs if tabs is None else tabs
+        self._restoring = True
+        try:
+            for st in tab_states:
+                self.add_placeholder(st["path"], tw, st)
+        finally:
+            self._restoring = False
+        if tw.count():
+            active = min(max(active, 0), tw.count() - 1)
+            tw.setCurrentIndex(active)
+            self._hydrate(tw, active)
+        self.files_changed.emit()
+
+    # ── per-tab session state ─────────────────────────────────────────────
+    def tab_state(self, w):
+        """Cheap description of a tab for the session file (no document text)."""
+        if isinstance(w, TabPlaceholder):
+            return dict(w.state)
+        path = getattr(w, "file_path", None)
+        if not path:
+            return None
+        st = {"path": path}
+        ed = w.editor if hasattr(w, "editor") else w
+        if isinstance(ed, QPlainTextEdit):
+            tc = ed.textCursor()
+            st["cursor"] = tc.position()
+            st["anchor"] = tc.anchor()
+            st["scroll"] = ed.verticalScrollBar().value()
+            st["encoding"] = getattr(ed, "encoding", "utf-8")
+            folds = getattr(ed, "folds", None)
+            if folds and folds.folded:
+                st["folds"] = folds.state()
+            disk = getattr(ed, "disk_stat", None)
+            if disk:
+                st["mtime"], st["size"] = disk
+        return st
+
+    def apply_tab_state(self, w, st):
+        ed = w.editor if hasattr(w, "editor") else w
+        if not isinstance(ed, QPlainTextEdit) or "cursor" not in st:
+            return
+        # folds first: a cursor that was inside one opens it again
+        if hasattr(ed, "folds"):
+            ed.folds.restore(st.get("folds", ()))
+        last = ed.document().characterCount() - 1
+        tc = ed.textCursor()
+        tc.setPosition(min(st.get("anchor", st["cursor"]), last))
+        tc.setPosition(min(st["cursor"], last), QTextCursor.MoveMode.KeepAnchor)
+        ed.setTextCursor(tc)
+        scroll = st.get("scroll", 0)
+        # the scroll range is only known once the editor has been laid out
+        QTimer.singleShot(0, lambda: ed.verticalScrollBar().setValue(scroll))
+
+    def split_sizes(self):
+        return self.splitter.sizes() if self.secondary_tabs else None
+
+    def _on_current_changed(self, index):
+        tw = self.sender()
+        if isinstance(tw, QTabWidget):
+            self._hydrate(tw, index)
+
+    def _hydrate(self, tw, index):
+        """Replace the placeholder at `index` with the real tab widget."""
+        if getattr(self, "_restoring", False) or index < 0:
+            return
+        ph = tw.widget(index)
+        if not isinstance(ph, TabPlaceholder):
+            return
+        self._restoring = True  # insert/remove below re-emit currentChanged
+        try:
+            st = ph.state
+            # reuse the encoding from the session if the file is unchanged
+            fresh = file_stat(ph.file_path) == (st.get("mtime"), st.get("size"))
+            try:
+                widget = self._build_tab(ph.file_path, st.get("encoding") if fresh else None)
+            except OSError as e:
+                # deleted or unreadable since the session was saved; keep the placeholder
+                self.open_failed.emit(ph.file_path, e.strerror or str(e))
+                return None
+            if isinstance(widget, QPlainTextEdit):
+                widget.document().setModified(False)
+            tw.insertTab(index, widget, tw.tabText(index))
+            tw.removeTab(index + 1)
+            tw.setCurrentIndex(index)
+            self.apply_tab_state(widget, st)
+            ph.deleteLater()
+        finally:
+            self._restoring = False
+        self.tab_hydrated.emit(widget, ph)
+        self.file_opened.emit(widget)
+        return widget
+
+    def _add_tab(self, widget, title):
+        idx = self.tabs.addTab(widget, title)
+        self.tabs.setCurrentIndex(idx)
+        self.files_changed.emit()
+        return idx
+
+    def all_widgets(self):
+        """Yield every tab widget in the primary and the split pane."""
+        for tw in (self.tabs, self.secondary_tabs):
+            if tw is None:
+                continue
+            for i in range(tw.count()):
+                yield tw.widget(i)
+
+    def open_file(self, path):
+        """Focus the tab already showing `path` (building it if restored), else open it.
+        Returns the tab's editor, or its widget when it has none."""
+        target = os.path.abspath(path)
+        for tw in (self.tabs, self.secondary_tabs):
+            if tw is None:
+                continue
+            for i in range(tw.count()):
+                p = getattr(tw.widget(i), "file_path", None)
+                if p and os.path.abspath(p) == target:
+                    tw.setCurrentIndex(i)
+                    self._hydrate(tw, i)
+                    w = tw.widget(i)
+                    w.setFocus()
+                    return w.editor if hasattr(w, "editor") else w
+        w = self.new_tab(path)
+        return w.editor if hasattr(w, "editor") else w
+
+    def text_editors(self, path=None):
+        """Yield the CodeEditor of every tab (optionally only those on `path`)."""
+        for w in self.all_widgets():
+            ed = w.editor if hasattr(w, "editor") else w
+            if not isinstance(ed, QPlainTextEdit):
+                continue
+            if path is None or getattr(ed, "file_path", None) == path:
+                yield ed
+
+    def retarget_paths(self, moved):
+        """Update file_path (and tab titles) of tabs whose files were moved."""
+        def new_path_for(path):
+            for old, new in moved.items():
+                if path == old:
+                    return new
+                if path.startswith(old + os.sep):
+                    return new + path[len(old):]
+            return None
+
+        for tw in (self.tabs, self.secondary_tabs):
+            if tw is None:
+                continue
+            for i in range(tw.count()):
+                w = tw.widget(i)
+                path = getattr(w, "file_path", None)
+                new = new_path_for(os.path.abspath(path)) if path else None
+                if not new:
+                    continue
+                w.file_path = new
+                if hasattr(w, "editor"):
+                    w.editor.file_path = new
+                if isinstance(w, TabPlaceholder):
+                    w.state["path"] = new   # tab_state() saves this dict as is
+                dot = " ●" if tw.tabText(i).endswith(" ●") else ""
+                tw.setTabText(i, os.path.basename(new) + dot)
+        self.files_changed.emit()
+
+    def open_paths(self):
+        return {getattr(w, "file_path", None) for w in self.all_widgets()} - {None}
+
+    @tracer.traced("markdown render", "preview")
     def update_markdown_preview(self, editor, preview):
-        source_md = editor.toPlainText()
-        html = markdown.markdown(source_md)
-        preview.setHtml(html)
+        source_md = editor.snapshot().text()
+        preview.sync.set_html(render_markdown(source_md))
 
     def _mark_unsaved(self, ed, modified):
         """Add or remove the white-dot indicator in the tab text."""
@@ -972,49 +1378,121 @@ class EditorArea(QWidget):
             if text.endswith(dot):
                 self.tabs.setTabText(idx, text[:-len(dot)])
 
+    def hibernate(self, tw, index):
+        """Swap a built tab back to a placeholder holding its state; it is
+        rebuilt by _hydrate when shown again. Returns the placeholder."""
+        w = tw.widget(index)
+        st = self.tab_state(w)
+        if st is None or isinstance(w, TabPlaceholder):
+            return None
+        ph = TabPlaceholder(st["path"], st, hibernated=True)
+        slot = getattr(w, "preview_slot", None)
+        if slot is not None:
+            self.preview_pool.release(slot)
+        self._restoring = True  # the index shuffle below re-emits currentChanged
+        try:
+            current = tw.currentIndex()
+            tw.insertTab(index, ph, tw.tabText(index))
+            tw.removeTab(index + 1)
+            tw.setCurrentIndex(current)
+        finally:
+            self._restoring = False
+        self._dispose(w)
+        return ph
+
+    def _dispose(self, w):
+        """Delete a tab widget, first taking it out of shared indexes (completion tokens…)."""
+        ed = w.editor if hasattr(w, "editor") else w
+        if hasattr(ed, "detach"):
+            ed.detach()
+        w.deleteLater()
+
+    def dispose_all(self, tw):
+        """Dispose of every widget of the tab widget `tw` (which is then empty)."""
+        while tw.count():
+            w = tw.widget(0)
+            slot = getattr(w, "preview_slot", None)
+            if slot is not None:
+                self.preview_pool.release(slot)
+            tw.removeTab(0)
+            self._dispose(w)
+
+    def _close_tab(self, tw, index):
+        """Remove a tab and free what it holds (pooled preview view, the widget)."""
+        w = tw.widget(index)
+        slot = getattr(w, "preview_slot", None)
+        if slot is not None:
+            # before removeTab, so the tab shown next can take the freed view
+            self.preview_pool.release(slot)
+        tw.removeTab(index)
+        if w is not None:
+            self._dispose(w)
+
     def close_primary_tab(self, index):
-        self.tabs.removeTab(index)
+        self._close_tab(self.tabs, index)
+        self.files_changed.emit()
         # if you want to automatically collapse the split when both are gone:
         if self.tabs.count() == 0 and self.secondary_tabs:
+            self.dispose_all(self.secondary_tabs)
             self.splitter.widget(1).deleteLater()
             self.secondary_tabs = None
 
     def close_secondary_tab(self, index):
         if not self.secondary_tabs:
             return
-        self.secondary_tabs.removeTab(index)
+        self._close_tab(self.secondary_tabs, index)
         if self.secondary_tabs.count() == 0:
             self.splitter.widget(1).deleteLater()
             self.secondary_tabs = None
+        self.files_changed.emit()
 
-    def split_current(self):
-        ed = self.current_editor()
-        if not ed:
-            return
-        # first-time: create the secondary QTabWidget
+    def ensure_secondary(self):
+        """Create the split pane's QTabWidget on first use."""
         if not self.secondary_tabs:
             self.secondary_tabs = QTabWidget()
             self.secondary_tabs.setTabsClosable(True)
             self.secondary_tabs.tabCloseRequested.connect(self.close_secondary_tab)
+            self.secondary_tabs.currentChanged.connect(self._on_current_changed)
             self.splitter.addWidget(self.secondary_tabs)
+        return self.secondary_tabs
+
+    def split_current(self):
+        w = self.current_editor()
+        ed = w.editor if hasattr(w, "editor") else w
+        # only text editors can be cloned (not CSV grids, images, placeholders)
+        if not isinstance(ed, QPlainTextEdit) or not hasattr(ed, "snapshot"):
+            return
+        self.ensure_secondary()
 
         # clone the editor into the split pane
         ed2 = CodeEditor()
         ed2.file_path = ed.file_path
-        ed2.setPlainText(ed.toPlainText())
+        ed2.encoding = getattr(ed, "encoding", "utf-8")
+        ed2.disk_stat = getattr(ed, "disk_stat", None)
+        ed2.setPlainText(ed.snapshot().text())
         ed2.document().setModified(ed.document().isModified())
         # copy your signals if you need them (bracket‐match, etc.)
         idx = self.secondary_tabs.addTab(ed2, self.tabs.tabText(self.tabs.currentIndex()))
         self.secondary_tabs.setCurrentIndex(idx)
+        self.files_changed.emit()
 
     def current_editor(self):
         return self.tabs.currentWidget()
 
 class ProjectSidebar(QWidget):
+    # old path -> new path for every file/folder moved by a finished batch
+    paths_moved = pyqtSignal(dict)
+
     def __init__(self, root):
         super().__init__()
         self.root = root
 
+        # moves/copies/deletes run in a worker, one transaction per batch
+        self.ops = FileOpQueue(self)
+        self.ops.progress.connect(self._on_op_progress)
+        self.ops.busy_changed.connect(self._on_ops_busy)
+        self.ops.batch_done.connect(self._on_batch_done)
+
         # ── Toolbar ─────────────────────────────────────────────────────────
         tb = QHBoxLayout()
         new_file_btn = QPushButton()
@@ -1032,18 +1510,17 @@ class ProjectSidebar(QWidget):
 
         # ── File Tree ───────────────────────────────────────────────────────
         self.tree = QTreeView()
-        self.model = QFileSystemModel()
-        self.model.setReadOnly(False)
-        self.model.setRootPath(self.root)
+        # lazy, filtered model: directories are listed in a worker on expand
+        self.model = ProjectTreeModel(self)
+        self.model.set_root(self.root)
+        self.model.paths_dropped.connect(self.drop_paths)
         self.tree.setModel(self.model)
-        self.tree.hideColumn(1)
-        self.tree.hideColumn(2)
-        self.tree.hideColumn(3)
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
 
         # make the “Name” column take up all available space
         hdr = self.tree.header()
         hdr.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.tree.setRootIndex(self.model.index(self.root))
 
         # enable drag & drop
         self.tree.setDragEnabled(True)
@@ -1060,11 +1537,24 @@ class ProjectSidebar(QWidget):
         self.tree.customContextMenuRequested.connect(self.on_context_menu)
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
 
+        # ── File operation progress (hidden while idle) ────────────────────
+        self.op_bar = QWidget()
+        ob = QHBoxLayout(self.op_bar)
+        ob.setContentsMargins(0, 0, 0, 0)
+        self.op_progress = QProgressBar()
+        self.op_progress.setTextVisible(True)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.ops.cancel)
+        ob.addWidget(self.op_progress)
+        ob.addWidget(cancel_btn)
+        self.op_bar.hide()
+
         # ── Layout ──────────────────────────────────────────────────────────
         lay = QVBoxLayout(self)
         lay.setContentsMargins(0,0,0,0)
         lay.addLayout(tb)
         lay.addWidget(self.tree)
+        lay.addWidget(self.op_bar)
 
     def open_file(self, idx):
         path = self.model.filePath(idx)
@@ -1099,18 +1589,14 @@ class ProjectSidebar(QWidget):
             new_path = os.path.join(base_path, f"{name}_{i}")
             i += 1
 
-        try:
-            if is_folder:
-                os.makedirs(new_path)
-            else:
-                with open(new_path, 'x', encoding='utf-8'):
-                    pass
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not create item:\n{e}")
-            return
+        op = FileOp("mkdir" if is_folder else "touch", dst=new_path)
+        self.ops.enqueue([op], f"Create {os.path.basename(new_path)}",
+                         lambda result: self._start_inline_rename(result, new_path))
 
-        self.refresh()
-        idx = self.model.index(new_path)
+    def _start_inline_rename(self, result, new_path):
+        if not result.ok:
+            return
+        idx = self.model.index_for_path(new_path)
         if idx.isValid():
             self.tree.scrollTo(idx)
             self.tree.setCurrentIndex(idx)
@@ -1128,7 +1614,7 @@ class ProjectSidebar(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not rename:\n{e}")
             return
-        self.refresh()
+        self.model.rename_path(old_path, new_path)
 
     def delete_item(self, path: str, is_dir: bool):
         resp = QMessageBox.question(
@@ -1138,20 +1624,21 @@ class ProjectSidebar(QWidget):
         )
         if resp != QMessageBox.StandardButton.Yes:
             return
-        try:
-            if is_dir:
-                shutil.rmtree(path)
-            else:
-                os.remove(path)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not delete:\n{e}")
-            return
-        self.refresh()
+        self.ops.enqueue([FileOp("delete", src=path)], f"Delete {os.path.basename(path)}")
+
+    def set_root(self, root):
+        """Point the tree at a new project root."""
+        self.root = root
+        self.model.set_root(root)
 
     def refresh(self):
-        # refresh entire tree
-        self.model.setRootPath(self.root)
-        self.tree.setRootIndex(self.model.index(self.root))
+        # only re-root if it changed; everything else arrives as row updates
+        if self.model.rootPath() != os.path.abspath(self.root):
+            self.model.set_root(self.root)
+
+    def on_fs_changes(self, changes):
+        """Apply a ProjectWatcher ChangeSet as targeted row inserts/removes."""
+        self.model.apply_changes(changes)
 
     def dragMoveEvent(self, event):
         event.accept()  # allow moving anywhere
@@ -1164,13 +1651,23 @@ class ProjectSidebar(QWidget):
             return
 
         # find drop target
-        pos = event.position().toPoint()
+        pos = self.tree.viewport().mapFrom(self, event.position().toPoint())
         idx = self.tree.indexAt(pos)
-        if idx.isValid() and self.model.isDir(idx):
-            dest_dir = self.model.filePath(idx)
-        elif idx.isValid() and not self.model.isDir(idx):
+        if idx.isValid():
+            self.drop_paths(src_paths, self.model.filePath(idx))
+        else:
+            # dropped onto blank area → project root
+            self.drop_paths(src_paths, self.root)
+        event.accept()
+
+    def drop_paths(self, src_paths, target):
+        """Move `src_paths` into `target` (a folder, or a file to group with)."""
+        ops = []
+        if os.path.isdir(target):
+            dest_dir = target
+        else:
             # dropped onto a file: make a new folder alongside it
-            target_file = self.model.filePath(idx)
+            target_file = target
             base = os.path.dirname(target_file)
             folder_name, ok = QInputDialog.getText(
                 self, "New Folder", "Folder name for grouped files:"
@@ -1178,26 +1675,46 @@ class ProjectSidebar(QWidget):
             if not ok or not folder_name:
                 return
             dest_dir = os.path.join(base, folder_name)
-            try:
-                os.makedirs(dest_dir, exist_ok=False)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not create folder:\n{e}")
-                return
             # move the target file in
-            shutil.move(target_file, os.path.join(dest_dir, os.path.basename(target_file)))
-        else:
-            # dropped onto blank area → project root
-            dest_dir = self.root
+            ops.append(FileOp("mkdir", dst=dest_dir))
+            ops.append(FileOp("move", target_file, os.path.join(dest_dir, os.path.basename(target_file))))
 
         # move all sources
         for src in src_paths:
-            try:
-                shutil.move(src, os.path.join(dest_dir, os.path.basename(src)))
-            except Exception as e:
-                QMessageBox.warning(self, "Warning", f"Could not move {src}:\n{e}")
-
-        self.refresh()
-        event.accept()
+            dest = os.path.join(dest_dir, os.path.basename(src))
+            if os.path.abspath(src) in (os.path.abspath(dest), os.path.abspath(dest_dir)):
+                continue
+            if os.path.abspath(src) == os.path.abspath(target):
+                continue  # the grouped file is already queued
+            ops.append(FileOp("move", src, dest))
+        n = len([op for op in ops if op.kind == "move"])
+        self.ops.enqueue(ops, f"Move {n} item{'s' if n != 1 else ''}")
+
+    # ── file operation queue callbacks ───────────────────────────────────
+    def _on_ops_busy(self, busy):
+        self.op_bar.setVisible(busy)
+        if busy:
+            self.op_progress.setRange(0, 0)  # indeterminate until first step
+
+    def _on_op_progress(self, done, total, label):
+        self.op_progress.setRange(0, max(1, total))
+        self.op_progress.setValue(done)
+        self.op_progress.setFormat(f"{label} — %v/%m")
+
+    def _on_batch_done(self, result):
+        # one batched tree update per transaction
+        for old, new in result.moved.items():
+            self.model.rename_path(old, new)
+        for path in result.deleted:
+            self.model.remove_path(path)
+        for path in result.created:
+            self.model.add_path(path)
+        if result.moved:
+            self.paths_moved.emit(dict(result.moved))
+        if result.errors:
+            details = "\n".join(f"{p}: {msg}" for p, msg in result.errors)
+            QMessageBox.warning(self, "File Operation Failed",
+                                f"{result.label} was rolled back:\n{details}")
 
 # ────── Find & Replace Dock ──────────────────────────────────────────────────
 class SearchDock(QDockWidget):
@@ -1208,7 +1725,6 @@ class SearchDock(QDockWidget):
         # State for replace iteration
         self.matches = []           # list of (file, line, start, length)
         self.current_index = 0
-        self.last_tab = None
 
         # — UI Setup —
         w = QWidget(); lay = QVBoxLayout(w)
@@ -1232,9 +1748,11 @@ class SearchDock(QDockWidget):
         self.use_regex      = QCheckBox("Regex")
         self.case_sensitive = QCheckBox("Case-sensitive")
         self.whole_word     = QCheckBox("Whole word")
+        self.open_only      = QCheckBox("Open files only")
         opts.addWidget(self.use_regex)
         opts.addWidget(self.case_sensitive)
         opts.addWidget(self.whole_word)
+        opts.addWidget(self.open_only)
         lay.addLayout(opts)
 
         # 4) File filters
@@ -1269,60 +1787,70 @@ class SearchDock(QDockWidget):
             self._build_match_list()
 
     def _build_match_list(self):
-        """Turn each QListWidgetItem into a precise (file,line,start,len) tuple."""
-        pat = self.find.text()
-        flags = 0 if self.case_sensitive.isChecked() else re.IGNORECASE
-        if not self.use_regex.isChecked():
-            pat = re.escape(pat)
-        if self.whole_word.isChecked():
-            pat = r'\b' + pat + r'\b'
-        regex = re.compile(pat, flags)
-
+        """Turn each result's match spans into precise (file,line,start,len) tuples."""
         self.matches = []
         for idx in range(self.results.count()):
-            it = self.results.item(idx)
-            file, line = it.data
-            # get the exact text of that line
-            with open(file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            text = lines[line-1]
-            m = regex.search(text)
-            if m:
-                self.matches.append((file, line, m.start(), m.end() - m.start()))
-
-    def start_search(self):
-        self.results.clear()
-        self.matches = []
-        self.current_index = 0
+            file, line, spans = self.results.item(idx).data
+            for start, length in spans:
+                self.matches.append((file, line, start, length))
 
-        opts = {
+    def _options(self):
+        return {
             'regex':   self.use_regex.isChecked(),
             'case':    self.case_sensitive.isChecked(),
             'whole':   self.whole_word.isChecked(),
+            'open_only': self.open_only.isChecked(),
             'include': [e.strip() for e in self.include_ext.text().split(',') if e.strip()],
             'exclude': [e.strip() for e in self.exclude_ext.text().split(',') if e.strip()],
         }
+
+    def start_search(self):
+        self.results.clear()
+        self.matches = []
+        self.current_index = 0
+
+        opts = self._options()
         root = self.parent.project_dir
         pattern = self.find.text().strip()
         if not pattern:
             return
 
-        self.worker = SearchWorker(root, pattern, opts)
+        watcher = self.parent.watcher
+        files = list(watcher.files()) if watcher.is_ready() and watcher.root == os.path.abspath(root) else None
+        # open buffers are searched from memory (snapshots are O(1) to take)
+        overlays = {}
+        for ed in self.parent.editor_area.text_editors():
+            path = getattr(ed, "file_path", None)
+            if path and os.path.abspath(path) not in overlays:
+                overlays[os.path.abspath(path)] = ed.snapshot()
+        self.worker = SearchWorker(root, pattern, opts, files, overlays)
         self.worker.result_found.connect(self.add_result)
+        self.worker.finished.connect(
+            lambda w=self.worker: self._search_done(w, root, pattern)
+        )
         self.worker.start()
 
-    def add_result(self, file, line, snippet):
+    def _search_done(self, worker, root, pattern):
+        if worker is not self.worker:
+            return  # superseded by a newer search
+        if self.parent.bus.wants(SearchFinished):
+            results = [self.results.item(i).data for i in range(self.results.count())]
+            self.parent.bus.publish(SearchFinished(root, pattern, results))
+
+    def add_result(self, file, line, snippet, spans):
         item = QListWidgetItem(f"{os.path.relpath(file)}:{line}: {snippet}")
-        item.data = (file, line)
+        item.data = (file, line, spans)
         self.results.addItem(item)
 
     def open_result(self, item):
         # behaves like a normal “click result” during search mode
-        file, line = item.data
-        ed = self.parent.editor_area.new_tab(file)
+        file, line, spans = item.data
+        ed = self.parent.editor_area.open_file(file)
+        if not isinstance(ed, QPlainTextEdit):
+            return
         tc = ed.textCursor()
-        block = ed.document().findBlockByLineNumber(line-1)
-        tc.setPosition(block.position())
+        block = ed.document().findBlockByNumber(line-1)
+        tc.setPosition(block.position() + utf16_len(block.text()[:spans[0][0]]))
         ed.setTextCursor(tc)
 
     def replace_next(self):
@@ -1330,36 +1858,38 @@ class SearchDock(QDockWidget):
             return  # nothing to do
 
         file, line, start, length = self.matches[self.current_index]
-
-        # 1) close previous tab
-        if self.last_tab is not None:
-            self.parent.editor_area.tabs.removeTab(self.last_tab)
-            self.last_tab = None
-
-        # 2) open this file
-        ed = self.parent.editor_area.new_tab(file)
-        self.last_tab = self.parent.editor_area.tabs.currentIndex()
-
-        # 3) move cursor & select
-        tc = ed.textCursor()
-        block = ed.document().findBlockByLineNumber(line-1)
-        tc.setPosition(block.position() + start)
-        tc.movePosition(QTextCursor.MoveOperation.Right,
-                        QTextCursor.MoveMode.KeepAnchor,
-                        length)
-        ed.setTextCursor(tc)
-
-        # 4) perform replacement
-        tc.insertText(self.rep.text())
-
-        # 5) save file immediately
-        mw = self.parent
-        mw.editor_area.tabs.setCurrentIndex(self.last_tab)
-        mw.save_file()
-
         self.current_index += 1
 
-        # 6) if done, turn off replace mode
+        # 1) use the tab already open on this file (or open one)
+        ed = self.parent.editor_area.open_file(file)
+        if isinstance(ed, QPlainTextEdit):
+            # 2) re-check the match against what the buffer holds now
+            block = ed.document().findBlockByNumber(line-1)
+            text = block.text()
+            m = compile_search(self.find.text().strip(), self._options()).search(text, start) if block.isValid() else None
+            if m is not None:
+                was_clean = not ed.document().isModified()
+                tc = ed.textCursor()
+                tc.setPosition(block.position() + utf16_len(text[:m.start()]))
+                tc.setPosition(block.position() + utf16_len(text[:m.end()]), QTextCursor.MoveMode.KeepAnchor)
+                ed.setTextCursor(tc)
+
+                # 3) perform replacement
+                replacement = self.rep.text()
+                tc.insertText(replacement)
+
+                # later matches on this line moved by the length difference
+                delta = len(replacement) - (m.end() - m.start())
+                for k in range(self.current_index, len(self.matches)):
+                    f2, l2, s2, n2 = self.matches[k]
+                    if f2 == file and l2 == line and s2 >= m.end():
+                        self.matches[k] = (f2, l2, s2 + delta, n2)
+
+                # 4) save right away, unless the buffer had other unsaved edits
+                if was_clean:
+                    self.parent.save_editor(ed)
+
+        # 5) if done, turn off replace mode
         if self.current_index >= len(self.matches):
             QMessageBox.information(self, "Done", "All replacements complete.")
             self.replace_mode.setChecked(False)
@@ -1381,8 +1911,9 @@ class GitDock(QDockWidget):
         lay.addWidget(btn)
 
         self.setWidget(w)
-        self.refresh()
+        # the first refresh is run by MainWindow once the window has painted
 
+    @tracer.traced("git status", "git")
     def refresh(self):
         self.lst.clear()
         try:
@@ -1425,22 +1956,32 @@ class TerminalDock(QDockWidget):
         w = QWidget()
         lay = QVBoxLayout(w)
 
-        self.output = QPlainTextEdit()
-        self.output.setReadOnly(True)
+        # output is a bounded ring buffer, see scrollback.py
+        self.output = ScrollbackView(get_setting("terminal_scrollback_lines", 10000))
         self.input = QLineEdit()
         self.input.setPlaceholderText("Enter command and press Enter")
         self.input.returnPressed.connect(self.run_command)
 
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find in output…")
+        self.find_input.returnPressed.connect(lambda: self.output.find(self.find_input.text()))
+        back = QShortcut(QKeySequence("Shift+Return"), self.find_input)
+        # only while the find box has focus, not window-wide
+        back.setContext(Qt.ShortcutContext.WidgetShortcut)
+        back.activated.connect(lambda: self.output.find(self.find_input.text(), backwards=True))
+
+        lay.addWidget(self.find_input)
         lay.addWidget(self.output)
         lay.addWidget(self.input)
         self.setWidget(w)
 
+    @tracer.traced("terminal command", "terminal")
     def run_command(self):
         cmd = self.input.text().strip()
         if not cmd:
             return
         # echo prompt
-        self.output.appendPlainText(f"$ {cmd}")
+        self.output.append_text(f"$ {cmd}")
         try:
             proc = subprocess.Popen(
                 cmd, shell=True,
@@ -1449,15 +1990,17 @@ class TerminalDock(QDockWidget):
                 text=True
             )
             out, _ = proc.communicate()
-            self.output.appendPlainText(out)
+            self.output.append_text(out)
         except Exception as e:
-            self.output.appendPlainText(f"Error running command: {e}")
+            self.output.append_text(f"Error running command: {e}")
         self.input.clear()
         # scroll to bottom
-        sb = self.output.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        self.output.scroll_to_bottom()
 
 # ────── Main Window ──────────────────────────────────────────────────────────
+DEFAULT_DOCKS = ("search", "git", "terminal")  # "perf" is opt-in
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -1502,24 +2045,54 @@ class MainWindow(QMainWindow):
         proj_dock.setWidget(self.project_sidebar)
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, proj_dock)
 
-        self.search_dock = SearchDock(self)
-        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.search_dock)
-
-        self.git_dock  = GitDock(self, self.project_dir)
-        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.git_dock)
-
-        self.term_dock = TerminalDock(self)
-        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.term_dock)
+        # the other docks are built on first show (see ensure_dock)
+        self.search_dock = self.git_dock = self.term_dock = self.perf_dock = self.memory_dock = None
+        # drops hidden, clean tabs back to placeholders (see tab_memory.py)
+        self.hibernator = TabHibernator(self.editor_area, self)
+        self._dock_specs = {
+            "search":   ("search_dock", lambda: SearchDock(self), Qt.DockWidgetArea.RightDockWidgetArea),
+            "git":      ("git_dock", lambda: GitDock(self, self.project_dir), Qt.DockWidgetArea.RightDockWidgetArea),
+            "terminal": ("term_dock", lambda: TerminalDock(self), Qt.DockWidgetArea.BottomDockWidgetArea),
+            "perf":     ("perf_dock", lambda: PerfDock(self), Qt.DockWidgetArea.BottomDockWidgetArea),
+            "memory":   ("memory_dock", lambda: TabMemoryDock(self.hibernator, self), Qt.DockWidgetArea.RightDockWidgetArea),
+        }
+        self._dock_actions = {}
+        self._startup_docks = list(DEFAULT_DOCKS)
+        self._started = False
 
         # ─── hook tab changes for welcome/editor switch ────────────────────
         tabs = self.editor_area.tabs
         tabs.currentChanged.connect(lambda i: self.central_stack.setCurrentIndex(1))
         tabs.tabCloseRequested.connect(lambda _: QTimer.singleShot(0, self._check_tabs))
 
-        # ─── load plugins, but skip initial new_tab ────────────────────────
-        self.plugins = load_plugins(self)
+        # ─── filesystem watcher: one per project, shared by everyone ───────
+        self.watcher = ProjectWatcher(self)
+        self.watcher.set_root(self.project_dir)
+        self.editor_area.files_changed.connect(self._sync_watched_files)
+        self.editor_area.files_changed.connect(
+            lambda: self.plugin_host.retain(self.editor_area.open_paths()))
+
+        # ─── plugins: manifests are read after the first paint, and each
+        #     plugin is imported on its first activation event ─────────────
+        self.bus = EventBus(self)
+        # RUN_IN = "host" plugins live in a separate process (plugin_host.py)
+        self.plugin_host = PluginHost(self.bus, self._host_documents, self)
+        self.plugin_host.message.connect(self._on_host_message)
+        self.plugin_manager = PluginManager(self, self.bus, host=self.plugin_host)
+        self.bus.throttled.connect(lambda name: self.statusBar().showMessage(
+            f"Plugin '{name}' keeps blocking the editor; its events are now batched", 8000))
+        self.editor_area.file_opened.connect(self._on_file_opened)
+        self.editor_area.open_failed.connect(lambda path, error: self.statusBar().showMessage(
+            f"Could not open {os.path.basename(path)}: {error}", 8000))
         # no self.editor_area.new_tab() here
 
+        # ─── language servers: one per language, started by its first file ─
+        self.lsp = LspManager(self.project_dir, self)
+        self.lsp.message.connect(lambda text: self.statusBar().showMessage(text, 8000))
+        self.lsp.location.connect(self.goto_location)
+        self.editor_area.files_changed.connect(
+            lambda: self.lsp.retain(self.editor_area.open_paths()))
+
         # ─── File menu: Save, Open Folder … ──────────────────────────────
         file_menu = self.menuBar().addMenu("&File")
         save_act = QAction("&Save", self)
@@ -1546,12 +2119,49 @@ class MainWindow(QMainWindow):
         toggle_theme_act.triggered.connect(self.toggle_theme)
         view_menu.addAction(toggle_theme_act)
 
+        view_menu.addSeparator()
+        for label, keys, name in (("&Fold All", "Ctrl+Alt+[", "fold_all"),
+                                  ("&Unfold All", "Ctrl+Alt+]", "unfold_all")):
+            act = QAction(label, self)
+            act.setShortcut(keys)
+            act.triggered.connect(lambda _=False, name=name: self.fold_current(name))
+            view_menu.addAction(act)
+
+        view_menu.addSeparator()
+        for name, label in (("search", "&Search"), ("git", "&Git Status"), ("terminal", "Ter&minal"),
+                            ("perf", "&Performance"), ("memory", "Tab &Memory")):
+            act = QAction(label, self)
+            act.setCheckable(True)
+            act.toggled.connect(lambda on, name=name: self.show_dock(name, on))
+            view_menu.addAction(act)
+            self._dock_actions[name] = act
+
+        # ─── Plugins menu: plugin commands are added once manifests are read ─
+        self.plugins_menu = self.menuBar().addMenu("&Plugins")
+        timings_act = QAction("Plugin &Timings…", self)
+        timings_act.triggered.connect(
+            lambda: QMessageBox.information(self, "Plugin Timings", self.bus.report()))
+        self.plugins_menu.addAction(timings_act)
+
         # … inside MainWindow.__init__(), after you set up project_dir …
         self.quick_open = QuickOpenDialog(
             open_callback=lambda path: self.editor_area.new_tab(path),
             parent=self
         )
         QShortcut(QKeySequence("Ctrl+P"), self).activated.connect(self.quick_open.show)
+        self.watcher.changed.connect(self.quick_open.on_fs_changes)
+        self.watcher.changed.connect(self.on_fs_changes)
+        self.watcher.changed.connect(self.project_sidebar.on_fs_changes)
+        self.project_sidebar.paths_moved.connect(self.editor_area.retarget_paths)
+
+        # ─── project symbols: parsed in the background, fed by the watcher ─
+        # (Ctrl+T would be the usual binding, but it is Toggle Theme here)
+        self.symbols = SymbolIndex(self.watcher, self)
+        self.goto_symbol_dialog = GoToSymbolDialog(self.symbols, self.goto_location, self)
+        QShortcut(QKeySequence("Ctrl+Shift+O"), self).activated.connect(self.goto_symbol_dialog.show)
+        QShortcut(QKeySequence("F12"), self).activated.connect(self.goto_definition)
+        # project names also feed completion
+        self.symbols.names_changed.connect(TokenIndex.shared().apply_project)
 
 
         # ─── Session state paths ──────────────────────────────────────────
@@ -1561,8 +2171,105 @@ class MainWindow(QMainWindow):
         )
         os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
 
+        # ─── autosave / swap files, background saves ─────────────────────
+        self.autosave = AutosaveManager(self.editor_area, self)
+        self.saver = SavePipeline(self)
+        self.saver.saved.connect(self._on_saved)
+
         # ─── Now restore last session ────────────────────────────────────
         self.load_state()
+        self.session = session.SessionStore(self.state_path, self.collect_state, self)
+        self.editor_area.files_changed.connect(self.session.schedule)
+        self.editor_area.tabs.currentChanged.connect(self.session.schedule)
+        for name in self._startup_docks:
+            if name in self._dock_actions:
+                self._dock_actions[name].setChecked(True)
+        QTimer.singleShot(0, self.recover_swaps)
+        startup_profile.mark("main window built")
+
+    # ─── docks & deferred startup ────────────────────────────────────────
+    def ensure_dock(self, name):
+        """Return the dock called `name`, building it on first use."""
+        attr, factory, area = self._dock_specs[name]
+        dock = getattr(self, attr)
+        if dock is None:
+            dock = factory()
+            setattr(self, attr, dock)
+            self.addDockWidget(area, dock)
+            # keep the View menu in step when the dock's own close button is used
+            dock.toggleViewAction().toggled.connect(self._dock_actions[name].setChecked)
+            dock.toggleViewAction().toggled.connect(lambda _: self.session.schedule())
+            if name == "git" and self._started:
+                dock.refresh()
+        return dock
+
+    def show_dock(self, name, visible):
+        if not visible and getattr(self, self._dock_specs[name][0]) is None:
+            return
+        self.ensure_dock(name).setVisible(visible)
+
+    def visible_docks(self):
+        return [n for n, (attr, _, _) in self._dock_specs.items()
+                if getattr(self, attr) is not None and not getattr(self, attr).isHidden()]
+
+    def paintEvent(self, ev):
+        super().paintEvent(ev)
+        if not self._started:
+            self._started = True
+            startup_profile.mark("first paint")
+            # let this paint reach the screen before doing the slow parts
+            QTimer.singleShot(0, self._after_first_paint)
+
+    def _after_first_paint(self):
+        if self.git_dock is not None:
+            self.git_dock.refresh()
+        startup_profile.mark("git status")
+        self.plugin_manager.start()
+        commands = self.plugin_manager.commands()
+        if commands:
+            self.plugins_menu.addSeparator()
+        for cmd, title in commands:
+            act = QAction(title, self)
+            act.triggered.connect(lambda _=False, cmd=cmd: self.plugin_manager.run_command(cmd))
+            self.plugins_menu.addAction(act)
+        # files restored before the plugins were read still count as opened
+        for ed in self.editor_area.text_editors():
+            path = getattr(ed, "file_path", None)
+            self.bus.publish(FileOpened(path, language_for(path)))
+        startup_profile.mark(f"plugins ({len(self.plugins)})")
+        startup_profile.finish()
+
+    @property
+    def plugins(self):
+        """Plugin instances activated so far."""
+        return self.plugin_manager.plugins()
+
+    def _on_file_opened(self, widget):
+        ed = widget.editor if hasattr(widget, "editor") else widget
+        path = getattr(ed, "file_path", None)
+        if isinstance(ed, QPlainTextEdit):
+            ed.document().contentsChange.connect(
+                lambda pos, removed, added, ed=ed: self._publish_edit(ed, pos, removed, added))
+            self.lsp.open(ed)
+        if self.plugin_manager.started:
+            self.bus.publish(FileOpened(path, language_for(path)))
+
+    def _publish_edit(self, ed, pos, removed, added):
+        # on every keystroke: build nothing unless a plugin listens
+        if (removed or added) and self.bus.wants(TextChanged):
+            self.bus.publish(TextChanged(getattr(ed, "file_path", None), pos, removed, added,
+                                         ed.snapshot, id(ed.document())))
+
+    def _host_documents(self):
+        for ed in self.editor_area.text_editors():
+            path = getattr(ed, "file_path", None)
+            if path:
+                yield path, language_for(path), ed.snapshot(), id(ed.document())
+
+    def _on_host_message(self, msg):
+        if msg.get("type") in ("status", "error"):
+            text = msg.get("text", "").strip().splitlines()
+            self.statusBar().showMessage(f"{msg.get('plugin')}: {text[-1] if text else ''}", 5000)
 
     def apply_theme(self):
         if self.dark_mode_enabled:
@@ -1575,32 +2282,37 @@ class MainWindow(QMainWindow):
         self.apply_theme()
 
     def load_state(self):
-        """Restore last project folder, open tabs, and window geometry."""
-        try:
-            with open(self.state_path, 'r', encoding='utf-8') as f:
-                state = json.load(f)
-        except Exception:
+        """Restore last project folder, tabs (with cursor/scroll), split and window geometry."""
+        state = session.load_state(self.state_path)
+        if not state:
             return  # nothing to restore
 
         proj = state.get("project_dir")
-        tabs = state.get("open_tabs", [])
-        win_size = state.get("window_size")
-        win_pos = state.get("window_pos")
+        window = state.get("window") or {}
+        win_size = window.get("size")
+        win_pos = window.get("pos")
 
         if proj and os.path.isdir(proj):
             # change directory & update UI
             os.chdir(proj)
             self.project_dir = proj
             self.setWindowTitle(f"Nexus Editor 2.0 — {os.path.basename(proj)}")
-            model = self.project_sidebar.model
-            model.setRootPath(proj)
-            self.project_sidebar.tree.setRootIndex(model.index(proj))
-
-        # open each file
-        for path in tabs:
-            # ignore if missing
-            if os.path.isfile(path):
-                self.editor_area.new_tab(path)
+            self.watcher.set_root(proj)
+            self.lsp.set_root(proj)
+            self.project_sidebar.set_root(proj)
+
+        # placeholders only; each tab is read/highlighted when first shown
+        for n, pane in enumerate(state.get("panes", [])[:2]):
+            tabs = [t for t in pane.get("tabs", []) if os.path.isfile(t.get("path", ""))]
+            if not tabs:
+                continue
+            tw = self.editor_area.tabs if n == 0 else self.editor_area.ensure_secondary()
+            self.editor_area.restore_tabs(tabs, pane.get("active", 0), tw)
+        if isinstance(state.get("docks"), list):
+            self._startup_docks = state["docks"]
+        sizes = state.get("split_sizes")
+        if sizes and self.editor_area.secondary_tabs:
+            self.editor_area.splitter.setSizes(sizes)
 
         # restore window size and position if available
         if win_size and isinstance(win_size, list) and len(win_size) == 2:
@@ -1608,36 +2320,35 @@ class MainWindow(QMainWindow):
         if win_pos and isinstance(win_pos, list) and len(win_pos) == 2:
             self.move(win_pos[0], win_pos[1])
 
-    def save_state(self):
-        """Save current project folder + list of open tabs + window size."""
-        tabs = []
-        # primary
-        for i in range(self.editor_area.tabs.count()):
-            ed = self.editor_area.tabs.widget(i)
-            p = getattr(ed, "file_path", None)
-            if p:
-                tabs.append(p)
-        # secondary (if split exists)
-        st = self.editor_area.secondary_tabs
-        if st:
-            for i in range(st.count()):
-                ed = st.widget(i)
-                p = getattr(ed, "file_path", None)
-                if p:
-                    tabs.append(p)
-
-        state = {
+    def collect_state(self):
+        """Current session as a dict (cheap: no document text is copied)."""
+        panes = []
+        for tw in (self.editor_area.tabs, self.editor_area.secondary_tabs):
+            if tw is None:
+                continue
+            tabs, active = [], 0
+            for i in range(tw.count()):
+                st = self.editor_area.tab_state(tw.widget(i))
+                if st:
+                    if i == tw.currentIndex():
+                        active = len(tabs)
+                    tabs.append(st)
+            panes.append({"tabs": tabs, "active": active})
+        return {
+            "version": session.SESSION_VERSION,
             "project_dir": self.project_dir,
-            "open_tabs": tabs,
-            "window_size": [self.size().width(), self.size().height()],
-            "window_pos": [self.pos().x(), self.pos().y()]
+            "panes": panes,
+            "split_sizes": self.editor_area.split_sizes(),
+            "docks": self.visible_docks(),
+            "window": {
+                "size": [self.size().width(), self.size().height()],
+                "pos": [self.pos().x(), self.pos().y()],
+            },
         }
-        try:
-            with open(self.state_path, 'w', encoding='utf-8') as f:
-                json.dump(state, f, indent=2)
-        except Exception as e:
-            print(f"⚠️  Could not save state: {e}")
 
+    def save_state(self):
+        """Write the session now (also written in the background while running)."""
+        self.session.shutdown()
 
     # ────── helper to show welcome if no tabs ─────────────────────────────
     def _check_tabs(self):
@@ -1648,9 +2359,10 @@ class MainWindow(QMainWindow):
     def open_folder(self):
         # ── Clear existing open tabs ─────────────────
         # primary tabs
-        self.editor_area.tabs.clear()
+        self.editor_area.dispose_all(self.editor_area.tabs)
         # secondary split (if exists)
         if self.editor_area.secondary_tabs:
+            self.editor_area.dispose_all(self.editor_area.secondary_tabs)
             self.splitter.widget(1).deleteLater()
             self.editor_area.secondary_tabs = None
         # reset welcome screen if desired
@@ -1667,33 +2379,123 @@ class MainWindow(QMainWindow):
         os.chdir(folder)
         self.project_dir = folder
         self.setWindowTitle(f"Nexus Editor 2.0 — {os.path.basename(folder)}")
+        self.watcher.set_root(folder)
+        self.lsp.set_root(folder)
 
         # Update project tree
-        model = self.project_sidebar.model            # ← no ()
-        model.setRootPath(folder)
-        self.project_sidebar.tree.setRootIndex(
-            model.index(folder)
-        )
+        self.project_sidebar.set_root(folder)
 
         # Update Git dock and refresh
-        self.git_dock.repo = folder
-        self.git_dock.refresh()
+        if self.git_dock is not None:
+            self.git_dock.repo = folder
+            self.git_dock.refresh()
 
 
-    def autosave_all(self):
-        for i in range(self.editor_area.tabs.count()):
-            ed = self.editor_area.tabs.widget(i)
-            fn = self.editor_area.tabs.tabText(i)
-            # ensure .autosave extension
-            autosave_fn = f"{fn}.autosave"
-            path = os.path.join(self.autosave_dir, autosave_fn)
-            try:
-                # write in UTF-8 so you can encode any character
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(ed.toPlainText())
-            except Exception as e:
-                print(f"⚠️  Failed to autosave '{fn}': {e}")
-    
+    def goto_location(self, path, line, column=0):
+        """Open `path` (or focus its tab) with the cursor on `line` (1-based) at `column`."""
+        ed = self.editor_area.open_file(path)
+        if not isinstance(ed, QPlainTextEdit):
+            return
+        block = ed.document().findBlockByNumber(line - 1)
+        if block.isValid():
+            tc = ed.textCursor()
+            tc.setPosition(block.position() + min(column, block.length() - 1))
+            ed.setTextCursor(tc)
+            ed.centerCursor()
+
+    def goto_definition(self):
+        current = self.editor_area.current_editor()
+        ed = current.editor if hasattr(current, "editor") else current
+        if isinstance(ed, QPlainTextEdit):
+            self.lsp.goto_definition(ed)
+
+    def fold_current(self, action):
+        current = self.editor_area.current_editor()
+        ed = current.editor if hasattr(current, "editor") else current
+        if hasattr(ed, "folds"):
+            getattr(ed.folds, action)()
+
+    # ─── Filesystem change handling ──────────────────────────────────────
+    def _sync_watched_files(self):
+        self.watcher.set_watched_files(self.editor_area.open_paths())
+
+    def on_fs_changes(self, changes):
+        """Reload clean editors whose file changed on disk; warn about dirty ones."""
+        for ed in self.editor_area.text_editors():
+            path = getattr(ed, "file_path", None)
+            if not path:
+                continue
+            path = os.path.abspath(path)
+            if path in changes.deleted:
+                self.statusBar().showMessage(f"{os.path.basename(path)} was deleted on disk", 5000)
+            elif path in changes.modified:
+                if self.saver.is_own_write(path):
+                    continue
+                if ed.document().isModified():
+                    self.statusBar().showMessage(
+                        f"{os.path.basename(path)} changed on disk (unsaved edits kept)", 5000)
+                else:
+                    self._reload_from_disk(ed, path)
+        # table tabs (CSV) re-index instead; they have no unsaved state
+        for w in self.editor_area.all_widgets():
+            path = getattr(w, "file_path", None)
+            if hasattr(w, "reload") and path and os.path.abspath(path) in changes.modified:
+                w.reload()
+
+    def _reload_from_disk(self, ed, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except UnicodeDecodeError:
+            with open(path, 'r', encoding='latin-1', errors='replace') as f:
+                content = f.read()
+        except OSError:
+            return
+        ed.disk_stat = file_stat(path)
+        if content == ed.snapshot().text():
+            return
+        tc = ed.textCursor()
+        pos = tc.position()
+        scroll = ed.verticalScrollBar().value()
+        ed.setPlainText(content)
+        ed.document().setModified(False)
+        tc.setPosition(min(pos, len(content)))
+        ed.setTextCursor(tc)
+        ed.verticalScrollBar().setValue(scroll)
+
+    def recover_swaps(self):
+        """Offer to restore buffers that were unsaved when the last session ended."""
+        pending = self.autosave.pending_recoveries()
+        if not pending:
+            return
+        names = "\n".join(p.get("path") or "Untitled" for p in pending)
+        resp = QMessageBox.question(
+            self, "Recover Unsaved Changes",
+            f"Unsaved changes from a previous session were found:\n{names}\n\nRecover them?",
+            QMessageBox.StandardButton.Yes, QMessageBox.StandardButton.No
+        )
+        for p in pending:
+            if resp != QMessageBox.StandardButton.Yes:
+                self.autosave.forget(p)
+                continue
+            path = p.get("path")
+            ed = next(self.editor_area.text_editors(path), None) if path else None
+            if ed is None:
+                w = self.editor_area.new_tab(path if path and os.path.isfile(path) else None)
+                ed = w.editor if hasattr(w, "editor") else w
+            if not isinstance(ed, QPlainTextEdit):
+                self.autosave.forget(p)
+                continue
+            if not path:
+                ed.swap_id = p.get("swap_id")
+            elif not os.path.isfile(path):
+                # file is gone; keep the name so Save recreates it
+                ed.file_path = path
+                idx = self.editor_area.tabs.indexOf(ed)
+                self.editor_area.tabs.setTabText(idx, os.path.basename(path))
+            ed.setPlainText(p.get("text", ""))
+            ed.document().setModified(True)
+
     def save_file(self):
         # 1) Figure out which widget is active, and extract the CodeEditor if needed
         current = self.editor_area.current_editor()
@@ -1702,7 +2504,11 @@ class MainWindow(QMainWindow):
             ed = current.editor
         else:
             ed = current  # normal CodeEditor
+        if not isinstance(ed, QPlainTextEdit):
+            return  # nothing editable (no tab, or an image)
+        self.save_editor(ed)
 
+    def save_editor(self, ed):
         path = getattr(ed, "file_path", None)
         if not path:
             path, _ = QFileDialog.getSaveFileName(
@@ -1713,87 +2519,72 @@ class MainWindow(QMainWindow):
             ed.file_path = path
             idx = self.editor_area.tabs.currentIndex()
             self.editor_area.tabs.setTabText(idx, os.path.basename(path))
+            self.editor_area.files_changed.emit()
 
-        # 2) Now safe to open/write
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(ed.toPlainText())
-        except Exception as e:
-            QMessageBox.critical(self, "Save Error", f"Could not save file:\n{e}")
-            return
-
-        # 3) Clear modified flag on this editor
-        ed.document().setModified(False)
+        # 2) Snapshot the buffer; encoding + atomic write happen in a worker
+        self.saver.save(path, ed.snapshot(), getattr(ed, "encoding", "utf-8"),
+                        editor=ed, revision=ed.edit_revision)
 
-        # 4) Reload any other open tabs on the same path
-        def reload_ed(other):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except:
-                return
+    def _on_saved(self, job):
+        if job.error:
+            QMessageBox.critical(self, "Save Error", f"Could not save file:\n{job.error}")
+            return
+        ed = job.editor
+        try:
+            # 3) Clear modified flag unless the user kept typing meanwhile
+            ed.disk_stat = job.stat
+            if ed.edit_revision == job.revision:
+                ed.document().setModified(False)
+                self.autosave.discard(ed)
+        except RuntimeError:
+            ed = None  # tab was closed while saving
+        self.bus.publish(FileSaved(job.path, job.encoding))
+        self.symbols.refresh([job.path])
+        self.lsp.saved(job.path)
+
+        # 4) Push the saved text to other views of the same file, from memory
+        for other in self.editor_area.text_editors():
+            if other is ed or other.document().isModified():
+                continue
+            other_path = getattr(other, "file_path", None)
+            if not other_path or os.path.abspath(other_path) != job.path:
+                continue
             tc = other.textCursor()
             pos = tc.position()
-            other.blockSignals(True)
-            other.setPlainText(content)
-            other.blockSignals(False)
+            other.disk_stat = job.stat
+            text = job.snapshot.text()
+            other.setPlainText(text)
             other.document().setModified(False)
-            tc.setPosition(min(pos, len(content)))
+            tc.setPosition(min(pos, len(text)))
             other.setTextCursor(tc)
-
-        # primary tabs
-        for i in range(self.editor_area.tabs.count()):
-            w = self.editor_area.tabs.widget(i)
-            # get its editor if it’s a splitter, else w itself
-            target = w.editor if hasattr(w, "editor") else w
-            if getattr(target, "file_path", None) == path and target is not ed:
-                reload_ed(target)
-
-        # secondary (split) tabs
-        st = self.editor_area.secondary_tabs
-        if st:
-            for i in range(st.count()):
-                w = st.widget(i)
-                target = w.editor if hasattr(w, "editor") else w
-                if getattr(target, "file_path", None) == path and target is not ed:
-                    reload_ed(target)
-
-        # 5) Update any live-preview panes
-        from PyQt6.QtCore import QUrl
-        import markdown
-        def refresh_container(w):
-            if getattr(w, "file_path", None) != path:
-                return
-            # HTML
-            if hasattr(w, "webview") and hasattr(w, "editor"):
-                base = QUrl.fromLocalFile(path)
-                w.webview.setHtml(w.editor.toPlainText(), base)
-            # Markdown
-            elif hasattr(w, "preview") and hasattr(w, "editor"):
-                w.preview.setHtml(markdown.markdown(w.editor.toPlainText()))
-
-        for i in range(self.editor_area.tabs.count()):
-            refresh_container(self.editor_area.tabs.widget(i))
-        if st:
-            for i in range(st.count()):
-                refresh_container(st.widget(i))
-
-
+        # live previews follow their editor's textChanged, nothing to re-render
 
     def closeEvent(self, ev):
         # Save state before closing
         self.save_state()
+        self.plugin_manager.shutdown()
+        self.symbols.stop()
+        self.lsp.shutdown(wait=True)
+        self.autosave.shutdown()
+        self.saver.shutdown()
+        self.project_sidebar.model.shutdown()
         super().closeEvent(ev)
 
 
 def main():
+    # WebEngine is imported lazily, after the app exists; it needs this set first
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
+    startup_profile.mark("QApplication")
     app.setStyle("Fusion")
     app.setStyleSheet(dark_stylesheet)
     app.setWindowIcon(QIcon(":/nexus_icon.ico"))
+    if tracer.pinned:
+        StallWatchdog.shared().start()  # --trace; otherwise the Performance dock starts it
 
     def launch_main_window():
         w = MainWindow()
+        startup_profile.mark("MainWindow()")
         w.showMaximized()
         w.show()
 
@@ -0,0 +1,158 @@
+import re
+import bisect
+from PyQt6.QtCore import QObject, QTimer
+
+FRAME_MS = 16
+ANCHOR_PREFIX = "nexus-line-"
+
+_FENCE = re.compile(r"^\s{0,3}(`{3,}|~{3,})")
+_HEADING = re.compile(r"^(\s{0,3}#{1,6}\s+)")
+_LIST = re.compile(r"^(\s*(?:[-*+]|\d+[.)])\s+)")
+_QUOTE = re.compile(r"^(\s{0,3}>\s?)")
+# lines we leave alone: rules, tables, raw HTML, setext underlines, indented code
+_SKIP = re.compile(r"^\s{0,3}(?:[-*_](?:\s*[-*_]){2,}\s*$|\||<|=+\s*$)|^(?: {4}|\t)")
+
+
+def annotate_lines(source):
+    """
+    Put an empty named anchor at the start of every Markdown block so the
+    rendered document can be mapped back to source lines. Anchors go after
+    heading/list/quote markers so the block syntax is untouched.
+    """
+    out = []
+    fence = None
+    prev_blank = True
+    for n, line in enumerate(source.split("\n")):
+        m = _FENCE.match(line)
+        if fence is not None:
+            if m and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence):
+                fence = None
+            out.append(line)
+            continue
+        if m:
+            fence = m.group(1)
+            out.append(line)
+            prev_blank = False
+            continue
+        blank = not line.strip()
+        anchor = f'<a name="{ANCHOR_PREFIX}{n}"></a>'
+        marker = _HEADING.match(line) or _LIST.match(line) or _QUOTE.match(line)
+        if marker:
+            line = marker.group(1) + anchor + line[marker.end():]
+        elif prev_blank and not blank and not _SKIP.match(line):
+            indent = len(line) - len(line.lstrip())
+            line = line[:indent] + anchor + line[indent:]
+        out.append(line)
+        prev_blank = blank
+    return "\n".join(out)
+
+
+def render_markdown(source):
+    import markdown
+    return markdown.markdown(annotate_lines(source))
+
+
+class ScrollSync(QObject):
+    """
+    Keeps a Markdown editor and its rendered preview (a QTextEdit) scrolled
+    to the same place. Positions are mapped through the line anchors from
+    annotate_lines, interpolating between neighbours. Scroll events are
+    coalesced to one update per frame, and the scroll we cause on the other
+    side is never fed back.
+    """
+
+    def __init__(self, editor, preview, parent=None):
+        super().__init__(parent or editor)
+        self.editor = editor
+        self.preview = preview
+        self._lines = []      # source lines with an anchor, ascending
+        self._ys = []         # preview y of each anchor, same order
+        self._map_dirty = True
+        self._leader = None   # "editor" or "preview": who scrolled last
+        self._applying = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FRAME_MS)
+        self._timer.timeout.connect(self._apply)
+
+        editor.verticalScrollBar().valueChanged.connect(lambda _: self._scrolled("editor"))
+        preview.verticalScrollBar().valueChanged.connect(lambda _: self._scrolled("preview"))
+
+    def set_html(self, html):
+        """Replace the preview and put it back where the editor is."""
+        self._applying = True
+        try:
+            self.preview.setHtml(html)
+        finally:
+            self._applying = False
+        self._map_dirty = True
+        self._scrolled("editor")
+
+    # ── mapping ──────────────────────────────────────────────────────────
+    def _build_map(self):
+        doc = self.preview.document()
+        layout = doc.documentLayout()
+        found = {}
+        block = doc.begin()
+        while block.isValid():
+            y = None
+            it = block.begin()
+            while not it.atEnd():
+                for name in it.fragment().charFormat().anchorNames():
+                    if name.startswith(ANCHOR_PREFIX):
+                        if y is None:
+                            y = layout.blockBoundingRect(block).top()
+                        found.setdefault(int(name[len(ANCHOR_PREFIX):]), y)
+                it += 1
+            block = block.next()
+        pairs = sorted(found.items())
+        self._lines = [ln for ln, _ in pairs]
+        self._ys = [y for _, y in pairs]
+        self._map_dirty = False
+
+    @staticmethod
+    def _interpolate(x, xs, ys):
+        if not xs:
+            return 0.0
+        i = bisect.bisect_right(xs, x) - 1
+        if i < 0:
+            return ys[0] * (x / xs[0]) if xs[0] else ys[0]
+        if i >= len(xs) - 1:
+            return ys[-1]
+        x0, x1, y0, y1 = xs[i], xs[i + 1], ys[i], ys[i + 1]
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0) if x1 != x0 else y0
+
+    # ── syncing ──────────────────────────────────────────────────────────
+    def _scrolled(self, who):
+        if self._applying:
+            return  # our own scroll of the follower
+        self._leader = who
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _apply(self):
+        if self._map_dirty:
+            self._build_map()
+        if not self._lines:
+            return
+        self._applying = True
+        try:
+            if self._leader == "editor":
+                line = self._editor_line()
+                y = self._interpolate(line, self._lines, self._ys)
+                self.preview.verticalScrollBar().setValue(int(y))
+            elif self._leader == "preview":
+                y = self.preview.verticalScrollBar().value()
+                # ys can repeat (several anchors in one block); keep it monotonic
+                line = self._interpolate(y, self._ys, self._lines)
+                self.editor.verticalScrollBar().setValue(int(line))
+        finally:
+            self._applying = False
+
+    def _editor_line(self):
+        """Top visible source line, with the fraction scrolled into it."""
+        block = self.editor.firstVisibleBlock()
+        top = self.editor.blockBoundingGeometry(block).translated(self.editor.contentOffset()).top()
+        height = self.editor.blockBoundingRect(block).height() or 1
+        return block.blockNumber() + (-top / height)
@@ -0,0 +1,348 @@
+import bisect
+from PyQt6.QtCore import Qt, QObject, QPoint
+from PyQt6.QtGui import QColor, QGuiApplication, QTextCursor, QTextCharFormat, QTextDocument
+from PyQt6.QtWidgets import QTextEdit
+from text_buffer import _ASTRAL
+
+Move = QTextCursor.MoveOperation
+Mode = QTextCursor.MoveMode
+CLUSTER_CHARS = 256     # most text one splice may rewrite (nearby carets share one)
+
+_MOVES = {
+    Qt.Key.Key_Left: Move.Left,
+    Qt.Key.Key_Right: Move.Right,
+    Qt.Key.Key_Up: Move.Up,
+    Qt.Key.Key_Down: Move.Down,
+    Qt.Key.Key_Home: Move.StartOfBlock,
+    Qt.Key.Key_End: Move.EndOfBlock,
+}
+
+
+class MultiCursor(QObject):
+    """
+    Extra carets and column selections for a CodeEditor. The editor's own
+    textCursor() is the primary caret; `cursors` holds the others. Every
+    operation on all carets is a single undo step, and the document emits
+    one contentsChange per cluster of nearby carets rather than one per
+    caret (see _edit).
+    """
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.cursors = []          # extra QTextCursors, kept sorted by position
+        self._column_anchor = None
+        self._caret_color = QColor("#d8dee9")
+        self._sel_format = QTextCharFormat()
+        self._sel_format.setBackground(QColor("#434c5e"))
+
+    def active(self):
+        return bool(self.cursors)
+
+    def all_cursors(self):
+        return self.cursors + [self.editor.textCursor()]
+
+    # ── managing carets ──────────────────────────────────────────────────
+    def clear(self):
+        if self.cursors:
+            self.cursors = []
+            self._changed()
+
+    def add(self, cursor):
+        """Add `cursor` as the new primary caret; the old primary becomes extra."""
+        self.cursors.append(self.editor.textCursor())
+        self.editor.setTextCursor(cursor)
+        self._normalize()
+
+    def _normalize(self):
+        """Sort carets and drop ones that coincide or overlap."""
+        main = self.editor.textCursor()
+        merged = []
+        for c in sorted(self.cursors + [main], key=lambda c: (c.selectionStart(), c.selectionEnd())):
+            prev = merged[-1] if merged else None
+            if prev is not None and (c.selectionStart() < prev.selectionEnd()
+                                     or c.selectionStart() == prev.selectionStart()):
+                if c is main:
+                    merged[-1] = main   # keep the primary caret when two collapse
+                continue
+            merged.append(c)
+        self.cursors = [c for c in merged if c is not main]
+        if main not in merged:
+            # the primary was swallowed by an overlapping caret
+            self.editor.setTextCursor(merged[-1])
+            self.cursors = merged[:-1]
+        self._changed()
+
+    def _changed(self):
+        self.editor.update_extra_selections()
+        self.editor.viewport().update()
+
+    def add_vertical(self, down):
+        """Ctrl+Alt+Up/Down: add a caret on the next line above/below."""
+        carets = self.all_cursors()
+        edge = max(carets, key=lambda c: c.position()) if down else min(carets, key=lambda c: c.position())
+        c = QTextCursor(edge)
+        c.clearSelection()
+        col = c.positionInBlock()
+        if not c.movePosition(Move.NextBlock if down else Move.PreviousBlock):
+            return
+        c.movePosition(Move.Right, Mode.MoveAnchor, min(col, c.block().length() - 1))
+        self.add(c)
+
+    def _needle(self):
+        main = self.editor.textCursor()
+        if not main.hasSelection():
+            main.select(QTextCursor.SelectionType.WordUnderCursor)
+            self.editor.setTextCursor(main)
+        return main.selectedText()
+
+    def add_next_occurrence(self):
+        """Ctrl+D: select the word (or selection) and add its next occurrence."""
+        had_selection = self.editor.textCursor().hasSelection()
+        needle = self._needle()
+        if not needle or not had_selection:
+            self._changed()
+            return
+        doc = self.editor.document()
+        flags = QTextDocument.FindFlag.FindCaseSensitively
+        start = max(c.selectionEnd() for c in self.all_cursors())
+        found = doc.find(needle, start, flags)
+        if found.isNull():
+            found = doc.find(needle, 0, flags)  # wrap around
+        if not found.isNull():
+            self.add(found)
+
+    def select_all_occurrences(self):
+        """Ctrl+Shift+L: a caret on every occurrence of the selection/word."""
+        needle = self._needle()
+        if not needle:
+            return
+        doc = self.editor.document()
+        flags = QTextDocument.FindFlag.FindCaseSensitively
+        main = self.editor.textCursor()
+        found, pos = [], 0
+        while True:
+            c = doc.find(needle, pos, flags)
+            if c.isNull():
+                break
+            found.append(c)
+            pos = c.selectionEnd()
+        self.cursors = [c for c in found if c.selectionStart() != main.selectionStart()]
+        self._normalize()
+
+    # ── column selection (Alt+Shift+drag) ────────────────────────────────
+    def begin_column(self, point):
+        self._column_anchor = QPoint(point)
+        self.update_column(point)
+
+    def update_column(self, point):
+        a, b = self._column_anchor, point
+        ed = self.editor
+        first = ed.cursorForPosition(QPoint(a.x(), min(a.y(), b.y()))).block()
+        last = ed.cursorForPosition(QPoint(a.x(), max(a.y(), b.y()))).block()
+        cursors = []
+        block = first
+        while block.isValid():
+            geo = ed.blockBoundingGeometry(block).translated(ed.contentOffset())
+            y = int(geo.top() + 1)
+            start = ed.cursorForPosition(QPoint(a.x(), y))
+            end = ed.cursorForPosition(QPoint(b.x(), y))
+            # clamp to this block (short lines just get a caret at their end)
+            c = QTextCursor(block)
+            c.setPosition(block.position() + min(start.positionInBlock(), block.length() - 1))
+            c.setPosition(block.position() + min(end.positionInBlock(), block.length() - 1), Mode.KeepAnchor)
+            cursors.append(c)
+            if block == last:
+                break
+            block = block.next()
+        if cursors:
+            self.cursors = cursors[:-1] if b.y() >= a.y() else cursors[1:]
+            ed.setTextCursor(cursors[-1] if b.y() >= a.y() else cursors[0])
+            self._normalize()
+
+    def end_column(self):
+        self._column_anchor = None
+
+    def in_column_drag(self):
+        return self._column_anchor is not None
+
+    # ── editing ──────────────────────────────────────────────────────────
+    def _edit(self, edit_for):
+        """
+        Apply edit_for(cursor) -> (start, end, text) at every caret as one
+        undoable edit. Nearby carets are spliced together as long as the
+        text rewritten stays under CLUSTER_CHARS (a column of carets on
+        adjacent lines is then a handful of inserts, not one per line);
+        every other caret gets an insert of its own. The edits are written
+        last to first, each in its own edit block joined to the first one:
+        still a single undo step, but each emits its own small
+        contentsChange, so nothing between the carets is rewritten,
+        re-highlighted or unfolded. The old QTextCursors are dropped first;
+        moving 1,000 live cursors through 1,000 inserts is quadratic.
+        """
+        main = self.editor.textCursor()
+        carets = sorted(self.cursors + [main], key=lambda c: c.selectionStart())
+        primary = next(i for i, c in enumerate(carets) if c is main)
+        edits = [edit_for(c) for c in carets]
+        snap = self.editor.buffer.snapshot()
+        spliceable = snap.exact and all(
+            e[1] <= n[0] for e, n in zip(edits, edits[1:])
+        ) and not any(_ASTRAL.search(t) for _, _, t in edits)
+        doc = self.editor.document()
+        block = QTextCursor(doc)
+        if spliceable:
+            clusters, positions, shift = [], [], 0
+            for start, end, text in edits:
+                if clusters and end - clusters[-1][0] <= CLUSTER_CHARS:
+                    cluster = clusters[-1]
+                    cluster[2] += [snap.slice(cluster[1], start), text]
+                    cluster[1] = end
+                else:
+                    clusters.append([start, end, [text]])
+                positions.append(start + shift + len(text))
+                shift += len(text) - (end - start)
+            # drop the old QTextCursors, which Qt would move through every insert
+            self.cursors, carets = [], None
+            for i, (lo, hi, parts) in enumerate(reversed(clusters)):
+                if i:
+                    block.joinPreviousEditBlock()
+                else:
+                    block.beginEditBlock()
+                block.setPosition(lo)
+                block.setPosition(hi, Mode.KeepAnchor)
+                block.insertText("".join(parts))
+                block.endEditBlock()
+            carets = []
+            for p in positions:
+                c = QTextCursor(doc)
+                c.setPosition(p)
+                carets.append(c)
+        else:
+            # overlapping edits or positions we can't trust: let Qt
+            # move every cursor through every edit
+            block.beginEditBlock()
+            try:
+                for c, (start, end, text) in zip(carets, edits):
+                    c.setPosition(start)
+                    c.setPosition(end, Mode.KeepAnchor)
+                    c.insertText(text)
+            finally:
+                block.endEditBlock()
+        self.editor.setTextCursor(carets[primary])
+        self.cursors = carets[:primary] + carets[primary + 1:]
+        self._normalize()
+        self.editor.ensureCursorVisible()
+
+    def insert(self, text):
+        self._edit(lambda c: (c.selectionStart(), c.selectionEnd(), text))
+
+    def insert_each(self, texts):
+        """One text per caret, in document order (paste of a column)."""
+        texts = iter(texts)
+        self._edit(lambda c: (c.selectionStart(), c.selectionEnd(), next(texts, "")))
+
+    def delete(self, backwards):
+        last = self.editor.document().characterCount() - 1
+
+        def edit_for(c):
+            start, end = c.selectionStart(), c.selectionEnd()
+            if start != end:
+                return start, end, ""
+            if backwards:
+                return max(start - 1, 0), start, ""
+            return start, min(start + 1, last), ""
+        self._edit(edit_for)
+
+    def move(self, op, keep_anchor):
+        mode = Mode.KeepAnchor if keep_anchor else Mode.MoveAnchor
+        carets = self.all_cursors()
+        for c in carets:
+            c.movePosition(op, mode)
+        self.cursors = carets[:-1]
+        self.editor.setTextCursor(carets[-1])
+        self._normalize()
+
+    def copy_text(self):
+        carets = sorted(self.all_cursors(), key=lambda c: c.position())
+        return "\n".join(c.selectedText().replace("\u2029", "\n") for c in carets)
+
+    # ── event hooks ──────────────────────────────────────────────────────
+    def handle_key(self, ev):
+        """Keys that add carets, and editing keys while several carets exist.
+        Returns True if the event was consumed."""
+        key, mods = ev.key(), ev.modifiers()
+        ctrl = bool(mods & Qt.KeyboardModifier.ControlModifier)
+        alt = bool(mods & Qt.KeyboardModifier.AltModifier)
+        shift = bool(mods & Qt.KeyboardModifier.ShiftModifier)
+
+        if ctrl and alt and key in (Qt.Key.Key_Up, Qt.Key.Key_Down):
+            self.add_vertical(key == Qt.Key.Key_Down)
+            return True
+        if ctrl and not alt and key == Qt.Key.Key_D:
+            self.add_next_occurrence()
+            return True
+        if ctrl and shift and key == Qt.Key.Key_L:
+            self.select_all_occurrences()
+            return True
+        if not self.cursors:
+            return False
+
+        if key == Qt.Key.Key_Escape:
+            self.clear()
+        elif key in _MOVES and not ctrl and not alt:
+            self.move(_MOVES[key], shift)
+        elif key == Qt.Key.Key_Backspace:
+            self.delete(True)
+        elif key == Qt.Key.Key_Delete:
+            self.delete(False)
+        elif key in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.insert("\n")
+        elif key == Qt.Key.Key_Tab:
+            self.insert("\t")
+        elif ctrl and key in (Qt.Key.Key_C, Qt.Key.Key_X):
+            QGuiApplication.clipboard().setText(self.copy_text())
+            if key == Qt.Key.Key_X:
+                self.delete(True)
+        elif ctrl and key == Qt.Key.Key_V:
+            text = QGuiApplication.clipboard().text()
+            lines = text.split("\n")
+            if len(lines) == len(self.cursors) + 1:
+                self.insert_each(lines)
+            else:
+                self.insert(text)
+        elif ctrl and key in (Qt.Key.Key_Z, Qt.Key.Key_Y):
+            # carets don't survive undo/redo; let the editor handle it
+            self.clear()
+            return False
+        elif ev.text() and ev.text().isprintable() and not ctrl and not alt:
+            self.insert(ev.text())
+        else:
+            return False
+        return True
+
+    def selections(self):
+        """ExtraSelections for the extra carets' selected text."""
+        out = []
+        for c in self.cursors:
+            if c.hasSelection():
+                sel = QTextEdit.ExtraSelection()
+                sel.cursor = c
+                sel.format = self._sel_format
+                out.append(sel)
+        return out
+
+    def paint_carets(self, painter):
+        """Draw the extra carets inside the visible range only."""
+        if not self.cursors:
+            return
+        ed = self.editor
+        first = ed.firstVisibleBlock()
+        last = ed.cursorForPosition(QPoint(0, ed.viewport().height())).block()
+        lo = first.position()
+        hi = last.position() + last.length()
+        positions = [c.position() for c in self.cursors]
+        i = bisect.bisect_left(positions, lo)
+        j = bisect.bisect_right(positions, hi)
+        for c in self.cursors[i:j]:
+            r = ed.cursorRect(c)
+            painter.fillRect(r.x(), r.y(), 2, r.height(), self._caret_color)
@@ -0,0 +1,331 @@
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+import functools
+from collections import Counter, deque
+from contextlib import contextmanager
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (
+    QApplication, QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QListWidget, QPlainTextEdit, QSplitter, QFileDialog,
+    QHeaderView,
+)
+from config import get_setting
+from startup_profile import T0
+
+STALL_MS = 250          # GUI thread silent this long counts as a stall
+BEAT_MS = 20            # heartbeat interval on the GUI thread
+MAX_SPANS = 50000       # spans kept (a ring; the oldest fall off)
+MAX_STALLS = 50
+LAG_WINDOW_S = 10       # the panel's "recent" window
+
+
+class Tracer:
+    """
+    Timing spans in a bounded ring, from any thread. Spans are only
+    recorded while `enabled` (the Perf dock is open, or --trace was given);
+    disabled spans cost one attribute check.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.pinned = enabled       # --trace: stay on when the dock closes
+        self.spans = deque(maxlen=MAX_SPANS)    # (name, cat, start, duration, thread id)
+
+    def add(self, name, cat, start, end):
+        """Record a span timed by the caller (perf_counter seconds)."""
+        if self.enabled:
+            self.spans.append((name, cat, start, end - start, threading.get_ident()))
+
+    @contextmanager
+    def span(self, name, cat="app"):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, cat, t0, time.perf_counter() - t0, threading.get_ident()))
+
+    def traced(self, name=None, cat="app"):
+        """Decorator form of span()."""
+        def wrap(fn):
+            label = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.spans.append((label, cat, t0, time.perf_counter() - t0, threading.get_ident()))
+            return inner
+        return wrap
+
+    def clear(self):
+        self.spans.clear()
+
+    def top(self, n=20, since=None):
+        """[(name, cat, calls, total ms, max ms)] by total time."""
+        agg = {}
+        for name, cat, start, dur, _ in list(self.spans):
+            if since is not None and start < since:
+                continue
+            a = agg.get(name)
+            if a is None:
+                agg[name] = a = [cat, 0, 0.0, 0.0]
+            a[1] += 1
+            a[2] += dur
+            a[3] = max(a[3], dur)
+        rows = [(k, v[0], v[1], v[2] * 1000, v[3] * 1000) for k, v in agg.items()]
+        rows.sort(key=lambda r: -r[3])
+        return rows[:n]
+
+    def chrome_trace(self, stalls=()):
+        """The spans (and stalls) as a Chrome/Perfetto trace dict."""
+        pid = os.getpid()
+        gui = threading.main_thread().ident
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "Nexus Editor"}}]
+        for tid in {s[4] for s in self.spans} | {gui}:
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": "GUI" if tid == gui else f"worker {tid}"}})
+        for name, cat, start, dur, tid in list(self.spans):
+            if cat == "stall" and stalls:
+                continue  # added below, with their stacks
+            events.append({"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                           "ts": round((start - T0) * 1e6, 1), "dur": round(dur * 1e6, 1)})
+        for st in stalls:
+            events.append({"name": f"stall in {st.where()}", "cat": "stall", "ph": "X",
+                           "pid": pid, "tid": gui, "ts": round((st.start - T0) * 1e6, 1),
+                           "dur": round(st.duration * 1e6, 1), "args": {"stack": "".join(st.stack)}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path, stalls=()):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(stalls), f)
+
+
+tracer = Tracer("--trace" in sys.argv)
+
+
+class Stall:
+    """One stretch of the GUI thread not getting back to the event loop."""
+
+    def __init__(self, start, stack):
+        self.start = start
+        self.duration = 0.0
+        self.stack = stack              # formatted stack at detection
+        self.samples = Counter()        # "file:line func" of the innermost frame, per tick
+        self.over = False
+
+    def where(self):
+        if self.samples:
+            return self.samples.most_common(1)[0][0]
+        return self.stack[-1].strip().splitlines()[0] if self.stack else "?"
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+
+
+class StallWatchdog(QObject):
+    """
+    A QTimer on the GUI thread bumps a heartbeat every BEAT_MS; a plain
+    Python thread checks it and, when it is older than the threshold
+    (`stall_threshold_ms`), captures the GUI thread's Python stack and
+    keeps sampling it until the loop comes back. Heartbeat lateness is
+    also kept as per-frame event-loop lag. It only runs while tracing is
+    on (from launch with --trace, else while the Performance dock is
+    shown), so an idle editor isn't woken every BEAT_MS.
+    """
+
+    stalled = pyqtSignal(object)    # Stall, once it has ended
+    _instance = None
+
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            app = QApplication.instance()
+            cls._instance = cls(parent=app)
+            app.aboutToQuit.connect(cls._instance.stop)
+        return cls._instance
+
+    def __init__(self, threshold_ms=None, parent=None):
+        super().__init__(parent)
+        self.threshold = (threshold_ms or get_setting("stall_threshold_ms", STALL_MS)) / 1000
+        self.lags = deque(maxlen=LAG_WINDOW_S * 1000 // BEAT_MS)   # (time, ms late)
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self._beat = time.perf_counter()
+        self._gui = threading.get_ident()
+        self._stop = None           # Event of the running watch thread
+        self._timer = QTimer(self)
+        self._timer.setInterval(BEAT_MS)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        if self._stop is not None:
+            return
+        self._beat = time.perf_counter()
+        self._stop = threading.Event()
+        threading.Thread(target=self._watch, args=(self._stop,), name="stall-watchdog",
+                         daemon=True).start()
+        self._timer.start()
+
+    def stop(self):
+        if self._stop is None:
+            return
+        self._timer.stop()
+        self._stop.set()
+        self._stop = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.lags.append((now, max(0.0, (now - self._beat) * 1000 - BEAT_MS)))
+        self._beat = now
+
+    def _watch(self, stop):
+        current = None
+        poll = max(self.threshold / 5, 0.01)
+        while not stop.wait(poll):
+            beat = self._beat
+            now = time.perf_counter()
+            if now - beat > self.threshold:
+                frame = sys._current_frames().get(self._gui)
+                if current is None or current.start != beat:
+                    current = Stall(beat, traceback.format_stack(frame) if frame else [])
+                    self.stalls.append(current)
+                if frame is not None:
+                    current.samples[_frame_label(frame)] += 1
+                current.duration = now - beat
+            elif current is not None:
+                current.duration = max(current.duration, beat - current.start)
+                current.over = True
+                tracer.add(f"stall in {current.where()}", "stall", current.start,
+                           current.start + current.duration)
+                print(f"⚠️  UI stalled for {current.duration * 1000:.0f} ms in {current.where()}",
+                      file=sys.stderr)
+                self.stalled.emit(current)
+                current = None
+
+    def recent_lag(self, window=LAG_WINDOW_S):
+        """(p50, p95, max) event-loop lag in ms over the last `window` seconds."""
+        cutoff = time.perf_counter() - window
+        lags = sorted(ms for t, ms in list(self.lags) if t >= cutoff)
+        if not lags:
+            return 0.0, 0.0, 0.0
+        return lags[len(lags) // 2], lags[min(len(lags) - 1, int(len(lags) * 0.95))], lags[-1]
+
+
+class PerfDock(QDockWidget):
+    """Event-loop lag, the slowest spans, and captured stalls with their stacks."""
+
+    def __init__(self, parent=None):
+        super().__init__("Performance", parent)
+        self.watchdog = StallWatchdog.shared()
+        self.watchdog.stalled.connect(lambda _: self._refresh_stalls())
+
+        w = QWidget()
+        lay = QVBoxLayout(w)
+        self.lag_label = QLabel()
+        lay.addWidget(self.lag_label)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Span", "Kind", "Calls", "Total ms", "Max ms"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        self.stall_list = QListWidget()
+        self.stall_list.currentRowChanged.connect(self._show_stack)
+        self.stack_view = QPlainTextEdit()
+        self.stack_view.setReadOnly(True)
+
+        split = QSplitter(Qt.Orientation.Vertical)
+        split.addWidget(self.table)
+        split.addWidget(self.stall_list)
+        split.addWidget(self.stack_view)
+        lay.addWidget(split)
+
+        buttons = QHBoxLayout()
+        clear = QPushButton("Clear")
+        clear.clicked.connect(self.clear)
+        export = QPushButton("Export Chrome Trace…")
+        export.clicked.connect(self.export)
+        buttons.addWidget(clear)
+        buttons.addWidget(export)
+        lay.addLayout(buttons)
+        self.setWidget(w)
+
+        self._shown = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+
+    # spans and stalls are only collected while someone is looking
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        tracer.enabled = True
+        self.watchdog.start()
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, ev):
+        self._timer.stop()
+        tracer.enabled = tracer.pinned
+        if not tracer.pinned:
+            self.watchdog.stop()
+        super().hideEvent(ev)
+
+    def refresh(self):
+        p50, p95, worst = self.watchdog.recent_lag()
+        self.lag_label.setText(
+            f"Event loop lag, last {LAG_WINDOW_S} s: p50 {p50:.0f} ms · p95 {p95:.0f} ms · "
+            f"max {worst:.0f} ms · {len(self.watchdog.stalls)} stalls"
+        )
+        rows = tracer.top()
+        self.table.setRowCount(len(rows))
+        for r, (name, cat, calls, total, worst) in enumerate(rows):
+            for c, value in enumerate((name, cat, str(calls), f"{total:.1f}", f"{worst:.1f}")):
+                item = QTableWidgetItem(value)
+                if c >= 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(r, c, item)
+        self._refresh_stalls()
+
+    def _refresh_stalls(self):
+        stalls = [s for s in self.watchdog.stalls if s.over]
+        key = (len(stalls), stalls[-1].start if stalls else None)
+        if key == self._shown:
+            return
+        self._shown = key
+        self.stall_list.clear()
+        for s in reversed(stalls):
+            self.stall_list.addItem(f"+{s.start - T0:8.1f} s  {s.duration * 1000:6.0f} ms  {s.where()}")
+
+    def _show_stack(self, row):
+        stalls = [s for s in self.watchdog.stalls if s.over]
+        if 0 <= row < len(stalls):
+            s = stalls[len(stalls) - 1 - row]
+            hot = "\n".join(f"{n:4d}× {label}" for label, n in s.samples.most_common(5))
+            self.stack_view.setPlainText(f"Samples:\n{hot}\n\nStack when detected:\n{''.join(s.stack)}")
+
+    def clear(self):
+        tracer.clear()
+        self.watchdog.stalls.clear()
+        self._shown = None
+        self.stall_list.clear()
+        self.stack_view.clear()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "nexus-trace.json",
+                                              "Trace JSON (*.json)")
+        if path:
+            tracer.export(path, [s for s in self.watchdog.stalls if s.over])
@@ -0,0 +1,555 @@
+import os
+import sys
+import ast
+import json
+import time
+import traceback
+import importlib.util
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, QProcess, pyqtSignal
+from config import get_setting
+from perf_trace import tracer
+
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins")
+HOOK_BUDGET_MS = 50     # a hook slower than this blocked the UI thread noticeably
+STRIKES = 3             # overruns before a plugin is throttled
+THROTTLE_MS = 500       # how often a throttled plugin gets its queued events
+QUEUE_LIMIT = 256       # events kept per throttled handler; older ones are dropped
+HOST_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugin_host.py")
+HOST_FLUSH_MS = 30      # messages to the plugin host are batched this long
+HOST_RESTARTS = 5       # crashes tolerated per HOST_RESTART_WINDOW seconds
+HOST_RESTART_WINDOW = 60
+
+LANGUAGES = {
+    ".py": "python", ".html": "html", ".htm": "html", ".php": "php",
+    ".css": "css", ".js": "js", ".md": "markdown", ".json": "json",
+}
+
+
+def language_for(path):
+    if not path:
+        return None
+    return LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+# ────── events ───────────────────────────────────────────────────────────────
+class Event:
+    """Base class; subscribe to a subclass to receive only that event."""
+
+    __slots__ = ()
+    # events with the same non-None key replace each other in a throttled queue
+    coalesce_key = None
+
+
+class FileOpened(Event):
+    __slots__ = ("path", "language")
+
+    def __init__(self, path, language=None):
+        self.path = path
+        self.language = language
+
+
+class FileSaved(Event):
+    __slots__ = ("path", "encoding")
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+
+
+class TextChanged(Event):
+    """
+    One edit. `snapshot()` returns the buffer's TextSnapshot after it;
+    `source` tells apart two documents open on the same path.
+    """
+
+    __slots__ = ("path", "position", "removed", "added", "snapshot", "source")
+
+    def __init__(self, path, position, removed, added, snapshot, source=None):
+        self.path = path
+        self.position = position
+        self.removed = removed
+        self.added = added
+        self.snapshot = snapshot
+        self.source = source
+
+    @property
+    def coalesce_key(self):
+        return ("text", self.path)
+
+
+class SearchFinished(Event):
+    __slots__ = ("root", "pattern", "results")
+
+    def __init__(self, root, pattern, results):
+        self.root = root
+        self.pattern = pattern
+        self.results = results
+
+
+class CommandRun(Event):
+    __slots__ = ("command",)
+
+    def __init__(self, command):
+        self.command = command
+
+
+# ────── manifests ────────────────────────────────────────────────────────────
+class PluginSpec:
+    """What a plugin file declares, read without importing it."""
+
+    def __init__(self, name, path, events, commands, run_in="editor"):
+        self.name = name
+        self.path = path
+        self.events = events        # e.g. ["onLanguage:python", "onCommand:x.run"]
+        self.commands = commands    # {command id: menu title}
+        self.run_in = run_in        # "editor", or "host" for the plugin host process
+        self.module = None
+        self.instance = None
+        self.hosted = False         # loaded into the plugin host
+        self.failed = False
+
+    @property
+    def active(self):
+        return self.instance is not None or self.hosted
+
+
+def read_manifest(path):
+    """
+    Module-level ACTIVATION_EVENTS, COMMANDS and RUN_IN, parsed from the
+    source. A file that declares no ACTIVATION_EVENTS is an old-style
+    plugin and activates at startup ("*"), as every plugin used to.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in ("ACTIVATION_EVENTS", "COMMANDS", "RUN_IN"):
+                    try:
+                        found[target.id] = ast.literal_eval(node.value)
+                    except (ValueError, TypeError, SyntaxError):
+                        pass
+    events = list(found.get("ACTIVATION_EVENTS", ["*"]))
+    commands = dict(found.get("COMMANDS", {}))
+    events += [f"onCommand:{c}" for c in commands if f"onCommand:{c}" not in events]
+    run_in = "host" if found.get("RUN_IN") == "host" else "editor"
+    return events, commands, run_in
+
+
+def discover(plug_dir=PLUGIN_DIR):
+    specs = []
+    if not os.path.isdir(plug_dir):
+        return specs
+    for fn in sorted(os.listdir(plug_dir)):
+        if not fn.endswith(".py"):
+            continue
+        path = os.path.join(plug_dir, fn)
+        try:
+            events, commands, run_in = read_manifest(path)
+        except (OSError, SyntaxError, ValueError):
+            traceback.print_exc()
+            continue
+        specs.append(PluginSpec(fn[:-3], path, events, commands, run_in))
+    return specs
+
+
+# ────── bus ──────────────────────────────────────────────────────────────────
+class HookStats:
+    __slots__ = ("calls", "total_ms", "max_ms", "overruns", "throttled")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.overruns = 0
+        self.throttled = False
+
+
+class EventBus(QObject):
+    """
+    Typed publish/subscribe between the editor and plugins. Every handler
+    call is timed against the hook budget (`plugin_hook_budget_ms`); a
+    plugin that overruns it is flagged, and after a few overruns its
+    handlers stop running inline and get their events in batches from a
+    timer instead, so it can no longer stall typing.
+    """
+
+    flagged = pyqtSignal(str, str, float)    # plugin, event type, ms
+    throttled = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.budget_ms = get_setting("plugin_hook_budget_ms", HOOK_BUDGET_MS)
+        self._handlers = {}      # event type -> [(owner, handler)]
+        self._activators = []    # called with every event before delivery
+        self.stats = {}          # owner -> HookStats
+        self._pending = {}       # (owner, handler) -> deque of events
+        self._timer = QTimer(self)
+        self._timer.setInterval(THROTTLE_MS)
+        self._timer.timeout.connect(self._drain)
+
+    def subscribe(self, event_type, handler, owner="core"):
+        self._handlers.setdefault(event_type, []).append((owner, handler))
+        self.stats.setdefault(owner, HookStats())
+
+    def unsubscribe_owner(self, owner):
+        for event_type, subs in self._handlers.items():
+            self._handlers[event_type] = [s for s in subs if s[0] != owner]
+        self._pending = {k: q for k, q in self._pending.items() if k[0] != owner}
+
+    def add_activator(self, fn):
+        self._activators.append(fn)
+
+    def wants(self, event_type):
+        """Cheap check for hot paths: does anyone handle `event_type`?"""
+        return bool(self._handlers.get(event_type))
+
+    def publish(self, event):
+        for activate in self._activators:
+            activate(event)
+        for owner, handler in list(self._handlers.get(type(event), ())):
+            if self.stats[owner].throttled:
+                self._enqueue(owner, handler, event)
+            else:
+                self.call(owner, type(event).__name__, handler, event)
+
+    def call(self, owner, hook, handler, *args):
+        """Run one plugin hook, timed. Exceptions are printed, not raised."""
+        t0 = time.perf_counter()
+        try:
+            return handler(*args)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            t1 = time.perf_counter()
+            tracer.add(f"{owner}: {hook}", "plugin", t0, t1)
+            self._record(owner, hook, (t1 - t0) * 1000)
+
+    def _record(self, owner, hook, ms):
+        st = self.stats.setdefault(owner, HookStats())
+        st.calls += 1
+        st.total_ms += ms
+        st.max_ms = max(st.max_ms, ms)
+        if ms <= self.budget_ms or owner == "core":
+            return
+        st.overruns += 1
+        print(f"⚠️  plugin '{owner}' blocked the UI for {ms:.0f} ms in {hook}", file=sys.stderr)
+        self.flagged.emit(owner, hook, ms)
+        if st.overruns >= STRIKES and not st.throttled:
+            st.throttled = True
+            self.throttled.emit(owner)
+
+    def _enqueue(self, owner, handler, event):
+        q = self._pending.setdefault((owner, handler), deque(maxlen=QUEUE_LIMIT))
+        key = event.coalesce_key
+        if key is not None:
+            for i, old in enumerate(q):
+                if old.coalesce_key == key:
+                    del q[i]
+                    break
+        q.append(event)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _drain(self):
+        """One queued event per throttled handler per tick."""
+        for (owner, handler), q in list(self._pending.items()):
+            if q:
+                event = q.popleft()
+                self.call(owner, type(event).__name__, handler, event)
+        if not any(self._pending.values()):
+            self._timer.stop()
+
+    def report(self):
+        lines = []
+        for owner, st in sorted(self.stats.items(), key=lambda kv: -kv[1].total_ms):
+            if owner == "core":
+                continue
+            flag = " THROTTLED" if st.throttled else (" slow" if st.overruns else "")
+            lines.append(f"{owner}: {st.calls} calls, {st.total_ms:.0f} ms total, "
+                         f"max {st.max_ms:.0f} ms, {st.overruns} over budget{flag}")
+        return "\n".join(lines) or "No plugin hooks have run."
+
+
+# ────── plugins ──────────────────────────────────────────────────────────────
+class PluginInterface:
+    """
+    Base class for plugins/*.py `Plugin` classes. Declare when to load with
+    module-level ACTIVATION_EVENTS (["onLanguage:python", "onCommand:id",
+    "onStartupFinished", "*"]) and menu commands with COMMANDS
+    ({id: title}); subscribe to events in activate().
+    """
+
+    def __init__(self, main_win):
+        self.main = main_win
+        self.bus = None
+        self.name = type(self).__module__
+
+    def activate(self): pass
+    def deactivate(self): pass
+
+    def subscribe(self, event_type, handler):
+        self.bus.subscribe(event_type, handler, owner=self.name)
+
+    def run_command(self, command): pass
+
+
+class PluginManager(QObject):
+    """
+    Reads plugin manifests up front and imports each plugin only when one
+    of its activation events happens: a file of its language is opened,
+    one of its commands is run, or startup finishes. RUN_IN = "host"
+    plugins are loaded into the PluginHost process instead.
+    """
+
+    activated = pyqtSignal(str)
+
+    def __init__(self, main_win, bus, plug_dir=PLUGIN_DIR, host=None):
+        super().__init__(main_win)
+        self.main = main_win
+        self.bus = bus
+        self.host = host
+        self.plug_dir = plug_dir
+        self.specs = []
+        self.started = False
+
+    def start(self):
+        """Read manifests and activate the startup plugins."""
+        self.specs = discover(self.plug_dir)
+        self.started = True
+        if any(e != "*" for s in self.specs for e in s.events):
+            self.bus.add_activator(self.activate_for)
+        for spec in self.specs:
+            if "*" in spec.events or "onStartupFinished" in spec.events:
+                self.activate(spec)
+        return self.specs
+
+    def plugins(self):
+        return [s.instance for s in self.specs if s.instance is not None]
+
+    def commands(self):
+        return [(cmd, title) for s in self.specs for cmd, title in s.commands.items()]
+
+    def activate_for(self, event):
+        if isinstance(event, FileOpened) and event.language:
+            wanted = f"onLanguage:{event.language}"
+        elif isinstance(event, CommandRun):
+            wanted = f"onCommand:{event.command}"
+        else:
+            return
+        for spec in self.specs:
+            if not spec.active and not spec.failed and wanted in spec.events:
+                self.activate(spec)
+
+    def activate(self, spec):
+        if spec.active or spec.failed:
+            return spec.instance
+        if spec.run_in == "host":
+            if self.host is None:
+                spec.failed = True
+            else:
+                self.host.load(spec)
+                spec.hosted = True
+                self.activated.emit(spec.name)
+            return None
+        t0 = time.perf_counter()
+        try:
+            if self.plug_dir not in sys.path:
+                sys.path.insert(0, self.plug_dir)   # plugins may import their siblings
+            mod_spec = importlib.util.spec_from_file_location(spec.name, spec.path)
+            mod = importlib.util.module_from_spec(mod_spec)
+            sys.modules[spec.name] = mod
+            mod_spec.loader.exec_module(mod)
+            spec.module = mod
+            p = mod.Plugin(self.main) if hasattr(mod, "Plugin") else None
+        except Exception:
+            traceback.print_exc()
+            p = None
+        # importing counts against the budget too
+        self.bus._record(spec.name, "load", (time.perf_counter() - t0) * 1000)
+        if p is None:
+            spec.failed = True
+            return None
+        p.bus = self.bus
+        p.name = spec.name
+        self.bus.call(spec.name, "activate", p.activate)
+        spec.instance = p
+        self.activated.emit(spec.name)
+        return p
+
+    def run_command(self, command):
+        self.bus.publish(CommandRun(command))
+        for spec in self.specs:
+            if spec.instance is not None and command in spec.commands:
+                self.bus.call(spec.name, f"command {command}", spec.instance.run_command, command)
+
+    def shutdown(self):
+        for spec in self.specs:
+            if spec.instance is not None:
+                self.bus.call(spec.name, "deactivate", spec.instance.deactivate)
+                self.bus.unsubscribe_owner(spec.name)
+                spec.instance = None
+        if self.host is not None:
+            self.host.shutdown()
+
+
+class PluginHost(QObject):
+    """
+    Editor side of plugin_host.py. Starts the host process on the first
+    RUN_IN = "host" plugin, forwards bus events to it as batched
+    newline-delimited JSON (full text when a document is first seen, then
+    only the edits), and restarts it if it dies, replaying the loaded
+    plugins and open documents. `documents()` yields (path, language,
+    snapshot, source) for every open text buffer.
+    """
+
+    message = pyqtSignal(dict)    # status/error messages from host plugins
+
+    def __init__(self, bus, documents, parent=None):
+        super().__init__(parent)
+        self.bus = bus
+        self.documents = documents
+        self.specs = []           # loaded into the host, replayed on restart
+        self._proc = None
+        self._out = []
+        self._inbuf = b""
+        self._synced = {}         # path -> source the host's copy came from
+        self._crashes = deque()
+        self._stopping = False
+        self._subscribed = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(HOST_FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def load(self, spec):
+        self.specs.append(spec)
+        if not self._subscribed:
+            self._subscribed = True
+            for event_type, handler in ((FileOpened, self._on_open), (TextChanged, self._on_change),
+                                        (FileSaved, self._on_save), (CommandRun, self._on_command)):
+                self.bus.subscribe(event_type, handler, owner="plugin host")
+        if self._proc is None:
+            self._start()
+        else:
+            self.send({"type": "load", "name": spec.name, "path": spec.path})
+
+    # ── process ──────────────────────────────────────────────────────────
+    def _start(self):
+        if self._stopping:
+            return
+        proc = QProcess(self)
+        proc.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedErrorChannel)
+        proc.readyReadStandardOutput.connect(self._read)
+        proc.started.connect(self.flush)
+        proc.finished.connect(self._finished)
+        self._proc = proc
+        self._out, self._inbuf, self._synced = [], b"", {}
+        for spec in self.specs:
+            self.send({"type": "load", "name": spec.name, "path": spec.path})
+        for path, language, snap, source in self.documents():
+            self._send_open(path, language, snap, source)
+        proc.start(sys.executable, ["-u", HOST_SCRIPT])
+
+    def _finished(self, code, status):
+        if self._stopping:
+            return
+        self._proc = None
+        now = time.monotonic()
+        self._crashes.append(now)
+        while self._crashes and now - self._crashes[0] > HOST_RESTART_WINDOW:
+            self._crashes.popleft()
+        if len(self._crashes) > HOST_RESTARTS:
+            self.message.emit({"type": "status", "plugin": "plugin host",
+                               "text": "Plugin host keeps crashing; host plugins are disabled"})
+            return
+        self.message.emit({"type": "status", "plugin": "plugin host",
+                           "text": f"Plugin host exited ({code}); restarting"})
+        QTimer.singleShot(250 * 2 ** (len(self._crashes) - 1), self._start)
+
+    def shutdown(self):
+        self._stopping = True
+        self._timer.stop()
+        if self._proc is None:
+            return
+        self.send({"type": "exit"})
+        self.flush()
+        self._proc.closeWriteChannel()
+        if not self._proc.waitForFinished(1000):
+            self._proc.kill()
+            self._proc.waitForFinished(1000)
+
+    # ── messages ─────────────────────────────────────────────────────────
+    def send(self, msg):
+        self._out.append(msg)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        proc = self._proc
+        if not self._out or proc is None or proc.state() != QProcess.ProcessState.Running:
+            return  # written once the process is up (see _start)
+        proc.write((json.dumps(self._out, separators=(",", ":")) + "\n").encode("ascii"))
+        self._out = []
+
+    def _read(self):
+        self._inbuf += bytes(self._proc.readAllStandardOutput())
+        *lines, self._inbuf = self._inbuf.split(b"\n")
+        for line in lines:
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                continue
+            for msg in batch:
+                if msg.get("type") == "resync":
+                    self._resync(msg.get("path"))
+                elif msg.get("type") == "error":
+                    print(f"⚠️  host plugin '{msg.get('plugin')}' failed:\n{msg.get('text')}", file=sys.stderr)
+                    self.message.emit(msg)
+                else:
+                    self.message.emit(msg)
+
+    def _send_open(self, path, language, snap, source):
+        if not path:
+            return
+        self._synced[path] = source
+        self.send({"type": "open", "path": path, "language": language, "text": snap.text()})
+
+    def _resync(self, path):
+        for p, language, snap, source in self.documents():
+            if p == path:
+                self._send_open(p, language, snap, source)
+                return
+        self._synced.pop(path, None)
+
+    def retain(self, paths):
+        """Tell the host to drop documents that are no longer open."""
+        for path in [p for p in self._synced if p not in paths]:
+            del self._synced[path]
+            self.send({"type": "close", "path": path})
+
+    # ── bus events ───────────────────────────────────────────────────────
+    def _on_open(self, event):
+        if event.path and event.path not in self._synced:
+            self._resync(event.path)
+
+    def _on_change(self, event):
+        if not event.path:
+            return
+        snap = event.snapshot()
+        if self._synced.get(event.path) != event.source or not snap.exact:
+            # another buffer on this path, or positions we can't trust
+            self._send_open(event.path, language_for(event.path), snap, event.source)
+            return
+        self.send({"type": "change", "path": event.path, "position": event.position,
+                   "removed": event.removed, "length": len(snap),
+                   "text": snap.slice(event.position, event.position + event.added)})
+
+    def _on_save(self, event):
+        if event.path in self._synced:
+            self.send({"type": "save", "path": event.path})
+
+    def _on_command(self, event):
+        self.send({"type": "command", "command": event.command})
@@ -0,0 +1,174 @@
+"""
+Plugin host: runs plugins that declare RUN_IN = "host" in a separate
+process, so a slow linter or formatter uses another core instead of the
+editor's event loop. Started and restarted by plugin_bus.PluginHost.
+
+Protocol: one JSON list of messages per line, both ways.
+
+editor -> host
+    {"type": "load", "name", "path"}                  import a plugin
+    {"type": "open", "path", "language", "text"}      full document text
+    {"type": "change", "path", "position", "removed", "text", "length"}
+    {"type": "save", "path"}  {"type": "close", "path"}
+    {"type": "command", "command"}  {"type": "exit"}
+host -> editor
+    {"type": "status", "plugin", "text"}
+    {"type": "resync", "path"}                        send "open" again
+    {"type": "error", "plugin", "text"}
+
+No Qt here: plugins get plain strings, never editor objects.
+"""
+import os
+import sys
+import json
+import traceback
+import importlib.util
+
+# plugins import this module as `plugin_host`; make that the running one
+sys.modules.setdefault("plugin_host", sys.modules[__name__])
+
+
+class Document:
+    __slots__ = ("path", "language", "text")
+
+    def __init__(self, path, language, text):
+        self.path = path
+        self.language = language
+        self.text = text
+
+
+class HostPlugin:
+    """
+    Base class for host plugins (`Plugin` in a RUN_IN = "host" file).
+    on_change gets the document once per batch, after all of the batch's
+    edits were applied, with the (position, removed, text) edits in order.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.name = type(self).__module__
+
+    def on_open(self, doc): pass
+    def on_change(self, doc, edits): pass
+    def on_save(self, doc): pass
+    def on_close(self, path): pass
+    def run_command(self, command): pass
+
+    def status(self, text):
+        self.host.send({"type": "status", "plugin": self.name, "text": text})
+
+
+class Host:
+    def __init__(self, stdin=sys.stdin, stdout=sys.stdout):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.docs = {}        # path -> Document
+        self.plugins = []
+        self._out = []
+
+    def send(self, msg):
+        self._out.append(msg)
+
+    def flush(self):
+        if self._out:
+            self.stdout.write(json.dumps(self._out, separators=(",", ":")) + "\n")
+            self.stdout.flush()
+            self._out = []
+
+    def _each(self, method, *args):
+        for p in self.plugins:
+            try:
+                getattr(p, method)(*args)
+            except Exception:
+                self.send({"type": "error", "plugin": p.name, "text": traceback.format_exc()})
+
+    def load(self, name, path):
+        plug_dir = os.path.dirname(path)
+        if plug_dir not in sys.path:
+            sys.path.insert(0, plug_dir)
+        try:
+            spec = importlib.util.spec_from_file_location(name, path)
+            mod = importlib.util.module_from_spec(spec)
+            sys.modules[name] = mod
+            spec.loader.exec_module(mod)
+            p = mod.Plugin(self)
+            p.name = name
+        except Exception:
+            self.send({"type": "error", "plugin": name, "text": traceback.format_exc()})
+            return
+        self.plugins.append(p)
+        for doc in self.docs.values():
+            try:
+                p.on_open(doc)
+            except Exception:
+                self.send({"type": "error", "plugin": name, "text": traceback.format_exc()})
+
+    def handle(self, batch):
+        """Apply one batch; plugins see each document once, fully updated."""
+        opened, changed, saved = [], {}, []
+        for msg in batch:
+            kind = msg.get("type")
+            path = msg.get("path")
+            if kind == "load":
+                self.load(msg["name"], msg["path"])
+            elif kind == "open":
+                self.docs[path] = Document(path, msg.get("language"), msg["text"])
+                changed.pop(path, None)
+                opened.append(path)
+            elif kind == "change":
+                doc = self.docs.get(path)
+                if doc is None:
+                    continue
+                pos, removed, text = msg["position"], msg["removed"], msg["text"]
+                doc.text = doc.text[:pos] + text + doc.text[pos + removed:]
+                if len(doc.text) != msg["length"]:
+                    # lost a delta somewhere; drop the copy and ask for the text
+                    del self.docs[path]
+                    changed.pop(path, None)
+                    self.send({"type": "resync", "path": path})
+                    continue
+                changed.setdefault(path, []).append((pos, removed, text))
+            elif kind == "save":
+                saved.append(path)
+            elif kind == "close":
+                self.docs.pop(path, None)
+                changed.pop(path, None)
+                self._each("on_close", path)
+            elif kind == "command":
+                self._each("run_command", msg["command"])
+            elif kind == "exit":
+                return False
+        for path in opened:
+            if path in self.docs:
+                self._each("on_open", self.docs[path])
+        for path, edits in changed.items():
+            if path not in opened:
+                self._each("on_change", self.docs[path], edits)
+        for path in saved:
+            if path in self.docs:
+                self._each("on_save", self.docs[path])
+        return True
+
+    def run(self):
+        for line in self.stdin:
+            if not line.strip():
+                continue
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                continue
+            alive = self.handle(batch)
+            self.flush()
+            if not alive:
+                return
+
+
+def main():
+    # stdout carries the protocol; stray prints from plugins go to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    Host(sys.stdin, out).run()
+
+
+if __name__ == "__main__":
+    main()
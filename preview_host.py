@@ -0,0 +1,153 @@
+from PyQt6.QtCore import Qt, QObject, QTimer, QUrl
+from PyQt6.QtWidgets import QWidget, QLabel, QStackedLayout
+from config import get_setting
+from perf_trace import tracer
+
+UPDATE_DELAY_MS = 300
+
+
+def _set_lifecycle(view, state_name):
+    """Freeze/discard/activate a view's page where Qt supports it."""
+    page = view.page()
+    if page is None or not hasattr(page, "setLifecycleState"):
+        return
+    state = getattr(page.LifecycleState, state_name, None)
+    if state is not None and page.lifecycleState() != state:
+        page.setLifecycleState(state)
+
+
+class PreviewSlot(QWidget):
+    """
+    Where an HTML preview appears inside a tab. Shows a pooled web view
+    while one is attached, otherwise the last rendered frame as an image.
+    """
+
+    def __init__(self, pool, html, base_url, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.html = html              # callable returning the current HTML
+        self.base_url = base_url
+        self.view = None
+        self.dirty = True             # view (if any) doesn't show the latest HTML
+        self.snapshot = QLabel()
+        self.snapshot.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self._stack = QStackedLayout(self)
+        self._stack.addWidget(self.snapshot)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(UPDATE_DELAY_MS)
+        self._timer.timeout.connect(self.render)
+
+    def schedule_update(self):
+        """Source changed; re-render soon if visible, otherwise on next show."""
+        self.dirty = True
+        if self.view is not None and self.isVisible():
+            self._timer.start()
+
+    @tracer.traced("html preview", "preview")
+    def render(self):
+        if self.view is not None and self.dirty:
+            self.view.setHtml(self.html(), self.base_url)
+            self.dirty = False
+
+    # pool callbacks
+    def _attach(self, view):
+        self.view = view
+        self._stack.addWidget(view)
+        self._stack.setCurrentWidget(view)
+        _set_lifecycle(view, "Active")
+        self.render()
+
+    def _detach(self):
+        view, self.view = self.view, None
+        self._timer.stop()
+        self.dirty = True
+        self._stack.removeWidget(view)
+        self._stack.setCurrentWidget(self.snapshot)
+        return view
+
+    def _capture(self):
+        # runs from hideEvent, when Qt has already cleared the view's visibility;
+        # an empty size means it was never laid out and there is nothing to grab
+        if self.view is not None and not self.view.size().isEmpty():
+            pm = self.view.grab()
+            if not pm.isNull():
+                self.snapshot.setPixmap(pm)
+
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        self.pool.attach(self)
+
+    def hideEvent(self, ev):
+        self.pool.suspend(self)
+        super().hideEvent(ev)
+
+
+class WebPreviewPool(QObject):
+    """
+    A few QWebEngineViews shared by every HTML preview. A view is attached
+    to a tab's PreviewSlot when it is shown; hidden slots keep theirs frozen
+    until another slot needs it, at which point they fall back to the
+    snapshot of their last render. Pool size: `html_preview_pool_size`.
+    """
+
+    def __init__(self, size=None, parent=None):
+        super().__init__(parent)
+        self.size = max(1, size or get_setting("html_preview_pool_size", 2))
+        self._free = []      # views not attached to any slot
+        self._owners = []    # slots holding a view, least recently shown first
+
+    def create_slot(self, html, base_url, parent=None):
+        return PreviewSlot(self, html, QUrl(base_url), parent)
+
+    def _new_view(self):
+        from PyQt6.QtWebEngineWidgets import QWebEngineView
+        view = QWebEngineView()
+        view.destroyed.connect(lambda _=None, v=view: self._forget(v))
+        return view
+
+    def _forget(self, view):
+        # a view deleted along with its slot (e.g. tab cleared without release)
+        if view in self._free:
+            self._free.remove(view)
+        self._owners = [s for s in self._owners if s.view is not view]
+
+    def attach(self, slot):
+        if slot.view is not None:
+            self._owners.remove(slot)
+            self._owners.append(slot)
+            _set_lifecycle(slot.view, "Active")
+            slot.render()
+            return
+        if self._free:
+            view = self._free.pop()
+        elif len(self._owners) < self.size:
+            view = self._new_view()
+        else:
+            # take the view of the least recently shown hidden slot
+            victim = next((s for s in self._owners if not s.isVisible()), None)
+            if victim is None:
+                return  # every pooled view is on screen; keep the snapshot
+            self._owners.remove(victim)
+            view = victim._detach()
+        self._owners.append(slot)
+        slot._attach(view)
+
+    def suspend(self, slot):
+        """Slot was hidden: remember its last frame and freeze the page."""
+        if slot.view is None:
+            return
+        slot._capture()
+        _set_lifecycle(slot.view, "Frozen")
+
+    def release(self, slot):
+        """Slot is going away; return its view to the pool."""
+        if slot.view is None:
+            return
+        self._owners.remove(slot)
+        view = slot._detach()
+        view.setParent(None)
+        view.setHtml("")
+        _set_lifecycle(view, "Discarded")
+        self._free.append(view)
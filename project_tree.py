@@ -0,0 +1,317 @@
+import os
+import bisect
+import queue
+from PyQt6.QtCore import (
+    Qt, QAbstractItemModel, QModelIndex, QMimeData, QThread, QUrl, pyqtSignal
+)
+from PyQt6.QtWidgets import QFileIconProvider
+from project_watcher import ProjectRules
+
+BATCH_SIZE = 512
+
+
+def sort_key(name, is_dir):
+    """Folders first, then case-insensitive by name (like QFileSystemModel)."""
+    return (not is_dir, name.casefold(), name)
+
+
+class _Node:
+    __slots__ = ("name", "path", "is_dir", "parent", "children", "keys", "loaded", "loading")
+
+    def __init__(self, name, path, is_dir, parent=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.parent = parent
+        self.children = []
+        self.keys = []       # sort keys, parallel to children (for bisect)
+        self.loaded = False
+        self.loading = False
+
+    def row(self):
+        return bisect.bisect_left(self.parent.keys, sort_key(self.name, self.is_dir))
+
+
+class DirLoader(QThread):
+    """Lists, filters and sorts directories off the GUI thread, in batches."""
+
+    # generation, dir path, [(name, is_dir)], last batch?
+    batch_ready = pyqtSignal(int, str, list, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+
+    def request(self, generation, path, rules):
+        self.jobs.put((generation, path, rules))
+
+    def stop(self):
+        self.requestInterruption()
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            job = self.jobs.get()
+            if job is None:
+                return
+            generation, path, rules = job
+            entries = []
+            try:
+                with os.scandir(path) as it:
+                    for e in it:
+                        try:
+                            is_dir = e.is_dir()
+                        except OSError:
+                            continue
+                        if rules is None or not rules.is_ignored(e.path, is_dir):
+                            entries.append((e.name, is_dir))
+            except OSError:
+                pass
+            entries.sort(key=lambda e: sort_key(*e))
+            if not entries:
+                self.batch_ready.emit(generation, path, [], True)
+            for i in range(0, len(entries), BATCH_SIZE):
+                self.batch_ready.emit(generation, path, entries[i:i + BATCH_SIZE],
+                                      i + BATCH_SIZE >= len(entries))
+
+
+class ProjectTreeModel(QAbstractItemModel):
+    """
+    Single-column file tree that lists a directory only when the view asks
+    for it (fetchMore), loads it in a worker thread, hides ignored paths and
+    applies filesystem changes as targeted row inserts/removes.
+    """
+
+    # (source paths, destination dir) for drops onto the tree
+    paths_dropped = pyqtSignal(list, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rules = None
+        self._root = _Node("", "", True)
+        self._nodes = {}         # path -> node, for every node we know about
+        self._generation = 0
+        icons = QFileIconProvider()
+        self._dir_icon = icons.icon(QFileIconProvider.IconType.Folder)
+        self._file_icon = icons.icon(QFileIconProvider.IconType.File)
+        self._loader = DirLoader(self)
+        self._loader.batch_ready.connect(self._on_batch)
+        self._loader.start()
+
+    def shutdown(self):
+        self._loader.stop()
+
+    # ── root handling ────────────────────────────────────────────────────
+    def rootPath(self):
+        return self._root.path
+
+    def set_root(self, path):
+        """Switch to a new root (the only place the model is reset)."""
+        path = os.path.abspath(path)
+        self.beginResetModel()
+        self._generation += 1
+        self.rules = ProjectRules(path)
+        self._root = _Node(os.path.basename(path), path, True)
+        self._nodes = {path: self._root}
+        self.endResetModel()
+        self._request(self._root)
+
+    # ── path helpers (QFileSystemModel-compatible names) ─────────────────
+    def filePath(self, index):
+        node = self._node(index)
+        return node.path
+
+    def isDir(self, index):
+        return self._node(index).is_dir
+
+    def index_for_path(self, path):
+        node = self._nodes.get(os.path.abspath(path))
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row(), 0, node)
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def _request(self, node):
+        node.loading = True
+        self._loader.request(self._generation, node.path, self.rules)
+
+    # ── QAbstractItemModel ───────────────────────────────────────────────
+    def index(self, row, column=0, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer().parent
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row(), 0, node)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return node.is_dir and (not node.loaded or bool(node.children))
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return node.is_dir and not node.loaded and not node.loading
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node.is_dir and not node.loaded and not node.loading:
+            self._request(node)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return node.name
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self._dir_icon if node.is_dir else self._file_icon
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return node.path
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return "Name"
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        f = (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+             | Qt.ItemFlag.ItemIsDragEnabled | Qt.ItemFlag.ItemIsEditable)
+        if index.internalPointer().is_dir:
+            f |= Qt.ItemFlag.ItemIsDropEnabled
+        return f
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        """Inline rename."""
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        node = index.internalPointer()
+        new_name = str(value).strip()
+        if not new_name or new_name == node.name or os.sep in new_name:
+            return False
+        new_path = os.path.join(os.path.dirname(node.path), new_name)
+        if os.path.exists(new_path):
+            return False
+        try:
+            os.rename(node.path, new_path)
+        except OSError:
+            return False
+        self.rename_path(node.path, new_path)
+        return True
+
+    # ── drag & drop ──────────────────────────────────────────────────────
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction | Qt.DropAction.CopyAction
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        md = QMimeData()
+        md.setUrls([QUrl.fromLocalFile(self.filePath(i)) for i in indexes if i.column() == 0])
+        return md
+
+    def dropMimeData(self, data, action, row, column, parent):
+        srcs = [u.toLocalFile() for u in data.urls() if u.isLocalFile()]
+        if srcs:
+            self.paths_dropped.emit(srcs, self._node(parent).path)
+        # the sidebar performs the move; returning False keeps the view from
+        # removing the source rows on its own
+        return False
+
+    # ── loading ──────────────────────────────────────────────────────────
+    def _on_batch(self, generation, path, entries, last):
+        if generation != self._generation:
+            return
+        node = self._nodes.get(path)
+        if node is None or node.loaded:
+            return
+        parent_index = self.index_for_path(path)
+        if entries:
+            first = len(node.children)
+            self.beginInsertRows(parent_index, first, first + len(entries) - 1)
+            for name, is_dir in entries:
+                child = _Node(name, os.path.join(path, name), is_dir, node)
+                node.children.append(child)
+                node.keys.append(sort_key(name, is_dir))
+                self._nodes[child.path] = child
+            self.endInsertRows()
+        if last:
+            node.loaded = True
+            node.loading = False
+            if not node.children and parent_index.isValid():
+                # let the view drop the expand arrow
+                self.dataChanged.emit(parent_index, parent_index)
+
+    # ── targeted updates ─────────────────────────────────────────────────
+    def add_path(self, path):
+        """Insert one row for `path` if its parent directory is loaded."""
+        path = os.path.abspath(path)
+        if path in self._nodes:
+            return
+        parent = self._nodes.get(os.path.dirname(path))
+        if parent is None or not parent.loaded:
+            return  # not visible yet; will be listed when expanded
+        is_dir = os.path.isdir(path)
+        if self.rules is not None and self.rules.is_ignored(path, is_dir):
+            return
+        name = os.path.basename(path)
+        key = sort_key(name, is_dir)
+        row = bisect.bisect_left(parent.keys, key)
+        self.beginInsertRows(self.index_for_path(parent.path), row, row)
+        child = _Node(name, path, is_dir, parent)
+        parent.children.insert(row, child)
+        parent.keys.insert(row, key)
+        self._nodes[path] = child
+        self.endInsertRows()
+
+    def remove_path(self, path):
+        """Remove the row for `path` (and forget its subtree)."""
+        node = self._nodes.get(os.path.abspath(path))
+        if node is None or node is self._root:
+            return
+        parent = node.parent
+        row = node.row()
+        self.beginRemoveRows(self.index_for_path(parent.path), row, row)
+        del parent.children[row]
+        del parent.keys[row]
+        self._forget(node)
+        self.endRemoveRows()
+
+    def rename_path(self, old, new):
+        self.remove_path(old)
+        self.add_path(new)
+
+    def _forget(self, node):
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            self._nodes.pop(n.path, None)
+            stack.extend(n.children)
+
+    def apply_changes(self, changes):
+        """Apply a ProjectWatcher ChangeSet as row removals/inserts."""
+        # parents before children for inserts, children before parents for removals
+        for path in sorted(changes.deleted, key=len, reverse=True):
+            self.remove_path(path)
+        for path in sorted(changes.created, key=len):
+            self.add_path(path)
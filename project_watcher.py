@@ -0,0 +1,312 @@
+import os
+import re
+import fnmatch
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from config import get_setting
+
+# directories that are never worth watching (and would exhaust inotify watches)
+IGNORED_DIRS = {
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", ".idea",
+}
+
+
+class ChangeSet:
+    """A batch of coalesced filesystem events (absolute paths)."""
+
+    def __init__(self):
+        self.created = set()
+        self.modified = set()
+        self.deleted = set()
+
+    def __bool__(self):
+        return bool(self.created or self.modified or self.deleted)
+
+    def __repr__(self):
+        return (f"ChangeSet(created={len(self.created)}, "
+                f"modified={len(self.modified)}, deleted={len(self.deleted)})")
+
+
+class ProjectRules:
+    """
+    Which paths the project hides: IGNORED_DIRS, the `ignored_patterns`
+    setting, and the root's .gitignore / .nexusignore (simple glob subset,
+    negations are not supported). All patterns are folded into a couple of
+    compiled regexes so checking 100k entries stays cheap.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        # staging dirs used by file_ops for transactional deletes
+        patterns = [".nexus-trash-*"] + list(get_setting("ignored_patterns", []))
+        for fn in (".gitignore", ".nexusignore"):
+            try:
+                with open(os.path.join(self.root, fn), "r", encoding="utf-8") as f:
+                    patterns.extend(f.read().splitlines())
+            except OSError:
+                continue
+        # (basename patterns, relative-path patterns) x (any entry, dirs only)
+        buckets = {("name", False): [], ("name", True): [], ("rel", False): [], ("rel", True): []}
+        for pat in patterns:
+            pat = pat.strip()
+            if not pat or pat.startswith(("#", "!")):
+                continue
+            dir_only = pat.endswith("/")
+            pat = pat.rstrip("/")
+            # patterns without a slash match the basename anywhere in the tree
+            kind = "rel" if "/" in pat else "name"
+            buckets[(kind, dir_only)].append(fnmatch.translate(pat.lstrip("/")))
+        self._rx = {key: re.compile("|".join(rxs)) for key, rxs in buckets.items() if rxs}
+
+    def is_ignored(self, path, is_dir):
+        name = os.path.basename(path)
+        if is_dir and name in IGNORED_DIRS:
+            return True
+        if not self._rx:
+            return False
+        for (kind, dir_only), rx in self._rx.items():
+            if dir_only and not is_dir:
+                continue
+            if kind == "name":
+                if rx.match(name):
+                    return True
+            elif rx.match(os.path.relpath(path, self.root).replace(os.sep, "/")):
+                return True
+        return False
+
+
+def scan_dir(path, rules=None):
+    """List one directory: (set of subdir names, {file name: mtime_ns})."""
+    dirs, files = set(), {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if rules is not None:
+                            if not rules.is_ignored(entry.path, True):
+                                dirs.add(entry.name)
+                        elif entry.name not in IGNORED_DIRS:
+                            dirs.add(entry.name)
+                    elif rules is None or not rules.is_ignored(entry.path, False):
+                        files[entry.name] = entry.stat(follow_symlinks=False).st_mtime_ns
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return dirs, files
+
+
+class _ScanWorker(QThread):
+    # {dir: (dirs, files) or None if the dir is gone}
+    scanned = pyqtSignal(dict)
+
+    def __init__(self, jobs, rules=None, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs  # list of (dir, recursive)
+        self.rules = rules
+
+    def run(self):
+        result = {}
+        todo = list(self.jobs)
+        while todo:
+            if self.isInterruptionRequested():
+                return
+            path, recursive = todo.pop()
+            listing = scan_dir(path, self.rules)
+            result[path] = listing
+            if recursive and listing:
+                todo.extend((os.path.join(path, d), True) for d in listing[0])
+        self.scanned.emit(result)
+
+
+class ProjectWatcher(QObject):
+    """
+    Single project-wide watcher. Directory events from QFileSystemWatcher
+    (inotify on Linux) are debounced, the affected directories are re-listed
+    off the GUI thread and diffed against the cached snapshot, and the result
+    is published as one ChangeSet through `changed`.
+    """
+
+    changed = pyqtSignal(object)  # ChangeSet
+    ready = pyqtSignal()          # initial scan of a new root finished
+
+    def __init__(self, parent=None, debounce_ms=150):
+        super().__init__(parent)
+        self.root = None
+        self.rules = None
+        self._fsw = QFileSystemWatcher(self)
+        self._fsw.directoryChanged.connect(self._on_dir_changed)
+        self._fsw.fileChanged.connect(self._on_file_changed)
+
+        self._dirs = {}            # dir -> (subdir names, {file: mtime_ns})
+        self._watched_files = set()
+        self._dirty_dirs = {}      # dir -> recursive?
+        self._dirty_files = set()
+        self._worker = None
+        self._initial = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._flush)
+
+    # ── public API ────────────────────────────────────────────────────────
+    def set_root(self, root):
+        """Drop the old snapshot and start a background scan of `root`."""
+        root = os.path.abspath(root)
+        if root == self.root:
+            return
+        self.root = root
+        self.rules = ProjectRules(root)
+        self._stop_worker()
+        dirs = self._fsw.directories()
+        if dirs:
+            self._fsw.removePaths(dirs)
+        self._dirs = {}
+        self._dirty_dirs = {}
+        self._dirty_files = set()
+        self._initial = True
+        self._start_worker([(root, True)])
+
+    def files(self):
+        """Yield every known (non-ignored) file under the root."""
+        for d, (_, files) in self._dirs.items():
+            for name in files:
+                yield os.path.join(d, name)
+
+    def is_ready(self):
+        return self.root is not None and not self._initial
+
+    def set_watched_files(self, paths):
+        """Watch exactly these files for content changes (open editors)."""
+        paths = {os.path.abspath(p) for p in paths if p}
+        gone = self._watched_files - paths
+        if gone:
+            self._fsw.removePaths([p for p in gone if p in self._fsw.files()])
+        new = [p for p in paths - self._watched_files if os.path.isfile(p)]
+        if new:
+            self._fsw.addPaths(new)
+        self._watched_files = paths
+
+    # ── event intake ──────────────────────────────────────────────────────
+    def _on_dir_changed(self, path):
+        self._dirty_dirs.setdefault(path, False)
+        self._timer.start()
+
+    def _on_file_changed(self, path):
+        self._dirty_files.add(path)
+        self._timer.start()
+
+    def _flush(self):
+        if self._worker is not None:
+            # a scan is still running; we'll come back when it is done
+            return
+        if not self._dirty_dirs and not self._dirty_files:
+            return
+        jobs = list(self._dirty_dirs.items())
+        self._dirty_dirs = {}
+        if not jobs:
+            self._emit_file_changes(ChangeSet())
+            return
+        self._start_worker(jobs)
+
+    # ── background scanning ──────────────────────────────────────────────
+    def _start_worker(self, jobs):
+        self._worker = _ScanWorker(jobs, self.rules, self)
+        self._worker.scanned.connect(self._apply_scan)
+        self._worker.finished.connect(self._worker_finished)
+        self._worker.start()
+
+    def _stop_worker(self):
+        if self._worker is not None:
+            self._worker.scanned.disconnect(self._apply_scan)
+            self._worker.requestInterruption()
+            self._worker.wait()
+            self._worker = None
+
+    def _worker_finished(self):
+        worker = self.sender()
+        if worker is self._worker:
+            self._worker = None
+        worker.deleteLater()
+        if self._dirty_dirs or self._dirty_files:
+            self._timer.start()
+
+    def _apply_scan(self, result):
+        cs = ChangeSet()
+        add_watch, drop_watch = [], []
+        for d, listing in result.items():
+            if not (d == self.root or d.startswith(self.root + os.sep)):
+                continue
+            old = self._dirs.get(d)
+            if listing is None:
+                self._forget_tree(d, cs, drop_watch)
+                continue
+            subdirs, files = listing
+            if old is not None:
+                old_dirs, old_files = old
+                for name, mtime in files.items():
+                    prev = old_files.get(name)
+                    if prev is None:
+                        cs.created.add(os.path.join(d, name))
+                    elif prev != mtime:
+                        cs.modified.add(os.path.join(d, name))
+                for name in old_files.keys() - files.keys():
+                    cs.deleted.add(os.path.join(d, name))
+                for name in old_dirs - subdirs:
+                    self._forget_tree(os.path.join(d, name), cs, drop_watch)
+                for name in subdirs - old_dirs:
+                    sub = os.path.join(d, name)
+                    cs.created.add(sub)
+                    if sub not in result:
+                        # new directory: pick up its contents on the next pass
+                        self._dirty_dirs[sub] = True
+            elif not self._initial:
+                cs.created.add(d)
+                cs.created.update(os.path.join(d, n) for n in files)
+            self._dirs[d] = (subdirs, files)
+            add_watch.append(d)
+
+        if drop_watch:
+            watched = set(self._fsw.directories())
+            drop = [p for p in drop_watch if p in watched]
+            if drop:
+                self._fsw.removePaths(drop)
+        if add_watch:
+            watched = set(self._fsw.directories())
+            add = [p for p in add_watch if p not in watched]
+            if add:
+                self._fsw.addPaths(add)
+
+        if self._initial:
+            self._initial = False
+            self.ready.emit()
+            return
+        if self._dirty_dirs:
+            self._timer.start()
+        self._emit_file_changes(cs)
+
+    def _forget_tree(self, d, cs, drop_watch):
+        prefix = d + os.sep
+        for sub in [p for p in self._dirs if p == d or p.startswith(prefix)]:
+            _, files = self._dirs.pop(sub)
+            cs.deleted.update(os.path.join(sub, n) for n in files)
+            cs.deleted.add(sub)
+            drop_watch.append(sub)
+
+    def _emit_file_changes(self, cs):
+        for path in self._dirty_files:
+            if os.path.exists(path):
+                if path not in cs.created:
+                    cs.modified.add(path)
+            else:
+                cs.deleted.add(path)
+        self._dirty_files = set()
+        # editors that replace files atomically drop our inotify watch
+        lost = [p for p in self._watched_files
+                if p not in self._fsw.files() and os.path.isfile(p)]
+        if lost:
+            self._fsw.addPaths(lost)
+        if cs:
+            self.changed.emit(cs)
@@ -0,0 +1,106 @@
+import os
+import queue
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from atomic_io import atomic_write
+from perf_trace import tracer
+
+CHUNK = 1 << 20
+
+
+class SaveJob:
+    """A snapshot of one buffer on its way to disk."""
+
+    def __init__(self, path, snapshot, encoding="utf-8", editor=None, revision=None):
+        self.path = path
+        self.snapshot = snapshot      # text_buffer.TextSnapshot
+        self.encoding = encoding
+        self.editor = editor
+        self.revision = revision
+        self.changed = False  # False when the bytes on disk were already identical
+        self.error = None
+        self.stat = None
+
+
+def same_as_disk(path, data):
+    """True if `path` already holds exactly `data` (size check first, then bytes)."""
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            for off in range(0, len(data), CHUNK):
+                if f.read(CHUNK) != data[off:off + CHUNK]:
+                    return False
+        return True
+    except OSError:
+        return False
+
+
+class _SaveWorker(QThread):
+    done = pyqtSignal(object)  # SaveJob
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                self._write(job)
+            except (OSError, UnicodeError, LookupError) as e:
+                job.error = str(e)
+            self.done.emit(job)
+
+    @tracer.traced("save", "io")
+    def _write(self, job):
+        data = job.snapshot.encode(job.encoding)
+        if not same_as_disk(job.path, data):
+            atomic_write(job.path, data)
+            job.changed = True
+        st = os.stat(job.path)
+        job.stat = (st.st_mtime_ns, st.st_size)
+
+
+class SavePipeline(QObject):
+    """
+    Encodes and writes buffer snapshots in a worker thread using a temp
+    file, fsync and rename. Writes whose bytes match the file on disk are
+    skipped. Remembers the stat of every file it wrote so watcher events
+    caused by our own saves can be told apart from external edits.
+    """
+
+    saved = pyqtSignal(object)  # SaveJob (check job.error)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._written = {}  # abs path -> (mtime_ns, size) after our last write
+        self._worker = _SaveWorker(self)
+        self._worker.done.connect(self._on_done)
+        self._worker.start()
+
+    def save(self, path, snapshot, encoding="utf-8", editor=None, revision=None):
+        job = SaveJob(os.path.abspath(path), snapshot, encoding, editor, revision)
+        self._worker.jobs.put(job)
+        return job
+
+    def is_own_write(self, path):
+        """True if `path` on disk is still exactly what we last wrote."""
+        known = self._written.get(os.path.abspath(path))
+        if known is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == known
+
+    def shutdown(self):
+        self._worker.jobs.put(None)
+        self._worker.wait()
+
+    def _on_done(self, job):
+        if job.stat is not None:
+            self._written[job.path] = job.stat
+        self.saved.emit(job)
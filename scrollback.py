@@ -0,0 +1,256 @@
+import re
+from PyQt6.QtWidgets import QAbstractScrollArea, QApplication
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QKeySequence
+from PyQt6.QtCore import Qt, QTimer
+
+
+class ScrollbackBuffer:
+    """
+    Fixed-size ring buffer of output lines. Once `max_lines` is reached the
+    oldest line is overwritten, so memory stays bounded no matter how much
+    a command prints.
+    """
+
+    def __init__(self, max_lines=10000):
+        self.max_lines = max(1, int(max_lines))
+        self._lines = []
+        self._start = 0
+        # total number of lines that fell off the top; lets callers keep
+        # absolute line numbers stable across drops
+        self.dropped = 0
+        self.longest = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, i):
+        n = len(self._lines)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("scrollback index out of range")
+        return self._lines[(self._start + i) % n]
+
+    def append(self, line):
+        if len(line) > self.longest:
+            self.longest = len(line)
+        if len(self._lines) < self.max_lines:
+            self._lines.append(line)
+        else:
+            self._lines[self._start] = line
+            self._start = (self._start + 1) % self.max_lines
+            self.dropped += 1
+
+    def extend(self, lines):
+        for line in lines:
+            self.append(line)
+
+    def clear(self):
+        self._lines = []
+        self._start = 0
+        self.dropped = 0
+        self.longest = 0
+
+    def lines(self, first=0, last=None):
+        """Yield lines in [first, last) without copying the whole buffer."""
+        n = len(self._lines)
+        last = n if last is None else min(last, n)
+        for i in range(max(0, first), last):
+            yield self._lines[(self._start + i) % n]
+
+    def find(self, pattern, start=0, backwards=False, regex=False, case=False):
+        """
+        Search the buffer for `pattern`, beginning at line `start`, wrapping
+        around once. Returns (line, col_start, col_end) or None.
+        """
+        if not pattern:
+            return None
+        flags = 0 if case else re.IGNORECASE
+        rx = re.compile(pattern if regex else re.escape(pattern), flags)
+        n = len(self._lines)
+        if not n:
+            return None
+        step = -1 if backwards else 1
+        i = min(max(start, 0), n - 1)
+        for _ in range(n):
+            m = rx.search(self[i])
+            if m:
+                return i, m.start(), m.end()
+            i = (i + step) % n
+        return None
+
+
+class ScrollbackView(QAbstractScrollArea):
+    """
+    Read-only terminal output view that only paints the lines currently in
+    the viewport. Appends are queued and flushed at most once per frame.
+    """
+
+    FRAME_MS = 16
+
+    def __init__(self, max_lines=10000, parent=None):
+        super().__init__(parent)
+        self.buffer = ScrollbackBuffer(max_lines)
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self.flush)
+
+        # selection is line based: (anchor, cursor) as absolute line numbers
+        self._sel_anchor = None
+        self._sel_cursor = None
+        # current search hit: (absolute line, start, end)
+        self._hit = None
+
+        font = QFont("Fira Code", 11)
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.setFont(font)
+        self.viewport().setCursor(Qt.CursorShape.IBeamCursor)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self._update_scrollbars()
+
+    # ── appending ─────────────────────────────────────────────────────────
+    def append_text(self, text):
+        """Queue `text` as new line(s); mirrors QPlainTextEdit.appendPlainText."""
+        if text.endswith("\n"):
+            text = text[:-1]
+        self._pending.extend(text.split("\n"))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(self.FRAME_MS)
+
+    def flush(self):
+        if not self._pending:
+            return
+        sb = self.verticalScrollBar()
+        at_bottom = sb.value() >= sb.maximum()
+        pending, self._pending = self._pending, []
+        # only the tail can survive the ring buffer anyway
+        self.buffer.extend(pending[-self.buffer.max_lines:])
+        if len(pending) > self.buffer.max_lines:
+            self.buffer.dropped += len(pending) - self.buffer.max_lines
+        self._update_scrollbars()
+        if at_bottom:
+            sb.setValue(sb.maximum())
+        self.viewport().update()
+
+    def clear(self):
+        self._pending = []
+        self.buffer.clear()
+        self._sel_anchor = self._sel_cursor = self._hit = None
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def scroll_to_bottom(self):
+        self.flush()
+        sb = self.verticalScrollBar()
+        sb.setValue(sb.maximum())
+
+    # ── geometry ──────────────────────────────────────────────────────────
+    def _line_height(self):
+        return QFontMetrics(self.font()).lineSpacing()
+
+    def _visible_lines(self):
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _update_scrollbars(self):
+        vs = self.verticalScrollBar()
+        vs.setRange(0, max(0, len(self.buffer) - self._visible_lines()))
+        vs.setPageStep(self._visible_lines())
+        hs = self.horizontalScrollBar()
+        char_w = QFontMetrics(self.font()).horizontalAdvance("M")
+        hs.setRange(0, max(0, self.buffer.longest * char_w + 8 - self.viewport().width()))
+        hs.setPageStep(self.viewport().width())
+
+    def resizeEvent(self, ev):
+        super().resizeEvent(ev)
+        self._update_scrollbars()
+
+    def _line_at(self, y):
+        """Absolute line number under viewport y-coordinate."""
+        row = self.verticalScrollBar().value() + y // self._line_height()
+        row = min(max(row, 0), max(0, len(self.buffer) - 1))
+        return self.buffer.dropped + row
+
+    # ── painting ──────────────────────────────────────────────────────────
+    def paintEvent(self, ev):
+        painter = QPainter(self.viewport())
+        pal = self.palette()
+        painter.fillRect(ev.rect(), pal.color(pal.ColorRole.Base))
+        fm = QFontMetrics(self.font())
+        lh = fm.lineSpacing()
+        first = self.verticalScrollBar().value()
+        last = min(len(self.buffer), first + self._visible_lines() + 1)
+        x0 = 4 - self.horizontalScrollBar().value()
+        sel = self._selected_rows()
+        hit_bg = QColor("#5e81ac")
+        sel_bg = pal.color(pal.ColorRole.Highlight)
+        painter.setPen(pal.color(pal.ColorRole.Text))
+
+        for row, line in enumerate(self.buffer.lines(first, last), start=first):
+            y = (row - first) * lh
+            absolute = self.buffer.dropped + row
+            if sel and sel[0] <= absolute <= sel[1]:
+                painter.fillRect(0, y, self.viewport().width(), lh, sel_bg)
+            if self._hit and self._hit[0] == absolute:
+                hx = x0 + fm.horizontalAdvance(line[:self._hit[1]])
+                hw = fm.horizontalAdvance(line[self._hit[1]:self._hit[2]])
+                painter.fillRect(hx, y, hw, lh, hit_bg)
+            painter.drawText(x0, y + fm.ascent(), line)
+        painter.end()
+
+    # ── selection & copy ──────────────────────────────────────────────────
+    def _selected_rows(self):
+        if self._sel_anchor is None or self._sel_cursor is None:
+            return None
+        return min(self._sel_anchor, self._sel_cursor), max(self._sel_anchor, self._sel_cursor)
+
+    def selected_text(self):
+        sel = self._selected_rows()
+        if not sel:
+            return ""
+        first = max(0, sel[0] - self.buffer.dropped)
+        last = sel[1] - self.buffer.dropped + 1
+        return "\n".join(self.buffer.lines(first, last))
+
+    def mousePressEvent(self, ev):
+        if ev.button() == Qt.MouseButton.LeftButton:
+            line = self._line_at(int(ev.position().y()))
+            self._sel_anchor = self._sel_cursor = line
+            self.viewport().update()
+        super().mousePressEvent(ev)
+
+    def mouseMoveEvent(self, ev):
+        if ev.buttons() & Qt.MouseButton.LeftButton and self._sel_anchor is not None:
+            self._sel_cursor = self._line_at(int(ev.position().y()))
+            self.viewport().update()
+        super().mouseMoveEvent(ev)
+
+    def keyPressEvent(self, ev):
+        if ev.matches(QKeySequence.StandardKey.Copy):
+            text = self.selected_text()
+            if text:
+                QApplication.clipboard().setText(text)
+            return
+        super().keyPressEvent(ev)
+
+    # ── search ────────────────────────────────────────────────────────────
+    def find(self, pattern, backwards=False, regex=False, case=False):
+        """Find the next match after the current hit and scroll it into view."""
+        self.flush()
+        if self._hit and self._hit[0] >= self.buffer.dropped:
+            start = self._hit[0] - self.buffer.dropped + (-1 if backwards else 1)
+        else:
+            start = len(self.buffer) - 1 if backwards else 0
+        start %= max(1, len(self.buffer))
+        found = self.buffer.find(pattern, start, backwards, regex, case)
+        if not found:
+            self._hit = None
+            self.viewport().update()
+            return False
+        row, s, e = found
+        self._hit = (self.buffer.dropped + row, s, e)
+        sb = self.verticalScrollBar()
+        if not sb.value() <= row < sb.value() + self._visible_lines():
+            sb.setValue(max(0, row - self._visible_lines() // 2))
+        self.viewport().update()
+        return True
@@ -0,0 +1,113 @@
+import json
+import queue
+from PyQt6.QtCore import QObject, QThread, QTimer
+from atomic_io import atomic_write
+
+SESSION_VERSION = 2
+
+
+def upgrade_state(state):
+    """Bring an older session dict up to SESSION_VERSION."""
+    if not isinstance(state, dict):
+        return None
+    if state.get("version") == SESSION_VERSION:
+        return state
+    if "version" not in state:
+        # v1: flat list of paths, everything in the primary pane
+        tabs = [{"path": p} for p in state.get("open_tabs", []) if isinstance(p, str)]
+        active = 0
+        for i, t in enumerate(tabs):
+            if t["path"] == state.get("active_path"):
+                active = i
+        return {
+            "version": SESSION_VERSION,
+            "project_dir": state.get("project_dir"),
+            "window": {"size": state.get("window_size"), "pos": state.get("window_pos")},
+            "panes": [{"tabs": tabs, "active": active}],
+        }
+    return None  # written by a newer editor; don't guess
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return upgrade_state(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def encode_state(state):
+    return json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class _SessionWriter(QThread):
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.jobs = queue.Queue()
+
+    def run(self):
+        while True:
+            data = self.jobs.get()
+            stop = data is None
+            # only the newest pending snapshot matters
+            while not self.jobs.empty():
+                newer = self.jobs.get()
+                if newer is None:
+                    stop = True
+                else:
+                    data = newer
+            if data is not None:
+                try:
+                    atomic_write(self.path, data, fsync=False)
+                except OSError as e:
+                    print(f"⚠️  Could not save state: {e}")
+            if stop:
+                return
+
+
+class SessionStore(QObject):
+    """
+    Keeps the session file current while the editor runs. `collect` is
+    called on the GUI thread (it must be cheap: no document text), the
+    result is encoded compactly and written by a worker, and only when it
+    differs from what was last written.
+    """
+
+    def __init__(self, path, collect, parent=None, interval_ms=5000):
+        super().__init__(parent)
+        self.path = path
+        self.collect = collect
+        self._last = None
+        self._writer = _SessionWriter(path, self)
+        self._writer.start()
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(500)
+        self._debounce.timeout.connect(self.flush)
+        self._periodic = QTimer(self)
+        self._periodic.setInterval(interval_ms)
+        self._periodic.timeout.connect(self.flush)
+        self._periodic.start()
+
+    def schedule(self):
+        """Something changed; write soon (coalesced)."""
+        self._debounce.start()
+
+    def flush(self):
+        data = encode_state(self.collect())
+        if data == self._last:
+            return
+        self._last = data
+        self._writer.jobs.put(data)
+
+    def shutdown(self):
+        """Final synchronous write on exit."""
+        if not self._writer.isRunning():
+            return
+        self._periodic.stop()
+        self._debounce.stop()
+        self.flush()
+        self._writer.jobs.put(None)
+        self._writer.wait()
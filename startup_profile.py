@@ -0,0 +1,48 @@
+import sys
+import time
+import cProfile
+import pstats
+
+T0 = time.perf_counter()
+
+
+class StartupProfile:
+    """
+    Records named phases of startup (time since this module was imported)
+    and, when enabled, a cProfile of everything up to `finish()`. Disabled
+    profiles only keep the marks, which costs nothing measurable.
+    """
+
+    def __init__(self, enabled=False, top=25):
+        self.enabled = enabled
+        self.top = top
+        self.marks = []          # (label, seconds since T0)
+        self.finished = False
+        self._prof = cProfile.Profile() if enabled else None
+        if self._prof is not None:
+            self._prof.enable()
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - T0))
+
+    def finish(self, label="startup complete"):
+        if self.finished:
+            return
+        self.finished = True
+        self.mark(label)
+        if self._prof is None:
+            return
+        self._prof.disable()
+        out = sys.stderr
+        out.write("\n── startup phases ─────────────────────────────────────\n")
+        prev = 0.0
+        for name, t in self.marks:
+            out.write(f"{t * 1000:9.1f} ms  (+{(t - prev) * 1000:7.1f})  {name}\n")
+            prev = t
+        out.write(f"\n── top {self.top} by cumulative time ──────────────────────────\n")
+        stats = pstats.Stats(self._prof, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        out.flush()
+
+
+profile = StartupProfile("--profile-startup" in sys.argv)
@@ -0,0 +1,400 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import bisect
+import hashlib
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from atomic_io import atomic_write
+from config import DATA_DIR, get_setting
+from perf_trace import tracer
+from symbol_parsers import wanted, parse_many
+
+CACHE_DIR = os.path.join(DATA_DIR, "symbols")
+CACHE_VERSION = 1
+POOL_MIN = 64           # smaller batches are parsed on the worker thread itself
+CHUNK = 32              # files per pool task
+MAX_FUZZY = 3000        # fuzzy candidates scored per query
+REBUILD_MS = 300        # lookup tables are rebuilt at most this often while parsing
+
+
+def cache_path(root):
+    return os.path.join(CACHE_DIR, hashlib.sha1(root.encode("utf-8")).hexdigest() + ".json")
+
+
+def _pool_context():
+    # forkserver keeps Qt's threads out of the children; Windows only has spawn
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class _IndexWorker(QThread):
+    """
+    Owns the on-disk cache for the current root ({path: [mtime_ns, size,
+    symbols]}) and does all stat()ing and parsing. Large batches go to a
+    process pool in chunks, so a cold index of a big tree uses every core;
+    each finished chunk is emitted as soon as it is in. The lookup tables
+    are built here as well and handed over whole (`tables`), so the GUI
+    thread never rebuilds them.
+    """
+
+    parsed = pyqtSignal(object)     # (root, {path: symbols}, [removed paths], files left)
+    tables = pyqtSignal(object)     # (root, (rows, exact, sorted, blob, starts))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self.root = None
+        self.entries = {}
+        self._dirty = False
+        self._stale = False         # entries changed since the last tables
+        self._built = 0.0
+        self._pool = None
+        self.workers = get_setting("symbol_index_workers", 0) or max(1, min(4, (os.cpu_count() or 2) - 1))
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job[0] == "drop":
+                del job     # the GUI's previous tables: freed here rather than there
+            else:
+                try:
+                    with tracer.span("symbol index", "worker"):
+                        self._handle(*job)
+                except Exception as e:
+                    print(f"⚠️  Symbol index: {e}", file=sys.stderr)
+            if self.jobs.empty() and self._stale:
+                self._publish()
+            if self.jobs.empty() and self._dirty:
+                self._save()
+        self._save()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _handle(self, kind, root, paths, deleted=()):
+        if kind == "root" and root != self.root:
+            self._save()
+            self.root = root
+            self.entries = self._load(root)
+        elif root != self.root:
+            return  # an update for a project that is no longer open
+        removed = [p for p in deleted if self.entries.pop(p, None) is not None]
+        stale = []
+        if kind == "root":
+            keep = set(paths)
+            removed += [p for p in self.entries if p not in keep]
+            for p in removed:
+                self.entries.pop(p, None)
+            fresh = {}
+            for p in paths:
+                e = self.entries.get(p)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                if e is not None and e[0] == st.st_mtime_ns and e[1] == st.st_size:
+                    fresh[p] = e[2]
+                else:
+                    stale.append(p)
+            # the cached part is searchable before anything is re-parsed
+            self.parsed.emit((root, fresh, removed, len(stale)))
+            self._publish()
+        else:
+            stale = list(paths)
+            if removed:
+                self.parsed.emit((root, {}, removed, len(stale)))
+        self._dirty = self._dirty or bool(removed)
+        self._stale = self._stale or bool(removed)
+        self._parse(root, stale)
+
+    def _parse(self, root, paths):
+        if not paths:
+            return
+        left = len(paths)
+        if len(paths) < POOL_MIN or self.workers < 2:
+            batches = (parse_many(paths[i:i + CHUNK]) for i in range(0, len(paths), CHUNK))
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=_pool_context())
+            futures = [self._pool.submit(parse_many, paths[i:i + CHUNK]) for i in range(0, len(paths), CHUNK)]
+            batches = (f.result() for f in as_completed(futures))
+        for results in batches:
+            if not self.jobs.empty() and self.jobs.queue[0] is None:
+                return  # shutting down
+            update, removed = {}, []
+            for path, mtime, size, symbols in results:
+                if symbols is None:
+                    if self.entries.pop(path, None) is not None:
+                        removed.append(path)
+                    continue
+                self.entries[path] = [mtime, size, symbols]
+                update[path] = symbols
+            left -= len(results)
+            self._dirty = self._stale = True
+            self.parsed.emit((root, update, removed, left))
+            if left and time.monotonic() - self._built >= REBUILD_MS / 1000:
+                self._publish()
+
+    def _publish(self):
+        """
+        Build the lookup tables from the current entries: the rows, a dict
+        for exact names, a sorted list for prefixes, and one newline-joined
+        lowercase blob that a single regex scans for fuzzy matches.
+        """
+        with tracer.span("symbol index tables", "worker"):
+            rows = [(s[0], s[1], s[2], s[3], path) for path, e in self.entries.items() for s in e[2]]
+            lower = [r[0].lower() for r in rows]
+            exact = {}
+            for i, name in enumerate(lower):
+                exact.setdefault(name, []).append(i)
+            starts, pos = [], 0
+            for name in lower:
+                starts.append(pos)
+                pos += len(name) + 1
+            tables = (rows, exact, sorted(zip(lower, range(len(lower)))), "\n".join(lower), starts)
+        self._stale = False
+        self._built = time.monotonic()
+        self.tables.emit((self.root, tables))
+
+    def _load(self, root):
+        try:
+            with open(cache_path(root), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION or data.get("root") != root:
+            return {}
+        return {p: [e[0], e[1], [tuple(s) for s in e[2]]] for p, e in data.get("files", {}).items()}
+
+    def _save(self):
+        if not self._dirty or self.root is None:
+            return
+        self._dirty = False
+        data = {"version": CACHE_VERSION, "root": self.root, "files": self.entries}
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            atomic_write(cache_path(self.root),
+                         json.dumps(data, separators=(",", ":")).encode("utf-8"), fsync=False)
+        except OSError as e:
+            print(f"⚠️  Could not save the symbol cache: {e}", file=sys.stderr)
+
+
+class SymbolIndex(QObject):
+    """
+    Project-wide definitions (Python, JS/TS, PHP, CSS selectors), kept in
+    step with the ProjectWatcher: the file list comes from its snapshot once
+    `ready`, changes from its ChangeSets, and saves from the editor. Parsing
+    happens off the GUI thread; results are cached on disk per root, keyed
+    by path + mtime + size, so reopening a project only re-parses what
+    changed.
+
+    Lookups go through tables the worker builds and hands over whole (see
+    _IndexWorker._publish). Completion is told only which names each batch
+    added and removed (`names_changed`).
+    """
+
+    updated = pyqtSignal()
+    names_changed = pyqtSignal(object, object)    # (added Counter, removed Counter)
+
+    def __init__(self, watcher, parent=None):
+        super().__init__(parent)
+        self.watcher = watcher
+        self.root = None
+        self.files = {}         # path -> [(name, kind, line, container)]
+        self.pending = 0        # files still being parsed
+        self.rows = []          # (name, kind, line, container, path)
+        self._exact = {}
+        self._sorted = []       # (lowercase name, row index)
+        self._blob = ""
+        self._starts = []
+
+        self._worker = _IndexWorker()
+        self._worker.parsed.connect(self._on_parsed)
+        self._worker.tables.connect(self._on_tables)
+        self._worker.start()
+
+        watcher.ready.connect(self._on_ready)
+        watcher.changed.connect(self.on_fs_changes)
+        if watcher.is_ready():
+            self._on_ready()
+
+    def stop(self):
+        self._worker.jobs.put(None)
+        self._worker.wait(5000)
+
+    # ── feeding the worker ────────────────────────────────────────────────
+    def _on_ready(self):
+        if self.files:
+            self.names_changed.emit(Counter(), Counter(
+                s[0] for syms in self.files.values() for s in syms))
+        self.root = self.watcher.root
+        self.files = {}
+        paths = [p for p in self.watcher.files() if wanted(p)]
+        self.pending = len(paths)
+        self._worker.jobs.put(("root", self.root, paths))
+        self._on_tables((self.root, ([], {}, [], "", [])))
+
+    def on_fs_changes(self, changes):
+        if self.root is None:
+            return
+        paths = [p for p in changes.created | changes.modified if wanted(p)]
+        deleted = [p for p in changes.deleted if p in self.files]
+        if paths or deleted:
+            self._worker.jobs.put(("update", self.root, paths, deleted))
+
+    def refresh(self, paths):
+        """Re-parse `paths` now (e.g. right after a save)."""
+        paths = [os.path.abspath(p) for p in paths if wanted(p)]
+        if self.root is not None and paths:
+            self._worker.jobs.put(("update", self.root, [p for p in paths if p.startswith(self.root)]))
+
+    def _on_parsed(self, msg):
+        root, update, removed, left = msg
+        if root != self.root:
+            return
+        added, gone = Counter(), Counter()
+        for p in removed:
+            gone.update(s[0] for s in self.files.pop(p, ()))
+        for p, syms in update.items():
+            gone.update(s[0] for s in self.files.get(p, ()))
+            added.update(s[0] for s in syms)
+        self.files.update(update)
+        self.pending = left
+        if added or gone:
+            # a re-parsed file mostly keeps its names; send only the difference
+            self.names_changed.emit(added - gone, gone - added)
+
+    # ── lookup tables ─────────────────────────────────────────────────────
+    def _on_tables(self, msg):
+        root, tables = msg
+        if root != self.root:
+            return
+        old = (self.rows, self._exact, self._sorted, self._blob, self._starts)
+        self.rows, self._exact, self._sorted, self._blob, self._starts = tables
+        self._worker.jobs.put(("drop", old))
+        self.updated.emit()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, query, limit=50):
+        """
+        Best `limit` rows for `query`: exact names, then prefixes, then
+        substrings, then in-order fuzzy matches; ties go to the tighter
+        match, then the shorter name.
+        """
+        q = "".join(query.split()).lower()
+        if not q or not self.rows:
+            return []
+        scored = {}     # row -> sort key
+        for i in self._exact.get(q, ()):
+            scored[i] = (0, 0, len(q))
+        lo = bisect.bisect_left(self._sorted, (q,))
+        for name, i in self._sorted[lo:lo + limit * 4]:
+            if not name.startswith(q):
+                break
+            scored.setdefault(i, (1, 0, len(name)))
+
+        # a[^\nb]*b[^\nc]*c: each gap stops at the next wanted character, so
+        # the scan never backtracks
+        rx = re.compile(re.escape(q[0]) + "".join(
+            f"[^\n{re.escape(c)}]*{re.escape(c)}" for c in q[1:]))
+        starts, rows = self._starts, self.rows
+        found = 0
+        for m in rx.finditer(self._blob):
+            i = bisect.bisect_right(starts, m.start()) - 1
+            if i in scored:
+                continue
+            span = m.end() - m.start()
+            at_word = m.start() == starts[i] or not self._blob[m.start() - 1].isalnum()
+            scored[i] = (2 if span == len(q) else 3, span - len(q) - at_word, len(rows[i][0]))
+            found += 1
+            if found >= MAX_FUZZY:
+                break
+        best = sorted(scored.items(), key=lambda kv: kv[1])[:limit]
+        return [rows[i] for i, _ in best]
+
+
+class GoToSymbolDialog(QDialog):
+    """Ctrl+Shift+O: fuzzy-find a definition anywhere in the project."""
+
+    def __init__(self, index, open_callback, parent=None):
+        super().__init__(parent, flags=Qt.WindowType.FramelessWindowHint)
+        self.setModal(True)
+        self.index = index
+        self.open_callback = open_callback
+
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(5, 5, 5, 5)
+        self.input = QLineEdit(self)
+        self.input.setPlaceholderText("Go to symbol in project… (Esc to close)")
+        lay.addWidget(self.input)
+        self.list = QListWidget(self)
+        lay.addWidget(self.list)
+        self.status = QLabel(self)
+        lay.addWidget(self.status)
+
+        self.input.textChanged.connect(self.on_filter)
+        self.list.itemActivated.connect(self.open_and_close)
+        index.updated.connect(self._on_updated)
+
+    def showEvent(self, ev):
+        parent = self.parent()
+        if parent:
+            self.setFixedWidth(int(parent.width() * 0.6))
+            geo = parent.geometry()
+            self.move(geo.x() + (geo.width() - self.width()) // 2, geo.y() + 20)
+        super().showEvent(ev)
+        self.input.clear()
+        self.list.clear()
+        self._show_status()
+        self.input.setFocus()
+
+    def _show_status(self):
+        n = len(self.index)
+        if self.index.pending:
+            self.status.setText(f"{n} symbols · indexing, {self.index.pending} files left")
+        else:
+            self.status.setText(f"{n} symbols")
+
+    def _on_updated(self):
+        if self.isVisible():
+            self._show_status()
+            if self.input.text():
+                self.on_filter(self.input.text())
+
+    def on_filter(self, text):
+        self.list.clear()
+        root = self.index.root or ""
+        for name, kind, line, container, path in self.index.search(text):
+            where = f"{container}." if container else ""
+            item = QListWidgetItem(f"{name}    {kind} · {where}{name}    {os.path.relpath(path, root)}:{line}")
+            item.setData(Qt.ItemDataRole.UserRole, (path, line))
+            self.list.addItem(item)
+        if self.list.count():
+            self.list.setCurrentRow(0)
+
+    def open_and_close(self, item):
+        path, line = item.data(Qt.ItemDataRole.UserRole)
+        self.close()
+        self.open_callback(path, line)
+
+    def keyPressEvent(self, ev):
+        if ev.key() == Qt.Key.Key_Escape:
+            self.close()
+        elif ev.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter) and self.list.currentItem():
+            self.open_and_close(self.list.currentItem())
+        elif ev.key() in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+            row = self.list.currentRow() + (1 if ev.key() == Qt.Key.Key_Down else -1)
+            if 0 <= row < self.list.count():
+                self.list.setCurrentRow(row)
+        else:
+            super().keyPressEvent(ev)
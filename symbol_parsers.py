@@ -0,0 +1,158 @@
+"""
+Symbol extraction for the project index. Imported by the index's worker
+processes, so it must stay free of Qt. Every parser returns a list of
+(name, kind, line, container) with 1-based lines.
+"""
+import os
+import re
+import ast
+
+MAX_BYTES = 4 << 20     # bigger files are generated/minified; not worth indexing
+
+# ── Python ───────────────────────────────────────────────────────────────────
+_PY_FALLBACK = re.compile(r"^([ \t]*)(?:async[ \t]+)?(def|class)[ \t]+(\w+)", re.M)
+
+
+def parse_python(text):
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        # half-edited file: still index what the regex can see
+        out = []
+        for m in _PY_FALLBACK.finditer(text):
+            kind = "class" if m.group(2) == "class" else ("method" if m.group(1) else "function")
+            out.append((m.group(3), kind, text.count("\n", 0, m.start()) + 1, ""))
+        return out
+    out = []
+
+    def visit(node, container, in_class):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                out.append((child.name, "class", child.lineno, container))
+                visit(child, f"{container}.{child.name}" if container else child.name, True)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                out.append((child.name, "method" if in_class else "function", child.lineno, container))
+                visit(child, f"{container}.{child.name}" if container else child.name, False)
+    visit(tree, "", False)
+    return out
+
+
+# ── JavaScript / TypeScript ──────────────────────────────────────────────────
+_JS = re.compile(
+    r"^[ \t]*(?:export[ \t]+(?:default[ \t]+)?)?(?:async[ \t]+)?"
+    r"(?:function\*?[ \t]+(?P<func>[\w$]+)"
+    r"|class[ \t]+(?P<cls>[\w$]+)"
+    r"|(?:const|let|var)[ \t]+(?P<var>[\w$]+)[ \t]*=[ \t]*(?:async[ \t]*)?(?:function\b|\([^)\n]*\)[ \t]*=>|[\w$]+[ \t]*=>)"
+    r"|(?P<meth>(?!if\b|for\b|while\b|switch\b|catch\b|return\b|function\b)(?:static[ \t]+|get[ \t]+|set[ \t]+)?[\w$]+)[ \t]*\([^)\n]*\)[ \t]*\{)",
+    re.M,
+)
+_JS_COMMENT = re.compile(r"/\*.*?\*/|//[^\n]*", re.S)
+
+
+def _blank(m):
+    # keep newlines so line numbers survive comment removal
+    return re.sub(r"[^\n]", " ", m.group(0))
+
+
+def parse_js(text):
+    text = _JS_COMMENT.sub(_blank, text)
+    out = []
+    cls, cls_indent = "", -1
+    for m in _JS.finditer(text):
+        line = text.count("\n", 0, m.start()) + 1
+        indent = len(m.group(0)) - len(m.group(0).lstrip())
+        if cls and indent <= cls_indent:
+            cls, cls_indent = "", -1
+        if m.group("cls"):
+            out.append((m.group("cls"), "class", line, ""))
+            cls, cls_indent = m.group("cls"), indent
+        elif m.group("func"):
+            out.append((m.group("func"), "function", line, cls))
+        elif m.group("var"):
+            out.append((m.group("var"), "function", line, cls))
+        elif m.group("meth") and cls:
+            name = m.group("meth").split()[-1]
+            out.append((name, "method", line, cls))
+    return out
+
+
+# ── PHP ──────────────────────────────────────────────────────────────────────
+_PHP = re.compile(
+    r"^[ \t]*(?:(?:abstract|final|public|protected|private|static)[ \t]+)*"
+    r"(?:(?P<kind>class|interface|trait|enum)[ \t]+(?P<cls>\w+)|function[ \t]+&?(?P<func>\w+))",
+    re.M | re.I,
+)
+
+
+def parse_php(text):
+    text = _JS_COMMENT.sub(_blank, text)
+    out = []
+    cls, cls_indent = "", -1
+    for m in _PHP.finditer(text):
+        line = text.count("\n", 0, m.start()) + 1
+        indent = len(m.group(0)) - len(m.group(0).lstrip())
+        if cls and indent <= cls_indent and not m.group("cls"):
+            cls, cls_indent = "", -1
+        if m.group("cls"):
+            out.append((m.group("cls"), m.group("kind").lower(), line, ""))
+            cls, cls_indent = m.group("cls"), indent
+        else:
+            out.append((m.group("func"), "method" if cls else "function", line, cls))
+    return out
+
+
+# ── CSS ──────────────────────────────────────────────────────────────────────
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_RULE = re.compile(r"(?P<sel>[^{}@;]+?)\s*\{")
+MAX_SELECTOR = 200      # longer "selectors" are stray text, not rules
+
+
+def parse_css(text):
+    text = _CSS_COMMENT.sub(_blank, text)
+    out = []
+    for m in _CSS_RULE.finditer(text):
+        sel = m.group("sel")
+        if m.start() and text[m.start() - 1] == "@":
+            continue    # @media/@keyframes headers; the rules inside still count
+        start = m.start("sel") + len(sel) - len(sel.lstrip())
+        line = text.count("\n", 0, start) + 1
+        for part in sel.split(","):
+            part = " ".join(part.split())
+            if part and len(part) <= MAX_SELECTOR and not part[0].isdigit() and part not in ("from", "to"):
+                out.append((part, "selector", line, ""))
+    return out
+
+
+PARSERS = {
+    ".py": parse_python, ".pyw": parse_python,
+    ".js": parse_js, ".mjs": parse_js, ".jsx": parse_js, ".ts": parse_js, ".tsx": parse_js,
+    ".php": parse_php,
+    ".css": parse_css,
+}
+
+
+def wanted(path):
+    return os.path.splitext(path)[1].lower() in PARSERS
+
+
+def parse_file(path):
+    """(path, mtime_ns, size, symbols); symbols is None if the file is unreadable."""
+    try:
+        st = os.stat(path)
+        if st.st_size > MAX_BYTES:
+            return path, st.st_mtime_ns, st.st_size, []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return path, None, None, None
+    parser = PARSERS[os.path.splitext(path)[1].lower()]
+    try:
+        symbols = parser(text)
+    except (RecursionError, MemoryError):
+        symbols = []
+    return path, st.st_mtime_ns, st.st_size, symbols
+
+
+def parse_many(paths):
+    """A chunk of files, so one pool task carries many of them."""
+    return [parse_file(p) for p in paths]
@@ -0,0 +1,240 @@
+import os
+import sys
+import time
+from PyQt6.QtCore import Qt, QObject, QTimer
+from PyQt6.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QPlainTextEdit, QTextEdit,
+)
+from config import get_setting
+
+SWEEP_MS = 30000            # how often idle tabs are looked at
+HIBERNATE_AFTER_MIN = 30    # clean, hidden tabs idle this long are dropped
+BUDGET_MB = 512             # beyond this, hidden clean tabs go LRU-first
+BLOCK_BYTES = 120           # QTextBlock + fragment bookkeeping, per block
+FORMAT_BYTES = 96           # highlighter formats per block (rough)
+WEB_VIEW_BYTES = 40 << 20   # an attached QWebEngineView's renderer, roughly
+
+
+def _asleep(w):
+    # a TabPlaceholder (main.py), without importing main
+    return w.metaObject().className() == "TabPlaceholder"
+
+
+def _document_bytes(doc, highlighted=False):
+    # QTextDocument stores UTF-16
+    blocks = doc.blockCount()
+    return doc.characterCount() * 2 + blocks * (BLOCK_BYTES + (FORMAT_BYTES if highlighted else 0))
+
+
+def _editor_bytes(ed):
+    total = _document_bytes(ed.document(), getattr(ed, "highlighter", None) is not None)
+    buf = getattr(ed, "buffer", None)
+    if buf is not None and buf._snap is not None:
+        # the piece table's strings (each distinct one once)
+        seen = {}
+        for s, _, _ in buf._snap.pieces:
+            seen[id(s)] = s
+        total += sum(sys.getsizeof(s) for s in seen.values())
+    return total
+
+
+def estimate(widget):
+    """Rough bytes held by one tab's widget (0 for placeholders)."""
+    if widget is None or _asleep(widget):
+        return 0
+    total = 0
+    ed = widget.editor if hasattr(widget, "editor") else widget
+    if isinstance(ed, QPlainTextEdit):
+        total += _editor_bytes(ed)
+    preview = getattr(widget, "preview", None)
+    if isinstance(preview, QTextEdit):
+        total += _document_bytes(preview.document())
+    slot = getattr(widget, "preview_slot", None)
+    if slot is not None:
+        if slot.view is not None:
+            total += WEB_VIEW_BYTES
+        pm = slot.snapshot.pixmap()
+        if pm is not None and not pm.isNull():
+            total += pm.width() * pm.height() * 4
+    canvas = getattr(widget, "canvas", None)
+    if canvas is not None:
+        base = getattr(canvas, "base", None)
+        if base is not None:
+            total += base.sizeInBytes()
+        total += sum(img.sizeInBytes() for img in getattr(canvas, "tiles", {}).values())
+        movie = getattr(widget, "movie", None)
+        if movie is not None:
+            size = movie.currentImage().size()
+            total += size.width() * size.height() * 4
+    table = getattr(widget, "memory_bytes", None)
+    if table is not None:
+        total += table()
+    return total
+
+
+class TabHibernator(QObject):
+    """
+    Keeps per-tab last-active times, and turns tabs back into placeholders
+    (EditorArea.hibernate) to free their documents, highlighting and
+    previews. A tab is only hibernated when it is not shown in any pane,
+    has no unsaved changes and its file still exists, so rehydration on
+    activation rebuilds exactly what was there, at the same cursor and
+    scroll position. Tabs idle longer than `hibernate_after_min` go first;
+    then, while the estimate is over `tab_memory_budget_mb`, the least
+    recently used remaining candidates.
+    """
+
+    def __init__(self, editor_area, parent=None):
+        super().__init__(parent)
+        self.area = editor_area
+        self.idle_s = get_setting("hibernate_after_min", HIBERNATE_AFTER_MIN) * 60
+        self.budget = get_setting("tab_memory_budget_mb", BUDGET_MB) << 20
+        self._last = {}      # tab widget -> monotonic time it was last current
+        self._watched = []
+        self.hibernated = 0
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(SWEEP_MS)
+        self._timer.timeout.connect(self.sweep)
+        self._timer.start()
+        # an opened/restored tab may push us over budget; check soon after
+        self._soon = QTimer(self)
+        self._soon.setSingleShot(True)
+        self._soon.setInterval(1000)
+        self._soon.timeout.connect(self.sweep)
+
+        editor_area.files_changed.connect(self._soon.start)
+        editor_area.files_changed.connect(self._watch_panes)
+        self._watch_panes()
+
+    def _watch_panes(self):
+        # the split pane is created on demand
+        for tw in (self.area.tabs, self.area.secondary_tabs):
+            if tw is not None and tw not in self._watched:
+                self._watched.append(tw)
+                tw.currentChanged.connect(lambda _=None, tw=tw: self._touch(tw.currentWidget()))
+                self._touch(tw.currentWidget())
+
+    def _touch(self, w):
+        if w is not None:
+            self._last[w] = time.monotonic()
+            self._soon.start()
+
+    def last_active(self, w):
+        return self._last.setdefault(w, time.monotonic())
+
+    def tabs(self):
+        """(tab widget, index, widget) for every tab in both panes."""
+        for tw in (self.area.tabs, self.area.secondary_tabs):
+            if tw is None:
+                continue
+            for i in range(tw.count()):
+                yield tw, i, tw.widget(i)
+
+    def candidate(self, tw, w):
+        if w is tw.currentWidget() or _asleep(w):
+            return False
+        path = getattr(w, "file_path", None)
+        if not path or not os.path.isfile(path):
+            return False
+        ed = w.editor if hasattr(w, "editor") else w
+        return not (isinstance(ed, QPlainTextEdit) and ed.document().isModified())
+
+    def sweep(self, force=False):
+        """Hibernate idle tabs, then LRU ones while over budget. `force`: every candidate."""
+        live = {w for _, _, w in self.tabs()}
+        self._last = {w: t for w, t in self._last.items() if w in live}
+        now = time.monotonic()
+        sizes = {w: estimate(w) for w in live}
+        total = sum(sizes.values())
+        candidates = sorted(
+            ((self.last_active(w), tw, w) for tw, _, w in self.tabs() if self.candidate(tw, w)),
+            key=lambda c: c[0],
+        )
+        for last, tw, w in candidates:
+            idle = self.idle_s and now - last >= self.idle_s
+            if not (force or idle or total > self.budget):
+                continue
+            index = tw.indexOf(w)
+            if index >= 0 and self.area.hibernate(tw, index) is not None:
+                total -= sizes.get(w, 0)
+                self.hibernated += 1
+        return total
+
+    def rows(self):
+        """(title, pane, bytes, idle seconds, state) per tab, for the panel."""
+        now = time.monotonic()
+        out = []
+        for tw, i, w in self.tabs():
+            pane = "left" if tw is self.area.tabs else "right"
+            if _asleep(w):
+                state = "hibernated" if getattr(w, "hibernated", False) else "not loaded"
+                out.append((tw.tabText(i), pane, 0, None, state))
+                continue
+            state = "visible" if w is tw.currentWidget() else "hidden"
+            ed = w.editor if hasattr(w, "editor") else w
+            if isinstance(ed, QPlainTextEdit) and ed.document().isModified():
+                state += ", unsaved"
+            out.append((tw.tabText(i), pane, estimate(w), now - self.last_active(w), state))
+        return out
+
+
+def _mb(n):
+    return f"{n / (1 << 20):.1f} MB"
+
+
+class TabMemoryDock(QDockWidget):
+    """Per-tab memory estimates against the budget, refreshed while shown."""
+
+    def __init__(self, hibernator, parent=None):
+        super().__init__("Tab Memory", parent)
+        self.hibernator = hibernator
+        w = QWidget()
+        lay = QVBoxLayout(w)
+        self.summary = QLabel()
+        lay.addWidget(self.summary)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Tab", "Pane", "Memory", "Idle", "State"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        lay.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        now = QPushButton("Hibernate Hidden Tabs")
+        now.clicked.connect(lambda: (self.hibernator.sweep(force=True), self.refresh()))
+        buttons.addWidget(now)
+        buttons.addStretch(1)
+        lay.addLayout(buttons)
+        self.setWidget(w)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(2000)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, ev):
+        self._timer.stop()
+        super().hideEvent(ev)
+
+    def refresh(self):
+        rows = sorted(self.hibernator.rows(), key=lambda r: -r[2])
+        total = sum(r[2] for r in rows)
+        asleep = sum(1 for r in rows if r[4] in ("hibernated", "not loaded"))
+        self.summary.setText(
+            f"{_mb(total)} of {_mb(self.hibernator.budget)} budget · {len(rows)} tabs, {asleep} not in memory"
+        )
+        self.table.setRowCount(len(rows))
+        for r, (title, pane, size, idle, state) in enumerate(rows):
+            idle_text = "—" if idle is None else (f"{idle / 60:.0f} min" if idle >= 60 else f"{idle:.0f} s")
+            for c, value in enumerate((title, pane, _mb(size) if size else "—", idle_text, state)):
+                item = QTableWidgetItem(value)
+                if c in (2, 3):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(r, c, item)
@@ -0,0 +1,283 @@
+import re
+import bisect
+import codecs
+from PyQt6.QtGui import QTextCursor
+
+MERGE_LIMIT = 256       # inserts next to a piece shorter than this are merged into it
+COMPACT_AT = 2048       # pieces before the table is flattened into one string
+_ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+# what QTextDocument.toPlainText() does to selected/plain text
+_PLAIN = str.maketrans({"\u2029": "\n", "\u2028": "\n", "\u00a0": " "})
+
+
+class TextSnapshot:
+    """
+    An immutable view of a buffer at one revision. Holds references to the
+    buffer's pieces (never copies of the text), so taking one is cheap and
+    reading it is safe from any thread.
+    """
+
+    __slots__ = ("pieces", "starts", "length", "revision", "exact", "_text")
+
+    def __init__(self, pieces, starts, length, revision=0, exact=True):
+        self.pieces = pieces      # tuple of (str, start, length)
+        self.starts = starts      # tuple of document offsets, parallel to pieces
+        self.length = length
+        self.revision = revision
+        # False when positions here don't match QTextDocument positions
+        # (astral characters count twice in Qt's UTF-16 offsets)
+        self.exact = exact
+        self._text = None
+
+    def __len__(self):
+        return self.length
+
+    def text(self):
+        """The whole text as one string (built once, then cached)."""
+        if self._text is None:
+            self._text = "".join(self.chunks())
+        return self._text
+
+    def chunks(self, start=0, end=None):
+        """Yield the text between `start` and `end` piece by piece."""
+        end = self.length if end is None else min(end, self.length)
+        if start >= end:
+            return
+        i = max(0, bisect.bisect_right(self.starts, start) - 1)
+        while i < len(self.pieces) and self.starts[i] < end:
+            s, st, ln = self.pieces[i]
+            off = self.starts[i]
+            a = max(start - off, 0)
+            b = min(end - off, ln)
+            if a < b:
+                yield s[st + a:st + b]
+            i += 1
+
+    def slice(self, start, end):
+        return "".join(self.chunks(start, end))
+
+    def char_at(self, pos):
+        if not 0 <= pos < self.length:
+            return ""
+        i = bisect.bisect_right(self.starts, pos) - 1
+        s, st, _ = self.pieces[i]
+        return s[st + pos - self.starts[i]]
+
+    def iter_forward(self, pos):
+        """(position, char) from `pos` to the end."""
+        for chunk in self.chunks(pos):
+            for ch in chunk:
+                yield pos, ch
+                pos += 1
+
+    def iter_backward(self, pos):
+        """(position, char) from `pos` down to 0."""
+        if pos < 0:
+            return
+        i = bisect.bisect_right(self.starts, min(pos, self.length - 1)) - 1
+        while i >= 0:
+            s, st, ln = self.pieces[i]
+            off = self.starts[i]
+            for p in range(min(pos, off + ln - 1), off - 1, -1):
+                yield p, s[st + p - off]
+            pos = off - 1
+            i -= 1
+
+    def encode(self, encoding="utf-8", errors="strict"):
+        """Encoded bytes, built chunk by chunk (stateful codecs stay correct)."""
+        enc = codecs.getincrementalencoder(encoding)(errors)
+        out = [enc.encode(chunk) for chunk in self.chunks()]
+        out.append(enc.encode("", final=True))
+        return b"".join(out)
+
+
+class DocumentChars:
+    """
+    Character access straight from a QTextDocument, in Qt's positions.
+    Used instead of a snapshot when the snapshot's positions aren't exact.
+    """
+
+    def __init__(self, document):
+        self.doc = document
+        self.length = document.characterCount() - 1
+
+    def __len__(self):
+        return self.length
+
+    def char_at(self, pos):
+        return self.doc.characterAt(pos) if 0 <= pos < self.length else ""
+
+    def iter_forward(self, pos):
+        for p in range(max(pos, 0), self.length):
+            yield p, self.doc.characterAt(p)
+
+    def iter_backward(self, pos):
+        for p in range(min(pos, self.length - 1), -1, -1):
+            yield p, self.doc.characterAt(p)
+
+
+class PieceTable:
+    """
+    Text as a list of (string, start, length) pieces over immutable strings:
+    the originally loaded text and the inserted runs. Edits only split or
+    add pieces; the text itself is never copied except when small adjacent
+    inserts are merged or the table is compacted. Piece offsets after an
+    edit are recomputed only when a later lookup needs them, so a run of
+    edits written last to first (multi-caret typing) stays linear.
+    """
+
+    def __init__(self, text=""):
+        self.reset(text)
+
+    def reset(self, text):
+        self._pieces = [(text, 0, len(text))] if text else []
+        self._starts = [0] if text else []
+        self._length = len(text)
+
+    def __len__(self):
+        return self._length
+
+    def _reindex(self, first):
+        """Forget piece offsets from piece `first` on (see _offsets); piece
+        `first - 1` must still start where it did."""
+        del self._starts[first:]
+
+    def _offsets(self, pos=None):
+        """Make piece offsets known up to the piece holding `pos` (all of them by default)."""
+        starts, pieces = self._starts, self._pieces
+        n = len(starts)
+        if n == len(pieces):
+            return
+        off = starts[-1] + pieces[n - 1][2] if n else 0
+        if pos is not None and off > pos:
+            return
+        for s, st, ln in pieces[n:]:
+            starts.append(off)
+            off += ln
+
+    def _locate(self, pos):
+        """(piece index, offset inside it); index == len(pieces) at the end."""
+        if pos >= self._length:
+            return len(self._pieces), 0
+        self._offsets(pos)
+        i = bisect.bisect_right(self._starts, pos) - 1
+        return i, pos - self._starts[i]
+
+    def insert(self, pos, text):
+        if not text:
+            return
+        pos = max(0, min(pos, self._length))
+        i, off = self._locate(pos)
+        self._length += len(text)
+        if off == 0:
+            prev = self._pieces[i - 1] if i > 0 else None
+            if prev is not None and prev[2] < MERGE_LIMIT:
+                # typing: grow the small piece just before the cursor
+                s, st, ln = prev
+                merged = s[st:st + ln] + text
+                self._pieces[i - 1] = (merged, 0, len(merged))
+                self._reindex(i - 1)
+            else:
+                self._pieces.insert(i, (text, 0, len(text)))
+                self._reindex(i + 1)
+        else:
+            s, st, ln = self._pieces[i]
+            self._pieces[i:i + 1] = [(s, st, off), (text, 0, len(text)), (s, st + off, ln - off)]
+            self._reindex(i + 1)
+        self._maybe_compact()
+
+    def delete(self, pos, count):
+        pos = max(0, min(pos, self._length))
+        end = min(pos + count, self._length)
+        if end <= pos:
+            return
+        i, off = self._locate(pos)
+        self._offsets(end)
+        kept = []
+        if off:
+            s, st, ln = self._pieces[i]
+            kept.append((s, st, off))
+        j = i
+        while j < len(self._starts) and self._starts[j] < end:
+            j += 1
+        # tail of the last piece touched
+        s, st, ln = self._pieces[j - 1]
+        cut = end - self._starts[j - 1]
+        if cut < ln:
+            kept.append((s, st + cut, ln - cut))
+        self._pieces[i:j] = kept
+        self._reindex(i + 1 if kept else i)
+        self._length -= end - pos
+
+    def _maybe_compact(self):
+        if len(self._pieces) > COMPACT_AT:
+            self.reset("".join(s[st:st + ln] for s, st, ln in self._pieces))
+
+    def snapshot(self, revision=0, exact=True):
+        self._offsets()
+        return TextSnapshot(tuple(self._pieces), tuple(self._starts), self._length, revision, exact)
+
+
+class DocumentBuffer:
+    """
+    Mirrors a QTextDocument in a PieceTable by replaying contentsChange.
+    If the mirror can't be trusted (lengths disagree, or astral characters
+    make Qt's UTF-16 positions differ from Python's), it is rebuilt from
+    toPlainText() the next time a snapshot is taken.
+    """
+
+    def __init__(self, document):
+        self.doc = document
+        self.table = PieceTable()
+        self.revision = 0
+        self._stale = True
+        self._snap = None
+        document.contentsChange.connect(self._on_change)
+
+    def reset(self, text):
+        """Seed from text we already hold (e.g. just read from disk)."""
+        self.table.reset(text)
+        self.revision += 1
+        self._snap = None
+        self._stale = _ASTRAL.search(text) is not None or len(text) != self._doc_length()
+
+    def _doc_length(self):
+        return self.doc.characterCount() - 1
+
+    def _on_change(self, pos, removed, added):
+        if not (removed or added):
+            return
+        self.revision += 1
+        self._snap = None
+        if self._stale:
+            return
+        self.table.delete(pos, removed)
+        if added:
+            end = min(pos + added, self._doc_length())
+            tc = QTextCursor(self.doc)
+            tc.setPosition(pos)
+            tc.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            text = tc.selectedText().translate(_PLAIN)
+            if _ASTRAL.search(text):
+                self._stale = True
+                return
+            self.table.insert(pos, text)
+        if len(self.table) != self._doc_length():
+            self._stale = True
+
+    def snapshot(self):
+        """Immutable snapshot of the current text."""
+        if self._snap is None:
+            exact = True
+            if self._stale:
+                text = self.doc.toPlainText()
+                self.table.reset(text)
+                exact = _ASTRAL.search(text) is None
+                self._stale = not exact
+            self._snap = self.table.snapshot(self.revision, exact)
+        return self._snap
+
+    def chars(self):
+        """Character source whose positions match the document's."""
+        snap = self.snapshot()
+        return snap if snap.exact else DocumentChars(self.doc)